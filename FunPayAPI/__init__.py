@@ -1,5 +1,7 @@
 from .account import Account
+from .async_account import AsyncAccount
 from .updater.runner import Runner
+from .updater.checkpoint import RunnerCheckpoint, SQLiteCheckpoint
 from .updater import events
 from .common import exceptions, utils, enums
 from . import types
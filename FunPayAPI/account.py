@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Literal, Any, Optional, IO
+from typing import TYPE_CHECKING, Literal, Any, Optional, IO, Generator, TypeVar
 
 import FunPayAPI.common.enums
 from FunPayAPI.common.utils import parse_currency, RegularExpressions
@@ -9,21 +9,75 @@ if TYPE_CHECKING:
     from .updater.runner import Runner
 
 from requests_toolbelt import MultipartEncoder
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 from datetime import datetime, timedelta
+import email.utils
+import http.cookiejar
 import requests
+import requests.adapters
 import logging
 import random
 import string
 import json
 import time
 import re
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
 
 from . import types
 from .common import exceptions, utils, enums
+from .common.rate_limiter import RateLimiter
 
 logger = logging.getLogger("FunPayAPI.account")
 PRIVATE_CHAT_ID_RE = re.compile(r"users-\d+-\d+$")
+T = TypeVar("T")
+
+FUNPAY_URL = "https://funpay.com"
+"""Адрес FunPay по умолчанию."""
+
+# Страницы FunPay разбираются не целиком: строятся только нужные контейнеры (см. utils.TagsStrainer)
+MAIN_PAGE_STRAINER = utils.TagsStrainer(("div", "class", "user-link-name"), ("a", "class", "menu-item-logout"),
+                                        ("span", "class", "badge"))
+CATEGORIES_STRAINER = utils.TagsStrainer(("div", "class", "promo-game-list"))
+PROFILE_STRAINER = utils.TagsStrainer(("div", "class", "user-link-name"), ("span", "class", "mr4"),
+                                      ("span", "class", "media-user-status"), ("div", "class", "avatar-photo"),
+                                      ("span", "class", "label-danger"), ("div", "class", "offer"))
+SALES_STRAINER = utils.TagsStrainer(("div", "class", "user-link-name"), ("input", "name", "continue"),
+                                    ("a", "class", "tc-item"), ("select", "name", "game"))
+LOT_FIELDS_STRAINER = utils.TagsStrainer(("form", "class", "form-offer-editor"), ("p", "class", "lead"),
+                                         ("span", "class", "form-control-feedback"),
+                                         ("table", "class", "table-buyers-prices"))
+
+
+class Request:
+    """
+    Запрос к FunPay, который сценарий запросов передает исполнителю (:meth:`FunPayAPI.account.Account.run_flow`).
+    Аргументы совпадают с аргументами :meth:`FunPayAPI.account.Account.method`.
+    """
+    __slots__ = ("args", "kwargs")
+
+    def __init__(self, *args, **kwargs):
+        self.args: tuple = args
+        self.kwargs: dict = kwargs
+
+
+class Parallel:
+    """
+    Инструкция сценария запросов: выполнить несколько вложенных сценариев одновременно (не более limit сразу).
+    Исполнитель отправляет обратно в генератор список результатов в порядке переданных сценариев,
+    а первое возникшее исключение возбуждает в нем.
+
+    :param flows: вложенные сценарии запросов.
+    :type flows: :obj:`list` of :obj:`Generator`
+
+    :param limit: максимальное кол-во одновременно выполняемых сценариев.
+    :type limit: :obj:`int`, опционально
+    """
+    __slots__ = ("flows", "limit")
+
+    def __init__(self, flows: list[Generator], limit: int = 4):
+        self.flows: list[Generator] = flows
+        self.limit: int = max(1, limit)
 
 
 class Account:
@@ -44,19 +98,54 @@ class Account:
 
     :param locale: текущий язык аккаунта, опционально.
     :type locale: :obj:`Literal["ru", "en", "uk"]` or :obj:`None`
+
+    :param pool_size: максимальное кол-во одновременно открытых соединений с FunPay в пуле сессии.
+    :type pool_size: :obj:`int`, опционально
+
+    :param keep_alive: переиспользовать ли соединения между запросами (keep-alive)?
+    :type keep_alive: :obj:`bool`, опционально
+
+    :param rate_limiter: ограничитель частоты запросов. Можно передать один экземпляр нескольким аккаунтам.
+        Если не передан, создается ограничитель с лимитами по умолчанию.
+    :type rate_limiter: :class:`FunPayAPI.common.rate_limiter.RateLimiter` or :obj:`None`, опционально
+
+    :param max_429_retries: сколько раз повторять запрос после ответа 429 (Too Many Requests).
+    :type max_429_retries: :obj:`int`, опционально
+
+    :param chats_cache_size: максимальное кол-во сохраненных чатов и ID собеседников (дольше всех не изменявшиеся
+        вытесняются).
+    :type chats_cache_size: :obj:`int`, опционально
+
+    :param base_url: адрес FunPay, на который отправляются запросы (например, адрес локальной замены FunPay
+        с записанными ответами).
+    :type base_url: :obj:`str`, опционально
     """
 
     def __init__(self, golden_key: str, user_agent: str | None = None,
                  requests_timeout: int | float = 10, proxy: Optional[dict] = None,
-                 locale: Literal["ru", "en", "uk"] | None = None):
+                 locale: Literal["ru", "en", "uk"] | None = None, pool_size: int = 10, keep_alive: bool = True,
+                 rate_limiter: RateLimiter | None = None, max_429_retries: int = 3, chats_cache_size: int = 5000,
+                 base_url: str = FUNPAY_URL):
         self.golden_key: str = golden_key
         """Токен (golden_key) аккаунта."""
+        self.base_url: str = base_url.rstrip("/")
+        """Адрес FunPay, на который отправляются запросы."""
         self.user_agent: str | None = user_agent
         """User-agent браузера, с которого был произведен вход в аккаунт."""
         self.requests_timeout: int | float = requests_timeout
         """Тайм-аут ожидания ответа на запросы."""
         self.proxy = proxy
         """Прокси"""
+        self.keep_alive: bool = keep_alive
+        """Переиспользовать ли соединения между запросами."""
+        self.session: requests.Session = self.__create_session(pool_size)
+        """HTTP-сессия с пулом соединений, через которую выполняются все запросы к FunPay."""
+        self.rate_limiter: RateLimiter = rate_limiter or RateLimiter()
+        """Ограничитель частоты запросов."""
+        self.max_429_retries: int = max_429_retries
+        """Сколько раз повторять запрос после ответа 429."""
+        self.max_429_backoff: float = 60
+        """Максимальная пауза (в секундах) перед повтором запроса после ответа 429."""
         self.html: str | None = None
         """HTML основной страницы FunPay."""
         self.app_data: dict | None = None
@@ -104,12 +193,15 @@ class Account:
         self.last_update: int | None = None
         """Последнее время обновления аккаунта."""
 
-        self.interlocutor_ids: dict[int, int] = {}
+        self.interlocutor_ids: utils.LRUDict[int, int] = utils.LRUDict(chats_cache_size)
         """{id чата: id собеседника}"""
 
+        self.offer_subcategories: dict[int, int] = {}
+        """{ID лота: ID подкатегории (SubCategoryTypes.COMMON)} - заполняется при получении лотов аккаунта."""
+
         self.__initiated: bool = False
 
-        self.__saved_chats: dict[int, types.ChatShortcut] = {}
+        self.__saved_chats: utils.LRUDict[int, types.ChatShortcut] = utils.LRUDict(chats_cache_size)
         self.runner: Runner | None = None
         """Объект Runner'а."""
         self._logout_link: str | None = None
@@ -156,30 +248,67 @@ class Account:
         :rtype: :class:`requests.Response`
         """
 
+        link, headers = self._prepare_request(request_method, api_method, headers, exclude_phpsessid, locale)
+        bucket = self.get_rate_limit_bucket(request_method, link, payload)
+        # потоковую нагрузку (MultipartEncoder) нельзя отправить повторно
+        retries = self.max_429_retries if isinstance(payload, (dict, str, bytes)) else 0
+        for attempt in range(retries + 1):
+            self.rate_limiter.acquire(bucket)
+            url = link
+            for i in range(10):
+                response = self.session.request(request_method, url, headers=headers, data=payload,
+                                                timeout=self.requests_timeout,
+                                                proxies=self.proxy or {}, allow_redirects=False)
+                if not (300 <= response.status_code < 400) or 'Location' not in response.headers:
+                    break
+                url = response.headers['Location']
+                self._update_locale(url)
+            else:
+                response = self.session.request(request_method, url, headers=headers, data=payload,
+                                                timeout=self.requests_timeout,
+                                                proxies=self.proxy or {})
+            if response.status_code != 429:
+                break
+            self.last_429_err_time = time.time()
+            delay = self.get_429_delay(response, attempt)
+            self.rate_limiter.penalize(bucket, delay)
+            if attempt < retries:
+                logger.warning(f"FunPay вернул 429 на запрос к {link}. Повтор через {delay:.1f} сек.")
+
+        self._check_response(response, raise_not_200)
+        return response
+
+    def _prepare_request(self, request_method: Literal["post", "get"], api_method: str, headers: dict,
+                         exclude_phpsessid: bool = False,
+                         locale: Literal["ru", "en", "uk"] | None = None) -> tuple[str, dict]:
+        """
+        Формирует полную ссылку запроса и добавляет в заголовки user_agent и куки.
+        Используется как синхронным, так и асинхронным клиентом.
+
+        :return: (ссылка, заголовки)
+        :rtype: :obj:`tuple` (:obj:`str`, :obj:`dict`)
+        """
+
         def normalize_url(api_method: str, locale: Literal["ru", "en", "uk"] | None = None) -> str:
-            api_method = "https://funpay.com/" if api_method == "https://funpay.com" else api_method
-            url = api_method if api_method.startswith("https://funpay.com/") else "https://funpay.com/" + api_method
+            base = self.base_url + "/"
+            if api_method.startswith(FUNPAY_URL):
+                api_method = api_method[len(FUNPAY_URL):].lstrip("/")
+            url = api_method if api_method.startswith(base) else base + api_method.lstrip("/")
             locales = ("en", "uk")
             for loc in locales:
-                url = url.replace(f"https://funpay.com/{loc}/", "https://funpay.com/", 1)
+                url = url.replace(f"{base}{loc}/", base, 1)
             if not locale:
                 locale = self.locale
             if locale in locales:
-                return url.replace(f"https://funpay.com/", f"https://funpay.com/{locale}/", 1)
+                return url.replace(base, f"{base}{locale}/", 1)
             return url
 
-        def update_locale(redirect_url: str):
-            for locale in ("en", "uk"):
-                if redirect_url.startswith(f"https://funpay.com/{locale}/"):
-                    self.__locale = locale
-                    return
-            if redirect_url.startswith(f"https://funpay.com"):
-                self.__locale = "ru"
-
         headers["cookie"] = f"golden_key={self.golden_key}; cookie_prefs=1"
         headers["cookie"] += f"; PHPSESSID={self.phpsessid}" if self.phpsessid and not exclude_phpsessid else ""
         if self.user_agent:
             headers["user-agent"] = self.user_agent
+        if not self.keep_alive:
+            headers["connection"] = "close"
         if request_method == "post" and locale:
             link = normalize_url(api_method, locale)
         else:
@@ -187,26 +316,166 @@ class Account:
         locale = locale or self.__set_locale
         if request_method == "get" and locale and locale != self.locale:
             link += f'{"&" if "?" in link else "?"}setlocale={locale}'
-        for i in range(10):
-            response = getattr(requests, request_method)(link, headers=headers, data=payload,
-                                                         timeout=self.requests_timeout,
-                                                         proxies=self.proxy or {}, allow_redirects=False)
-            if not (300 <= response.status_code < 400) or 'Location' not in response.headers:
-                break
-            link = response.headers['Location']
-            update_locale(link)
-        else:
-            response = getattr(requests, request_method)(link, headers=headers, data=payload,
-                                                         timeout=self.requests_timeout,
-                                                         proxies=self.proxy or {})
-        if response.status_code == 429:
-            self.last_429_err_time = time.time()
+        return link, headers
 
+    def _update_locale(self, redirect_url: str):
+        """
+        Обновляет текущий язык аккаунта по ссылке, на которую FunPay перенаправил запрос.
+
+        :param redirect_url: ссылка перенаправления.
+        :type redirect_url: :obj:`str`
+        """
+        for locale in ("en", "uk"):
+            if redirect_url.startswith(f"{self.base_url}/{locale}/"):
+                self.__locale = locale
+                return
+        if redirect_url.startswith(self.base_url):
+            self.__locale = "ru"
+
+    @staticmethod
+    def _check_response(response: requests.Response, raise_not_200: bool = False):
+        """
+        Возбуждает исключение, если статус код ответа говорит об ошибке.
+
+        :param response: объект ответа.
+
+        :param raise_not_200: возбуждать ли исключение, если статус код ответа != 200?
+        :type raise_not_200: :obj:`bool`
+        """
         if response.status_code == 403:
             raise exceptions.UnauthorizedError(response)
         elif response.status_code != 200 and raise_not_200:
             raise exceptions.RequestFailedError(response)
-        return response
+
+    def run_flow(self, flow: Generator[Request | float, Any, T]) -> T:
+        """
+        Синхронно выполняет сценарий запросов.
+
+        Сценарий - генератор, который отдает :class:`FunPayAPI.account.Request` (запрос, который нужно выполнить
+        через :meth:`FunPayAPI.account.Account.method`; результат отправляется обратно в генератор, а исключение -
+        возбуждается в нем), :class:`FunPayAPI.account.Parallel` (вложенные сценарии, которые выполняются
+        одновременно в пуле потоков) или число (пауза в секундах). Значение, возвращенное генератором, - результат сценария.
+        Благодаря этому парсинг ответов FunPay общий для :class:`FunPayAPI.account.Account` и
+        :class:`FunPayAPI.async_account.AsyncAccount`.
+
+        :param flow: сценарий запросов.
+        :type flow: :obj:`Generator`
+
+        :return: результат сценария.
+        """
+        to_send, to_throw = None, None
+        while True:
+            try:
+                step = flow.throw(to_throw) if to_throw is not None else flow.send(to_send)
+            except StopIteration as e:
+                return e.value
+            to_send, to_throw = None, None
+            if isinstance(step, Request):
+                try:
+                    to_send = self.method(*step.args, **step.kwargs)
+                except Exception as e:
+                    to_throw = e
+            elif isinstance(step, Parallel):
+                try:
+                    to_send = self.__run_parallel(step)
+                except Exception as e:
+                    to_throw = e
+            else:
+                time.sleep(step)
+
+    def __run_parallel(self, step: Parallel) -> list:
+        """Выполняет вложенные сценарии :class:`FunPayAPI.account.Parallel` в пуле потоков."""
+        if len(step.flows) <= 1 or step.limit == 1:
+            return [self.run_flow(flow) for flow in step.flows]
+        with ThreadPoolExecutor(max_workers=min(step.limit, len(step.flows))) as executor:
+            return list(executor.map(self.run_flow, step.flows))
+
+    @staticmethod
+    def get_rate_limit_bucket(request_method: Literal["post", "get"], url: str, payload: Any) -> str:
+        """
+        Определяет, к какому ведру ограничителя частоты запросов относится запрос.
+
+        :param request_method: метод запроса ("get" / "post").
+        :type request_method: :obj:`str` `post` or `get`
+
+        :param url: полная ссылка запроса.
+        :type url: :obj:`str`
+
+        :param payload: полезная нагрузка.
+
+        :return: название ведра (`runner`, `chat_message`, `offer_save`, `page` или `default`).
+        :rtype: :obj:`str`
+        """
+        path = urlparse(url).path
+        for loc in ("/en/", "/uk/"):
+            if path.startswith(loc):
+                path = path[len(loc) - 1:]
+                break
+        if path.startswith("/runner/"):
+            # сообщения отправляются через runner/ с action "chat_message" в поле request
+            if isinstance(payload, dict) and payload.get("request") and "chat_message" in str(payload["request"]):
+                return "chat_message"
+            return "runner"
+        elif path.startswith("/chat/message"):
+            return "chat_message"
+        elif path.startswith(("/lots/offerSave", "/chips/saveOffers")):
+            return "offer_save"
+        elif request_method == "get":
+            return "page"
+        return "default"
+
+    def get_429_delay(self, response: requests.Response, attempt: int) -> float:
+        """
+        Вычисляет паузу перед повтором запроса после ответа 429: значение заголовка Retry-After, если он есть,
+        иначе экспоненциальная задержка (1, 2, 4, ... сек.) со случайным разбросом.
+
+        :param response: ответ 429.
+        :type response: :class:`requests.Response`
+
+        :param attempt: номер попытки (начиная с 0).
+        :type attempt: :obj:`int`
+
+        :return: пауза (в секундах).
+        :rtype: :obj:`float`
+        """
+        retry_after = response.headers.get("Retry-After")
+        delay = None
+        if retry_after:
+            if retry_after.strip().isdigit():
+                delay = float(retry_after)
+            else:
+                try:
+                    delay = email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = None
+        if delay is None:
+            delay = 2 ** attempt + random.uniform(0, 1)
+        return min(max(delay, 0), self.max_429_backoff)
+
+    @staticmethod
+    def __create_session(pool_size: int) -> requests.Session:
+        """
+        Создает HTTP-сессию с пулом соединений.
+        Куки сессии не используются: golden_key и PHPSESSID передаются в заголовках в :meth:`FunPayAPI.account.Account.method`.
+
+        :param pool_size: максимальное кол-во соединений в пуле.
+        :type pool_size: :obj:`int`
+
+        :return: HTTP-сессия.
+        :rtype: :class:`requests.Session`
+        """
+        session = requests.Session()
+        session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self) -> None:
+        """
+        Закрывает HTTP-сессию и все открытые соединения пула.
+        """
+        self.session.close()
 
     def get(self, update_phpsessid: bool = True) -> Account:
         """
@@ -219,18 +488,22 @@ class Account:
         :return: объект аккаунта с обновленными данными.
         :rtype: :class:`FunPayAPI.account.Account`
         """
+        return self.run_flow(self._get_flow(update_phpsessid))
+
+    def _get_flow(self, update_phpsessid: bool = True) -> Generator[Request | float, Any, Account]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.get`."""
         if not self.is_initiated:
             self.locale = self.__subcategories_parse_locale
-        response = self.method("get", "https://funpay.com/", {}, {}, update_phpsessid, raise_not_200=True)
+        response = yield Request("get", "https://funpay.com/", {}, {}, update_phpsessid, raise_not_200=True)
         if not self.is_initiated:
             self.locale = self.__default_locale
         html_response = response.content.decode()
-        parser = BeautifulSoup(html_response, "lxml")
+        parser = BeautifulSoup(html_response, "lxml", parse_only=MAIN_PAGE_STRAINER)
         username = parser.find("div", {"class": "user-link-name"})
         if not username:
             raise exceptions.UnauthorizedError(response)
         self.username = username.text
-        self.app_data = json.loads(parser.find("body").get("data-app-data"))
+        self.app_data = utils.parse_app_data(html_response)
         self.__locale = self.app_data.get("locale")
         self.id = self.app_data["userId"]
         self.csrf_token = self.app_data["csrf-token"]
@@ -272,13 +545,18 @@ class Account:
         :return: список всех опубликованных лотов переданной подкатегории.
         :rtype: :obj:`list` of :class:`FunPayAPI.types.LotShortcut`
         """
+        return self.run_flow(self._get_subcategory_public_lots_flow(subcategory_type, subcategory_id, locale))
+
+    def _get_subcategory_public_lots_flow(self, subcategory_type: enums.SubCategoryTypes, subcategory_id: int,
+                                          locale: Literal["ru", "en", "uk"] | None = None) -> Generator[Request | float, Any, list[types.LotShortcut]]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.get_subcategory_public_lots`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
 
         meth = f"lots/{subcategory_id}/" if subcategory_type is enums.SubCategoryTypes.COMMON else f"chips/{subcategory_id}/"
         if not locale:
             locale = self.__lots_parse_locale
-        response = self.method("get", meth, {"accept": "*/*"}, {}, raise_not_200=True, locale=locale)
+        response = yield Request("get", meth, {"accept": "*/*"}, {}, raise_not_200=True, locale=locale)
         if locale:
             self.locale = self.__default_locale
         html_response = response.content.decode()
@@ -288,7 +566,7 @@ class Account:
         if not username:
             raise exceptions.UnauthorizedError(response)
 
-        self.__update_csrf_token(parser)
+        self.__update_csrf_token(html_response)
         offers = parser.find_all("a", {"class": "tc-item"})
         if not offers:
             return []
@@ -358,12 +636,17 @@ class Account:
         :return: список лотов переданной подкатегории на аккаунте.
         :rtype: :obj:`list` of :class:`FunPayAPI.types.MyLotShortcut`
         """
+        return self.run_flow(self._get_my_subcategory_lots_flow(subcategory_id, locale))
+
+    def _get_my_subcategory_lots_flow(self, subcategory_id: int,
+                                      locale: Literal["ru", "en", "uk"] | None = None) -> Generator[Request | float, Any, list[types.MyLotShortcut]]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.get_my_subcategory_lots`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
         meth = f"lots/{subcategory_id}/trade"
         if not locale:
             locale = self.__lots_parse_locale
-        response = self.method("get", meth, {"accept": "*/*"}, {}, raise_not_200=True, locale=locale)
+        response = yield Request("get", meth, {"accept": "*/*"}, {}, raise_not_200=True, locale=locale)
         if locale:
             self.locale = self.__default_locale
         html_response = response.content.decode()
@@ -373,7 +656,7 @@ class Account:
         if not username:
             raise exceptions.UnauthorizedError(response)
 
-        self.__update_csrf_token(parser)
+        self.__update_csrf_token(html_response)
         offers = parser.find_all("a", class_="tc-item")
         if not offers:
             return []
@@ -400,6 +683,8 @@ class Account:
             active = "warning" not in offer.get("class", [])
             lot_obj = types.MyLotShortcut(offer_id, server, description, amount, price, currency, subcategory_obj,
                                           auto, active, str(offer))
+            if isinstance(lot_obj.id, int):
+                self.offer_subcategories[lot_obj.id] = subcategory_id
             result.append(lot_obj)
         return result
 
@@ -413,12 +698,16 @@ class Account:
         :return: объект страницы лота или :obj:`None`, если лот не найден.
         :rtype: :class:`FunPayAPI.types.lotPage` or :obj:`None`
         """
+        return self.run_flow(self._get_lot_page_flow(lot_id, locale))
+
+    def _get_lot_page_flow(self, lot_id: int, locale: Literal["ru", "en", "uk"] | None = None) -> Generator[Request | float, Any, types.LotPage]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.get_lot_page`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
         headers = {
             "accept": "*/*"
         }
-        response = self.method("get", f"lots/offer?id={lot_id}", headers, {}, raise_not_200=True, locale=locale)
+        response = yield Request("get", f"lots/offer?id={lot_id}", headers, {}, raise_not_200=True, locale=locale)
         if locale:
             self.locale = self.__default_locale
         html_response = response.content.decode()
@@ -427,7 +716,7 @@ class Account:
         if not username:
             raise exceptions.UnauthorizedError(response)
 
-        self.__update_csrf_token(parser)
+        self.__update_csrf_token(html_response)
 
         if (page_header := parser.find("h1", class_="page-header")) \
                 and page_header.text in ("Предложение не найдено", "Пропозицію не знайдено", "Offer not found"):
@@ -470,9 +759,13 @@ class Account:
         :return: информацию о балансе пользователя.
         :rtype: :class:`FunPayAPI.types.Balance`
         """
+        return self.run_flow(self._get_balance_flow(lot_id))
+
+    def _get_balance_flow(self, lot_id: int) -> Generator[Request | float, Any, types.Balance]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.get_balance`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
-        response = self.method("get", f"lots/offer?id={lot_id}", {"accept": "*/*"}, {}, raise_not_200=True)
+        response = yield Request("get", f"lots/offer?id={lot_id}", {"accept": "*/*"}, {}, raise_not_200=True)
         html_response = response.content.decode()
         parser = BeautifulSoup(html_response, "lxml")
 
@@ -480,7 +773,7 @@ class Account:
         if not username:
             raise exceptions.UnauthorizedError(response)
 
-        self.__update_csrf_token(parser)
+        self.__update_csrf_token(html_response)
 
         balances = parser.find("select", {"name": "method"})
         balance = types.Balance(float(balances["data-balance-total-rub"]), float(balances["data-balance-rub"]),
@@ -509,6 +802,11 @@ class Account:
         :return: история указанного чата.
         :rtype: :obj:`list` of :class:`FunPayAPI.types.Message`
         """
+        return self.run_flow(self._get_chat_history_flow(chat_id, last_message_id, interlocutor_username, from_id))
+
+    def _get_chat_history_flow(self, chat_id: int | str, last_message_id: int = 99999999999999999999999,
+                               interlocutor_username: Optional[str] = None, from_id: int = 0) -> Generator[Request | float, Any, list[types.Message]]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.get_chat_history`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
 
@@ -520,8 +818,8 @@ class Account:
             "node": chat_id,
             "last_message": last_message_id
         }
-        response = self.method("get", f"chat/history?node={chat_id}&last_message={last_message_id}",
-                               headers, payload, raise_not_200=True)
+        response = yield Request("get", f"chat/history?node={chat_id}&last_message={last_message_id}",
+                                 headers, payload, raise_not_200=True)
 
         json_response = response.json()
         if not json_response.get("chat") or not json_response["chat"].get("messages"):
@@ -550,6 +848,27 @@ class Account:
         :return: словарь с историями чатов в формате {ID чата: [список сообщений]}
         :rtype: :obj:`dict` {:obj:`int`: :obj:`list` of :class:`FunPayAPI.types.Message`}
         """
+        return self.run_flow(self._get_chats_histories_flow(chats_data, interlocutor_ids))
+
+    def _get_chats_histories_flow(self, chats_data: dict[int | str, str | None],
+                                  interlocutor_ids: list[int] | None = None) -> Generator[Request | float, Any, dict[int, list[types.Message]]]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.get_chats_histories`."""
+        result, buyers_viewing = yield from self._get_chats_histories_and_viewing_flow(chats_data, interlocutor_ids)
+        for bv in buyers_viewing:
+            self.runner.buyers_viewing[bv.buyer_id] = bv
+        return result
+
+    def _get_chats_histories_and_viewing_flow(self, chats_data: dict[int | str, str | None],
+                                              interlocutor_ids: list[int] | None = None) \
+            -> Generator[Request | float, Any, tuple[dict[int, list[types.Message]], list[types.BuyerViewing]]]:
+        """
+        Сценарий запросов: получает истории чатов и информацию о том, какие лоты смотрят собеседники.
+        Не изменяет состояние аккаунта и Runner'а (только читает csrf_token), поэтому несколько таких сценариев
+        можно выполнять одновременно (:class:`FunPayAPI.account.Parallel`).
+
+        :return: истории чатов ({ID чата: [сообщения]}) и список :class:`FunPayAPI.types.BuyerViewing`
+            в порядке ответа FunPay.
+        """
         headers = {
             "accept": "*/*",
             "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
@@ -566,14 +885,13 @@ class Account:
             "request": False,
             "csrf_token": self.csrf_token
         }
-        response = self.method("post", "runner/", headers, payload, raise_not_200=True)
+        response = yield Request("post", "runner/", headers, payload, raise_not_200=True)
         json_response = response.json()
 
-        result = {}
+        result, buyers_viewing = {}, []
         for i in json_response["objects"]:
             if i.get("type") == "c-p-u":
-                bv = self.parse_buyer_viewing(i)
-                self.runner.buyers_viewing[bv.buyer_id] = bv
+                buyers_viewing.append(self.parse_buyer_viewing(i))
             elif i.get("type") == "chat_node":
                 if not i.get("data"):
                     result[i.get("id")] = []
@@ -588,7 +906,7 @@ class Account:
                     interlocutor_name = chats_data[i.get("id")]
                 messages = self.__parse_messages(i["data"]["messages"], i.get("id"), interlocutor_id, interlocutor_name)
                 result[i.get("id")] = messages
-        return result
+        return result, buyers_viewing
 
     def upload_image(self, image: str | IO[bytes], type_: Literal["chat", "offer"] = "chat") -> int:
         """
@@ -604,6 +922,10 @@ class Account:
         :return: ID изображения на серверах FunPay.
         :rtype: :obj:`int`
         """
+        return self.run_flow(self._upload_image_flow(image, type_))
+
+    def _upload_image_flow(self, image: str | IO[bytes], type_: Literal["chat", "offer"] = "chat") -> Generator[Request | float, Any, int]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.upload_image`."""
 
         assert type_ in ("chat", "offer")
 
@@ -629,7 +951,7 @@ class Account:
             "content-type": m.content_type,
         }
         # file/addChatImage, file/addOfferImage
-        response = self.method("post", f"file/add{type_.title()}Image", headers, m)
+        response = yield Request("post", f"file/add{type_.title()}Image", headers, m)
 
         if response.status_code == 400:
             try:
@@ -679,6 +1001,14 @@ class Account:
         :return: экземпляр отправленного сообщения.
         :rtype: :class:`FunPayAPI.types.Message`
         """
+        return self.run_flow(self._send_message_flow(chat_id, text, chat_name, interlocutor_id, image_id,
+                                                     add_to_ignore_list, update_last_saved_message, leave_as_unread))
+
+    def _send_message_flow(self, chat_id: int | str, text: Optional[str] = None, chat_name: Optional[str] = None,
+                           interlocutor_id: Optional[int] = None,
+                           image_id: Optional[int] = None, add_to_ignore_list: bool = True,
+                           update_last_saved_message: bool = False, leave_as_unread: bool = False) -> Generator[Request | float, Any, types.Message]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.send_message`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
 
@@ -712,7 +1042,7 @@ class Account:
             "csrf_token": self.csrf_token
         }
 
-        response = self.method("post", "runner/", headers, payload, raise_not_200=True)
+        response = yield Request("post", "runner/", headers, payload, raise_not_200=True)
         json_response = response.json()
         if not (resp := json_response.get("response")):
             raise exceptions.MessageNotDeliveredError(response, None, chat_id)
@@ -828,6 +1158,10 @@ class Account:
         :return: ответ FunPay (HTML-код блока отзыва).
         :rtype: :obj:`str`
         """
+        return self.run_flow(self._send_review_flow(order_id, text, rating))
+
+    def _send_review_flow(self, order_id: str, text: str, rating: Literal[1, 2, 3, 4, 5] = 5) -> Generator[Request | float, Any, str]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.send_review`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
 
@@ -844,7 +1178,7 @@ class Account:
             "orderId": order_id
         }
 
-        response = self.method("post", "orders/review", headers, payload)
+        response = yield Request("post", "orders/review", headers, payload)
         if response.status_code == 400:
             json_response = response.json()
             msg = json_response.get("msg")
@@ -864,6 +1198,10 @@ class Account:
         :return: ответ FunPay (HTML-код блока отзыва).
         :rtype: :obj:`str`
         """
+        return self.run_flow(self._delete_review_flow(order_id))
+
+    def _delete_review_flow(self, order_id: str) -> Generator[Request | float, Any, str]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.delete_review`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
 
@@ -877,7 +1215,7 @@ class Account:
             "orderId": order_id
         }
 
-        response = self.method("post", "orders/reviewDelete", headers, payload)
+        response = yield Request("post", "orders/reviewDelete", headers, payload)
 
         if response.status_code == 400:
             json_response = response.json()
@@ -895,6 +1233,10 @@ class Account:
         :param order_id: ID заказа.
         :type order_id: :obj:`str`
         """
+        self.run_flow(self._refund_flow(order_id))
+
+    def _refund_flow(self, order_id) -> Generator[Request | float, Any, None]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.refund`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
 
@@ -909,7 +1251,7 @@ class Account:
             "csrf_token": self.csrf_token
         }
 
-        response = self.method("post", "orders/refund", headers, payload, raise_not_200=True)
+        response = yield Request("post", "orders/refund", headers, payload, raise_not_200=True)
 
         if response.json().get("error"):
             raise exceptions.RefundError(response, response.json().get("msg"), order_id)
@@ -933,6 +1275,10 @@ class Account:
         :return: кол-во выведенных средств с учетом комиссии FunPay.
         :rtype: :obj:`float`
         """
+        return self.run_flow(self._withdraw_flow(currency, wallet, amount, address))
+
+    def _withdraw_flow(self, currency: enums.Currency, wallet: enums.Wallet, amount: int | float, address: str) -> Generator[Request | float, Any, float]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.withdraw`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
 
@@ -957,7 +1303,7 @@ class Account:
             "wallet": address,
             "amount_int": str(amount)
         }
-        response = self.method("post", "withdraw/withdraw", headers, payload, raise_not_200=True)
+        response = yield Request("post", "withdraw/withdraw", headers, payload, raise_not_200=True)
         json_response = response.json()
         if json_response.get("error"):
             error_message = json_response.get("msg")
@@ -976,6 +1322,10 @@ class Account:
         :return: ответ FunPay.
         :rtype: :obj:`dict`
         """
+        return self.run_flow(self._get_raise_modal_flow(category_id))
+
+    def _get_raise_modal_flow(self, category_id: int) -> Generator[Request | float, Any, dict]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.get_raise_modal`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
         category = self.get_category(category_id)
@@ -989,7 +1339,7 @@ class Account:
             "game_id": category_id,
             "node_id": subcategory.id
         }
-        response = self.method("post", "https://funpay.com/lots/raise", headers, payload, raise_not_200=True)
+        response = yield Request("post", "https://funpay.com/lots/raise", headers, payload, raise_not_200=True)
         json_response = response.json()
         return json_response
 
@@ -1011,6 +1361,11 @@ class Account:
         :return: `True`
         :rtype: :obj:`bool`
         """
+        return self.run_flow(self._raise_lots_flow(category_id, subcategories, exclude))
+
+    def _raise_lots_flow(self, category_id: int, subcategories: Optional[list[int | types.SubCategory]] = None,
+                         exclude: list[int] | None = None) -> Generator[Request | float, Any, bool]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.raise_lots`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
         if not (category := self.get_category(category_id)):
@@ -1042,7 +1397,7 @@ class Account:
             "node_ids[]": [i.id for i in subcats]
         }
 
-        response = self.method("post", "lots/raise", headers, payload, raise_not_200=True)
+        response = yield Request("post", "lots/raise", headers, payload, raise_not_200=True)
         json_response = response.json()
         logger.debug(f"Ответ FunPay (поднятие категорий): {json_response}.")  # locale
         if not json_response.get("error") and not json_response.get("url"):
@@ -1066,21 +1421,25 @@ class Account:
         :return: объект профиля пользователя.
         :rtype: :class:`FunPayAPI.types.UserProfile`
         """
+        return self.run_flow(self._get_user_flow(user_id, locale))
+
+    def _get_user_flow(self, user_id: int, locale: Literal["ru", "en", "uk"] | None = None) -> Generator[Request | float, Any, types.UserProfile]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.get_user`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
         if not locale:
             locale = self.__profile_parse_locale
-        response = self.method("get", f"users/{user_id}/", {"accept": "*/*"}, {}, raise_not_200=True, locale=locale)
+        response = yield Request("get", f"users/{user_id}/", {"accept": "*/*"}, {}, raise_not_200=True, locale=locale)
         if locale:
             self.locale = self.__default_locale
         html_response = response.content.decode()
-        parser = BeautifulSoup(html_response, "lxml")
+        parser = BeautifulSoup(html_response, "lxml", parse_only=PROFILE_STRAINER)
 
         username = parser.find("div", {"class": "user-link-name"})
         if not username:
             raise exceptions.UnauthorizedError(response)
 
-        self.__update_csrf_token(parser)
+        self.__update_csrf_token(html_response)
 
         username = parser.find("span", {"class": "mr4"}).text
         user_status = parser.find("span", {"class": "media-user-status"})
@@ -1146,12 +1505,17 @@ class Account:
         :return: объект чата.
         :rtype: :class:`FunPayAPI.types.Chat`
         """
+        return self.run_flow(self._get_chat_flow(chat_id, with_history, locale))
+
+    def _get_chat_flow(self, chat_id: int, with_history: bool = True,
+                       locale: Literal["ru", "en", "uk"] | None = None) -> Generator[Request | float, Any, types.Chat]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.get_chat`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
 
         if not locale:
             locale = self.__chat_parse_locale
-        response = self.method("get", f"chat/?node={chat_id}", {"accept": "*/*"}, {}, raise_not_200=True, locale=locale)
+        response = yield Request("get", f"chat/?node={chat_id}", {"accept": "*/*"}, {}, raise_not_200=True, locale=locale)
         if locale:
             self.locale = self.__default_locale
         html_response = response.content.decode()
@@ -1160,7 +1524,7 @@ class Account:
                 "a").text) in ("Чат", "Chat"):
             raise Exception("chat not found")  # todo
 
-        self.__update_csrf_token(parser)
+        self.__update_csrf_token(html_response)
 
         if not (chat_panel := parser.find("div", {"class": "param-item chat-panel"})):
             text, link = None, None
@@ -1168,7 +1532,7 @@ class Account:
             a = chat_panel.find("a")
             text, link = a.text, a["href"]
         if with_history:
-            history = self.get_chat_history(chat_id, interlocutor_username=name)
+            history = yield from self._get_chat_history_flow(chat_id, interlocutor_username=name)
         else:
             history = []
         return types.Chat(chat_id, name, link, text, html_response, history)
@@ -1196,6 +1560,10 @@ class Account:
         :return: объекст заказа.
         :rtype: :class:`FunPayAPI.types.Order`
         """
+        return self.run_flow(self._get_order_flow(order_id, locale))
+
+    def _get_order_flow(self, order_id: str, locale: Literal["ru", "en", "uk"] | None = None) -> Generator[Request | float, Any, types.Order]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.get_order`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
         headers = {
@@ -1203,7 +1571,7 @@ class Account:
         }
         if not locale:
             locale = self.__order_parse_locale
-        response = self.method("get", f"orders/{order_id}/", headers, {}, raise_not_200=True, locale=locale)
+        response = yield Request("get", f"orders/{order_id}/", headers, {}, raise_not_200=True, locale=locale)
         if locale:
             self.locale = self.__default_locale
         html_response = response.content.decode()
@@ -1212,7 +1580,7 @@ class Account:
         if not username:
             raise exceptions.UnauthorizedError(response)
 
-        self.__update_csrf_token(parser)
+        self.__update_csrf_token(html_response)
 
         if (span := parser.find("span", {"class": "text-warning"})) and span.text in (
                 "Возврат", "Повернення", "Refund"):
@@ -1327,7 +1695,8 @@ class Account:
                   state: Optional[Literal["closed", "paid", "refunded"]] = None, game: Optional[int] = None,
                   section: Optional[str] = None, server: Optional[int] = None,
                   side: Optional[int] = None, locale: Literal["ru", "en", "uk"] | None = None,
-                  subcategories: dict[str, tuple[types.SubCategoryTypes, int]] | None = None, **more_filters) -> \
+                  subcategories: dict[str, tuple[types.SubCategoryTypes, int]] | None = None,
+                  stop_at: dict[str, types.OrderStatuses] | None = None, **more_filters) -> \
             tuple[str | None, list[types.OrderShortcut], Literal["ru", "en", "uk"],
             dict[str, types.SubCategory]]:
         """
@@ -1372,11 +1741,31 @@ class Account:
         :param side: ID стороны (платформы).
         :type side: :obj:`int`, опционально.
 
+        :param stop_at: известные статусы заказов ({ID заказа: статус}). Если передано, парсинг списка прекращается
+            на первом заказе, статус которого совпадает с известным (заказы идут от новых к старым),
+            а в качестве ID след. заказа возвращается ID этого заказа.
+        :type stop_at: :obj:`dict` {:obj:`str`: :class:`FunPayAPI.common.enums.OrderStatuses`}, опционально
+
         :param more_filters: доп. фильтры.
 
         :return: (ID след. заказа (для start_from), список заказов)
         :rtype: :obj:`tuple` (:obj:`str` or :obj:`None`, :obj:`list` of :class:`FunPayAPI.types.OrderShortcut`)
         """
+        return self.run_flow(self._get_sales_flow(start_from, include_paid, include_closed, include_refunded,
+                                                  exclude_ids, id, buyer, state, game, section, server, side, locale,
+                                                  subcategories, stop_at, **more_filters))
+
+    def _get_sales_flow(self, start_from: str | None = None, include_paid: bool = True, include_closed: bool = True,
+                        include_refunded: bool = True, exclude_ids: list[str] | None = None,
+                        id: Optional[str] = None, buyer: Optional[str] = None,
+                        state: Optional[Literal["closed", "paid", "refunded"]] = None, game: Optional[int] = None,
+                        section: Optional[str] = None, server: Optional[int] = None,
+                        side: Optional[int] = None, locale: Literal["ru", "en", "uk"] | None = None,
+                        subcategories: dict[str, tuple[types.SubCategoryTypes, int]] | None = None,
+                        stop_at: dict[str, types.OrderStatuses] | None = None, **more_filters) \
+            -> Generator[Request | float, Any, tuple[str | None, list[types.OrderShortcut], Literal["ru", "en", "uk"],
+                                                     dict[str, types.SubCategory]]]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.get_sales`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
 
@@ -1397,12 +1786,12 @@ class Account:
             filters["continue"] = start_from
 
         locale = locale or self.__profile_parse_locale
-        response = self.method("post" if start_from else "get", link, {}, filters, raise_not_200=True, locale=locale)
+        response = yield Request("post" if start_from else "get", link, {}, filters, raise_not_200=True, locale=locale)
         if not start_from:
             self.locale = self.__default_locale
         html_response = response.content.decode()
 
-        parser = BeautifulSoup(html_response, "lxml")
+        parser = BeautifulSoup(html_response, "lxml", parse_only=SALES_STRAINER)
 
         if not start_from:
             username = parser.find("div", {"class": "user-link-name"})
@@ -1415,7 +1804,7 @@ class Account:
         order_divs = parser.find_all("a", {"class": "tc-item"})
         if not start_from:
             subcategories = dict()
-            app_data = json.loads(parser.find("body").get("data-app-data"))
+            app_data = utils.parse_app_data(html_response)
             locale = app_data.get("locale")
             self.csrf_token = app_data.get("csrf-token") or self.csrf_token
             games_options = parser.find("select", attrs={"name": "game"})
@@ -1451,6 +1840,9 @@ class Account:
                 order_status = types.OrderStatuses.CLOSED
 
             order_id = div.find("div", {"class": "tc-order"}).text[1:]
+            if stop_at and stop_at.get(order_id) == order_status:
+                next_order_id = order_id
+                break
             if order_id in exclude_ids:
                 continue
 
@@ -1526,6 +1918,10 @@ class Account:
         :return: объекты чатов (не больше 50).
         :rtype: :obj:`list` of :class:`FunPayAPI.types.ChatShortcut`
         """
+        return self.run_flow(self._request_chats_flow())
+
+    def _request_chats_flow(self) -> Generator[Request | float, Any, list[types.ChatShortcut]]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.request_chats`."""
         chats = {
             "type": "chat_bookmarks",
             "id": self.id,
@@ -1542,7 +1938,7 @@ class Account:
             "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
             "x-requested-with": "XMLHttpRequest"
         }
-        response = self.method("post", "https://funpay.com/runner/", headers, payload, raise_not_200=True)
+        response = yield Request("post", "https://funpay.com/runner/", headers, payload, raise_not_200=True)
         json_response = response.json()
 
         msgs = ""
@@ -1553,17 +1949,14 @@ class Account:
         if not msgs:
             return []
 
-        parser = BeautifulSoup(msgs, "lxml")
-        chats = parser.find_all("a", {"class": "contact-item"})
         chats_objs = []
 
-        for msg in chats:
-            chat_id = int(msg["data-id"])
-            last_msg_text = msg.find("div", {"class": "contact-item-message"}).text
-            unread = True if "unread" in msg.get("class") else False
-            chat_with = msg.find("div", {"class": "media-user-name"}).text
-            node_msg_id = int(msg.get('data-node-msg'))
-            user_msg_id = int(msg.get('data-user-msg'))
+        for msg in utils.parse_contact_items(msgs):
+            # Если чат удален админами - скип.
+            if (last_msg_text := msg.last_message_text) is None:
+                continue
+            chat_id, unread, chat_with = msg.id, msg.unread, msg.name
+            node_msg_id, user_msg_id = msg.node_msg_id, msg.user_msg_id
             by_bot = False
             by_vertex = False
             is_image = last_msg_text in ("Изображение", "Зображення", "Image")
@@ -1573,7 +1966,7 @@ class Account:
             elif last_msg_text.startswith(self.old_bot_character):
                 last_msg_text = last_msg_text[1:]
                 by_vertex = True
-            chat_obj = types.ChatShortcut(chat_id, chat_with, last_msg_text, node_msg_id, user_msg_id, unread, str(msg))
+            chat_obj = types.ChatShortcut(chat_id, chat_with, last_msg_text, node_msg_id, user_msg_id, unread, msg.html)
             if not is_image:
                 chat_obj.last_by_bot = by_bot
                 chat_obj.last_by_vertex = by_vertex
@@ -1648,6 +2041,11 @@ class Account:
 
     def calc(self, subcategory_type: enums.SubCategoryTypes, subcategory_id: int | None = None,
              game_id: int | None = None, price: int | float = 1000):
+        return self.run_flow(self._calc_flow(subcategory_type, subcategory_id, game_id, price))
+
+    def _calc_flow(self, subcategory_type: enums.SubCategoryTypes, subcategory_id: int | None = None,
+                   game_id: int | None = None, price: int | float = 1000) -> Generator[Request | float, Any, CalcResult]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.calc`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
 
@@ -1668,8 +2066,8 @@ class Account:
             "x-requested-with": "XMLHttpRequest"
         }
 
-        r = self.method("post", f"{type_}/calc", headers, {key: value, "price": price},
-                        raise_not_200=True)
+        r = yield Request("post", f"{type_}/calc", headers, {key: value, "price": price},
+                          raise_not_200=True)
         json_resp = r.json()
         if (error := json_resp.get("error")):
             raise Exception(f"Произошел бабах, не нашелся ответ: {error}")  # todo
@@ -1696,13 +2094,17 @@ class Account:
         :return: объект с полями лота.
         :rtype: :class:`FunPayAPI.types.LotFields`
         """
+        return self.run_flow(self._get_lot_fields_flow(lot_id))
+
+    def _get_lot_fields_flow(self, lot_id: int) -> Generator[Request | float, Any, types.LotFields]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.get_lot_fields`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
         headers = {}
-        response = self.method("get", f"lots/offerEdit?offer={lot_id}", headers, {}, raise_not_200=True)
+        response = yield Request("get", f"lots/offerEdit?offer={lot_id}", headers, {}, raise_not_200=True)
 
         html_response = response.content.decode()
-        bs = BeautifulSoup(html_response, "lxml")
+        bs = BeautifulSoup(html_response, "lxml", parse_only=LOT_FIELDS_STRAINER)
         error_message = bs.find("p", class_="lead")
         if error_message:
             raise exceptions.LotParsingError(response, error_message.text, lot_id)
@@ -1716,6 +2118,8 @@ class Account:
         })
         result.update({field["name"]: "on" for field in bs.find_all("input", {"type": "checkbox"}, checked=True)})
         subcategory = self.get_subcategory(enums.SubCategoryTypes.COMMON, int(result.get("node_id", 0)))
+        if subcategory:
+            self.offer_subcategories[lot_id] = subcategory.id
         self.csrf_token = result.get("csrf_token") or self.csrf_token
         currency = utils.parse_currency(bs.find("span", class_="form-control-feedback").text)
         if self.currency != currency:
@@ -1731,11 +2135,76 @@ class Account:
                                  float(result["price"]), None, types.Currency.UNKNOWN, currency)
         return types.LotFields(lot_id, result, subcategory, currency, calc_result)
 
+    def get_lots_activity(self, lot_ids: list[int] | set[int]) -> dict[int, bool]:
+        """
+        Получает статусы (активен / не активен) переданных лотов аккаунта.
+        Лоты группируются по подкатегориям, и для каждой подкатегории выполняется один запрос
+        (:meth:`FunPayAPI.account.Account.get_my_subcategory_lots`) вместо запроса страницы редактирования каждого лота.
+        Подкатегории неизвестных лотов определяются по профилю аккаунта, а для лотов, которых нет в
+        профиле (например, неактивных), статус получается с помощью :meth:`FunPayAPI.account.Account.get_lot_fields`.
+
+        :param lot_ids: ID лотов.
+        :type lot_ids: :obj:`list` or :obj:`set` of :obj:`int`
+
+        :return: словарь {ID лота: активен ли лот}. Лоты, статус которых получить не удалось, в словарь не попадают.
+        :rtype: :obj:`dict` {:obj:`int`: :obj:`bool`}
+        """
+        return self.run_flow(self._get_lots_activity_flow(lot_ids))
+
+    def _get_lots_activity_flow(self, lot_ids: list[int] | set[int]) -> Generator[Request | float, Any, dict[int, bool]]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.get_lots_activity`."""
+        if not self.is_initiated:
+            raise exceptions.AccountNotInitiatedError()
+        lot_ids = set(lot_ids)
+        result = {}
+        if any(i not in self.offer_subcategories for i in lot_ids):
+            profile = yield from self._get_user_flow(self.id)
+            for lot in profile.get_lots():
+                if lot.subcategory and lot.subcategory.type is enums.SubCategoryTypes.COMMON \
+                        and isinstance(lot.id, int):
+                    self.offer_subcategories[lot.id] = lot.subcategory.id
+
+        by_subcategory: dict[int, list[int]] = {}
+        unknown = []
+        for lot_id in lot_ids:
+            if lot_id in self.offer_subcategories:
+                by_subcategory.setdefault(self.offer_subcategories[lot_id], []).append(lot_id)
+            else:
+                unknown.append(lot_id)
+
+        for subcategory_id, ids in by_subcategory.items():
+            try:
+                lots = yield from self._get_my_subcategory_lots_flow(subcategory_id)
+            except Exception:
+                logger.warning(f"Не удалось получить лоты подкатегории {subcategory_id}.")
+                logger.debug("TRACEBACK", exc_info=True)
+                continue
+            activity = {lot.id: lot.active for lot in lots}
+            for lot_id in ids:
+                if lot_id in activity:
+                    result[lot_id] = activity[lot_id]
+                else:
+                    # лот перенесен в другую подкатегорию или удален
+                    self.offer_subcategories.pop(lot_id, None)
+                    unknown.append(lot_id)
+
+        for lot_id in unknown:
+            try:
+                result[lot_id] = (yield from self._get_lot_fields_flow(lot_id)).active
+            except Exception:
+                logger.warning(f"Не удалось получить статус лота {lot_id}.")
+                logger.debug("TRACEBACK", exc_info=True)
+        return result
+
     def get_chip_fields(self, subcategory_id: int) -> types.ChipFields:
+        return self.run_flow(self._get_chip_fields_flow(subcategory_id))
+
+    def _get_chip_fields_flow(self, subcategory_id: int) -> Generator[Request | float, Any, types.ChipFields]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.get_chip_fields`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
         headers = {}
-        response = self.method("get", f"chips/{subcategory_id}/trade", headers, {}, raise_not_200=True)
+        response = yield Request("get", f"chips/{subcategory_id}/trade", headers, {}, raise_not_200=True)
 
         html_response = response.content.decode()
         bs = BeautifulSoup(html_response, "lxml")
@@ -1750,6 +2219,10 @@ class Account:
         :param offer_fields: объект с полями лота.
         :type offer_fields: :class:`FunPayAPI.types.LotFields`
         """
+        self.run_flow(self._save_offer_flow(offer_fields))
+
+    def _save_offer_flow(self, offer_fields: types.LotFields | types.ChipFields) -> Generator[Request | float, Any, None]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.save_offer`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
         headers = {
@@ -1768,7 +2241,7 @@ class Account:
             id_ = offer_fields.subcategory_id
             fields = offer_fields.renew_fields().fields
             api_method = "chips/saveOffers"
-        response = self.method("post", api_method, headers, fields, raise_not_200=True)
+        response = yield Request("post", api_method, headers, fields, raise_not_200=True)
         json_response = response.json()
         errors_dict = {}
         if (errors := json_response.get("errors")) or json_response.get("error"):
@@ -1804,11 +2277,15 @@ class Account:
         :return: Кортеж, содержащий коэффициент обмена и текущую валюту аккаунта.
         :rtype: :obj:`tuple[float, types.Currency]`
         """
-        r = self.method("post", "https://funpay.com/account/switchCurrency",
-                        {"accept": "*/*", "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
-                         "x-requested-with": "XMLHttpRequest"},
-                        {"cy": currency.code, "csrf_token": self.csrf_token, "confirmed": "false"},
-                        raise_not_200=True)
+        return self.run_flow(self._get_exchange_rate_flow(currency))
+
+    def _get_exchange_rate_flow(self, currency: types.Currency) -> Generator[Request | float, Any, tuple[float, types.Currency]]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.get_exchange_rate`."""
+        r = yield Request("post", "https://funpay.com/account/switchCurrency",
+                          {"accept": "*/*", "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+                           "x-requested-with": "XMLHttpRequest"},
+                          {"cy": currency.code, "csrf_token": self.csrf_token, "confirmed": "false"},
+                          raise_not_200=True)
         b = json.loads(r.text)
         if "url" in b and not b["url"]:
             self.currency = currency
@@ -1902,9 +2379,13 @@ class Account:
         """
         Выходит с аккаунта FunPay (сбрасывает golden_key).
         """
+        self.run_flow(self._logout_flow())
+
+    def _logout_flow(self) -> Generator[Request | float, Any, None]:
+        """Сценарий запросов :meth:`FunPayAPI.account.Account.logout`."""
         if not self.is_initiated:
             raise exceptions.AccountNotInitiatedError()
-        self.method("get", self._logout_link, {"accept": "*/*"}, {}, raise_not_200=True)
+        yield Request("get", self._logout_link, {"accept": "*/*"}, {}, raise_not_200=True)
 
     @property
     def is_initiated(self) -> bool:
@@ -1922,7 +2403,7 @@ class Account:
 
         :param html: HTML страница.
         """
-        parser = BeautifulSoup(html, "lxml")
+        parser = BeautifulSoup(html, "lxml", parse_only=CATEGORIES_STRAINER)
         games_table = parser.find_all("div", {"class": "promo-game-list"})
         if not games_table:
             return
@@ -1966,6 +2447,28 @@ class Account:
                 self.__categories.append(regional_games[gid])
                 self.__sorted_categories[gid] = regional_games[gid]
 
+    @staticmethod
+    def __parse_message_fragments(fragments: list[str]) -> list[Tag | BeautifulSoup]:
+        """
+        Разбирает HTML нескольких сообщений одним проходом парсера: каждый фрагмент оборачивается в отдельный тег,
+        и для каждого сообщения возвращается его поддерево. Если фрагменты испорчены (незакрытые теги перемешали
+        обертки), каждый фрагмент разбирается отдельно.
+
+        :param fragments: HTML сообщений.
+        :type fragments: :obj:`list` of :obj:`str`
+
+        :return: поддеревья сообщений в том же порядке.
+        :rtype: :obj:`list` of :class:`bs4.element.Tag`
+        """
+        if not fragments:
+            return []
+        html = "".join(f"<fpmsg>{fragment.replace('<br>', chr(10))}</fpmsg>" for fragment in fragments)
+        body = BeautifulSoup(html, "lxml").body
+        trees = body.find_all("fpmsg", recursive=False) if body else []
+        if len(trees) == len(fragments):
+            return trees
+        return [BeautifulSoup(fragment.replace("<br>", "\n"), "lxml") for fragment in fragments]
+
     def __parse_messages(self, json_messages: dict, chat_id: int | str,
                          interlocutor_id: Optional[int] = None, interlocutor_username: Optional[str] = None,
                          from_id: int = 0) -> list[types.Message]:
@@ -1975,15 +2478,16 @@ class Account:
         if interlocutor_id is not None:
             ids[interlocutor_id] = interlocutor_username
 
-        for i in json_messages:
-            if i["id"] < from_id:
-                continue
+        json_messages = [i for i in json_messages if i["id"] >= from_id]
+        # HTML всех сообщений разбирается один раз: нужные второму циклу данные извлекаются сразу
+        trees = self.__parse_message_fragments([i["html"] for i in json_messages])
+        extracted = []  # [(текст серой метки автора, [(ник, ссылка) пользователей в системном сообщении])]
+        for i, parser in zip(json_messages, trees):
             author_id = i["author"]
-            parser = BeautifulSoup(i["html"].replace("<br>", "\n"), "lxml")
+            author_div = parser.find("div", {"class": "media-user-name"})
 
             # Если ник или бейдж написавшего неизвестен, но есть блок с данными об авторе сообщения
-            if None in [ids.get(author_id), badges.get(author_id)] and (
-                    author_div := parser.find("div", {"class": "media-user-name"})):
+            if None in [ids.get(author_id), badges.get(author_id)] and author_div:
                 if badges.get(author_id) is None:
                     badge = author_div.find("span", {"class": "chat-msg-author-label label label-success"})
                     badges[author_id] = badge.text if badge else 0
@@ -2028,13 +2532,19 @@ class Account:
             message_obj.by_vertex = by_vertex
             message_obj.type = types.MessageTypes.NON_SYSTEM if author_id != 0 else message_obj.get_message_type()
 
+            default_label = author_div.find("span", {
+                "class": "chat-msg-author-label label label-default"}) if author_div else None
+            users = []
+            if message_obj.type != types.MessageTypes.NON_SYSTEM:
+                users = [(user.text, user["href"])
+                         for user in parser.find_all('a', href=lambda href: href and '/users/' in href)]
+            extracted.append((default_label.text if default_label else None, users))
             messages.append(message_obj)
 
-        for i in messages:
+        for i, (default_label, users) in zip(messages, extracted):
             i.author = ids.get(i.author_id)
             i.chat_name = interlocutor_username
             i.badge = badges.get(i.author_id) if badges.get(i.author_id) != 0 else None
-            parser = BeautifulSoup(i.html, "lxml")
             if i.badge:
                 i.is_employee = True
                 if i.badge in ("поддержка", "підтримка", "support"):
@@ -2043,18 +2553,13 @@ class Account:
                     i.is_moderation = True
                 elif i.badge in ("арбитраж", "арбітраж", "arbitration"):
                     i.is_arbitration = True
-            default_label = parser.find("div", {"class": "media-user-name"})
-            default_label = default_label.find("span", {
-                "class": "chat-msg-author-label label label-default"}) if default_label else None
-            if default_label:
-                if default_label.text in ("автовідповідь", "автоответ", "auto-reply"):
-                    i.is_autoreply = True
-            i.badge = default_label.text if (i.badge is None and default_label is not None) else i.badge
+            if default_label in ("автовідповідь", "автоответ", "auto-reply"):
+                i.is_autoreply = True
+            i.badge = default_label if (i.badge is None and default_label is not None) else i.badge
             if i.type != types.MessageTypes.NON_SYSTEM:
-                users = parser.find_all('a', href=lambda href: href and '/users/' in href)
                 if users:
-                    i.initiator_username = users[0].text
-                    i.initiator_id = int(users[0]["href"].split("/")[-2])
+                    i.initiator_username = users[0][0]
+                    i.initiator_id = int(users[0][1].split("/")[-2])
                     if i.type in (types.MessageTypes.ORDER_PURCHASED, types.MessageTypes.ORDER_CONFIRMED,
                                   types.MessageTypes.NEW_FEEDBACK,
                                   types.MessageTypes.FEEDBACK_CHANGED,
@@ -2074,7 +2579,7 @@ class Account:
                             i.i_am_seller = False
                             i.i_am_buyer = True
                     elif len(users) > 1:
-                        last_user_id = int(users[-1]["href"].split("/")[-2])
+                        last_user_id = int(users[-1][1].split("/")[-2])
                         if i.type == types.MessageTypes.ORDER_CONFIRMED_BY_ADMIN:
                             if last_user_id == self.id:
                                 i.i_am_seller = True
@@ -2092,9 +2597,9 @@ class Account:
 
         return messages
 
-    def __update_csrf_token(self, parser: BeautifulSoup):
+    def __update_csrf_token(self, html: str):
         try:
-            app_data = json.loads(parser.find("body").get("data-app-data"))
+            app_data = utils.parse_app_data(html)
             self.csrf_token = app_data.get("csrf-token") or self.csrf_token
         except:
             logger.warning("Произошла ошибка при обновлении csrf.")
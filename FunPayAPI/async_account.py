@@ -0,0 +1,403 @@
+"""
+В данном модуле описан асинхронный клиент FunPay (:class:`FunPayAPI.async_account.AsyncAccount`).
+"""
+from __future__ import annotations
+from typing import Literal, Any, Optional, IO, Generator
+
+from requests_toolbelt import MultipartEncoder
+from urllib.parse import urlencode
+import requests
+import requests.cookies
+import requests.structures
+import asyncio
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from . import types
+from .account import Account, Request, Parallel, T, logger, FUNPAY_URL
+from .common import exceptions, enums
+from .common.rate_limiter import RateLimiter
+
+
+class AsyncAccount(Account):
+    """
+    Асинхронный клиент FunPay. Использует те же сценарии запросов (и тот же парсинг), что и
+    :class:`FunPayAPI.account.Account`, но выполняет запросы через :mod:`aiohttp`: все методы, отправляющие запросы,
+    являются корутинами. Остальные методы (:meth:`FunPayAPI.account.Account.get_category`,
+    :meth:`FunPayAPI.account.Account.add_chats` и т.д.) остаются синхронными.
+
+    Для получения событий используйте :meth:`FunPayAPI.updater.runner.Runner.listen_async`.
+
+    Параметры совпадают с параметрами :class:`FunPayAPI.account.Account`.
+    """
+
+    def __init__(self, golden_key: str, user_agent: str | None = None,
+                 requests_timeout: int | float = 10, proxy: Optional[dict] = None,
+                 locale: Literal["ru", "en", "uk"] | None = None, pool_size: int = 10, keep_alive: bool = True,
+                 rate_limiter: RateLimiter | None = None, max_429_retries: int = 3, chats_cache_size: int = 5000,
+                 base_url: str = FUNPAY_URL):
+        if aiohttp is None:
+            raise ImportError("Для AsyncAccount необходим пакет aiohttp (pip install aiohttp).")
+        super(AsyncAccount, self).__init__(golden_key, user_agent, requests_timeout, proxy, locale, pool_size,
+                                           keep_alive, rate_limiter, max_429_retries, chats_cache_size, base_url)
+        self.pool_size: int = pool_size
+        """Максимальное кол-во одновременно открытых соединений."""
+        self.async_session: aiohttp.ClientSession | None = None
+        """Асинхронная HTTP-сессия (создается при первом запросе)."""
+
+    async def method_async(self, request_method: Literal["post", "get"], api_method: str, headers: dict,
+                           payload: Any, exclude_phpsessid: bool = False, raise_not_200: bool = False,
+                           locale: Literal["ru", "en", "uk"] | None = None) -> requests.Response:
+        """
+        Асинхронная версия :meth:`FunPayAPI.account.Account.method`.
+        Ответ приводится к :class:`requests.Response`, поэтому парсинг ответов общий с синхронным клиентом.
+
+        :return: объект ответа.
+        :rtype: :class:`requests.Response`
+        """
+        link, headers = self._prepare_request(request_method, api_method, headers, exclude_phpsessid, locale)
+        bucket = self.get_rate_limit_bucket(request_method, link, payload)
+        retries = self.max_429_retries if isinstance(payload, (dict, str, bytes)) else 0
+        data, headers = self.__encode_payload(payload, headers)
+        session = self.__get_session()
+        proxy = (self.proxy or {}).get("https") or (self.proxy or {}).get("http")
+        for attempt in range(retries + 1):
+            if (wait := self.rate_limiter.get_bucket(bucket).reserve()) > 0:
+                await asyncio.sleep(wait)
+            url = link
+            for i in range(11):
+                # как и в синхронной версии, перенаправления обрабатываются вручную (для отслеживания языка)
+                async with session.request(request_method, url, headers=headers, data=data, proxy=proxy,
+                                           allow_redirects=i == 10) as resp:
+                    response = self.__to_response(resp, await resp.read(), request_method, headers, data)
+                if not (300 <= response.status_code < 400) or 'Location' not in response.headers:
+                    break
+                url = response.headers['Location']
+                self._update_locale(url)
+            if response.status_code != 429:
+                break
+            self.last_429_err_time = time.time()
+            delay = self.get_429_delay(response, attempt)
+            self.rate_limiter.penalize(bucket, delay)
+            if attempt < retries:
+                logger.warning(f"FunPay вернул 429 на запрос к {link}. Повтор через {delay:.1f} сек.")
+
+        self._check_response(response, raise_not_200)
+        return response
+
+    async def run_flow(self, flow: Generator[Request | float, Any, T]) -> T:
+        """
+        Асинхронно выполняет сценарий запросов (см. :meth:`FunPayAPI.account.Account.run_flow`).
+
+        :param flow: сценарий запросов.
+        :type flow: :obj:`Generator`
+
+        :return: результат сценария.
+        """
+        to_send, to_throw = None, None
+        while True:
+            try:
+                step = flow.throw(to_throw) if to_throw is not None else flow.send(to_send)
+            except StopIteration as e:
+                return e.value
+            to_send, to_throw = None, None
+            if isinstance(step, Request):
+                try:
+                    to_send = await self.method_async(*step.args, **step.kwargs)
+                except Exception as e:
+                    to_throw = e
+            elif isinstance(step, Parallel):
+                try:
+                    to_send = await self.__run_parallel(step)
+                except Exception as e:
+                    to_throw = e
+            else:
+                await asyncio.sleep(step)
+
+    async def __run_parallel(self, step: Parallel) -> list:
+        """Выполняет вложенные сценарии :class:`FunPayAPI.account.Parallel` конкурентно (не более limit сразу)."""
+        semaphore = asyncio.Semaphore(step.limit)
+
+        async def run(flow: Generator) -> Any:
+            async with semaphore:
+                return await self.run_flow(flow)
+
+        return list(await asyncio.gather(*(run(flow) for flow in step.flows)))
+
+    def __get_session(self) -> aiohttp.ClientSession:
+        """
+        Возвращает асинхронную HTTP-сессию (создает ее при необходимости).
+        Куки сессии не используются: golden_key и PHPSESSID передаются в заголовках.
+
+        :return: асинхронная HTTP-сессия.
+        :rtype: :class:`aiohttp.ClientSession`
+        """
+        if self.async_session is None or self.async_session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, force_close=not self.keep_alive)
+            self.async_session = aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar(),
+                                                       timeout=aiohttp.ClientTimeout(total=self.requests_timeout))
+        return self.async_session
+
+    @staticmethod
+    def __encode_payload(payload: Any, headers: dict) -> tuple[Any, dict]:
+        """
+        Приводит тело запроса к виду, который принимает :mod:`aiohttp` (так же, как это делает :mod:`requests`).
+
+        :return: (тело запроса, заголовки)
+        :rtype: :obj:`tuple`
+        """
+        if isinstance(payload, MultipartEncoder):
+            data = aiohttp.FormData()
+            for name, value in payload.fields.items():
+                if isinstance(value, tuple):
+                    filename, content, content_type = value
+                    data.add_field(name, content, filename=filename, content_type=content_type)
+                else:
+                    data.add_field(name, value)
+            # boundary сгенерирует aiohttp
+            return data, {k: v for k, v in headers.items() if k.lower() != "content-type"}
+        if isinstance(payload, dict):
+            if not payload:
+                return None, headers
+            data = urlencode([(k, v) for k, v in payload.items() if v is not None], doseq=True)
+            if not any(k.lower() == "content-type" for k in headers):
+                headers["content-type"] = "application/x-www-form-urlencoded"
+            return data, headers
+        return payload, headers
+
+    @staticmethod
+    def __to_response(resp: aiohttp.ClientResponse, content: bytes, request_method: str, headers: dict,
+                      data: Any) -> requests.Response:
+        """
+        Приводит ответ :mod:`aiohttp` к :class:`requests.Response`.
+
+        :return: объект ответа.
+        :rtype: :class:`requests.Response`
+        """
+        response = requests.Response()
+        response.status_code = resp.status
+        response.reason = resp.reason
+        response.url = str(resp.url)
+        response.headers = requests.structures.CaseInsensitiveDict(resp.headers)
+        response.encoding = resp.charset or "utf-8"
+        response._content = content
+        for name, morsel in resp.cookies.items():
+            response.cookies.set(name, morsel.value)
+        request = requests.PreparedRequest()
+        request.method = request_method.upper()
+        request.url = str(resp.request_info.url)
+        request.headers = requests.structures.CaseInsensitiveDict(headers)
+        request.body = data if isinstance(data, (str, bytes)) else None
+        response.request = request
+        return response
+
+    async def close(self) -> None:
+        """
+        Закрывает асинхронную и синхронную HTTP-сессии.
+        """
+        if self.async_session is not None and not self.async_session.closed:
+            await self.async_session.close()
+        super(AsyncAccount, self).close()
+
+    async def get(self, update_phpsessid: bool = True) -> Account:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get`."""
+        return await self.run_flow(self._get_flow(update_phpsessid))
+
+    async def get_subcategory_public_lots(self, subcategory_type: enums.SubCategoryTypes, subcategory_id: int,
+                                          locale: Literal["ru", "en", "uk"] | None = None) -> list[types.LotShortcut]:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get_subcategory_public_lots`."""
+        return await self.run_flow(self._get_subcategory_public_lots_flow(subcategory_type, subcategory_id, locale))
+
+    async def get_my_subcategory_lots(self, subcategory_id: int,
+                                      locale: Literal["ru", "en", "uk"] | None = None) -> list[types.MyLotShortcut]:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get_my_subcategory_lots`."""
+        return await self.run_flow(self._get_my_subcategory_lots_flow(subcategory_id, locale))
+
+    async def get_lot_page(self, lot_id: int, locale: Literal["ru", "en", "uk"] | None = None):
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get_lot_page`."""
+        return await self.run_flow(self._get_lot_page_flow(lot_id, locale))
+
+    async def get_balance(self, lot_id: int) -> types.Balance:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get_balance`."""
+        return await self.run_flow(self._get_balance_flow(lot_id))
+
+    async def get_chat_history(self, chat_id: int | str, last_message_id: int = 99999999999999999999999,
+                               interlocutor_username: Optional[str] = None, from_id: int = 0) -> list[types.Message]:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get_chat_history`."""
+        return await self.run_flow(self._get_chat_history_flow(chat_id, last_message_id, interlocutor_username,
+                                                               from_id))
+
+    async def get_chats_histories(self, chats_data: dict[int | str, str | None],
+                                  interlocutor_ids: list[int] | None = None) -> dict[int, list[types.Message]]:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get_chats_histories`."""
+        return await self.run_flow(self._get_chats_histories_flow(chats_data, interlocutor_ids))
+
+    async def upload_image(self, image: str | IO[bytes], type_: Literal["chat", "offer"] = "chat") -> int:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.upload_image`."""
+        return await self.run_flow(self._upload_image_flow(image, type_))
+
+    async def send_message(self, chat_id: int | str, text: Optional[str] = None, chat_name: Optional[str] = None,
+                           interlocutor_id: Optional[int] = None,
+                           image_id: Optional[int] = None, add_to_ignore_list: bool = True,
+                           update_last_saved_message: bool = False, leave_as_unread: bool = False) -> types.Message:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.send_message`."""
+        return await self.run_flow(self._send_message_flow(chat_id, text, chat_name, interlocutor_id, image_id,
+                                                           add_to_ignore_list, update_last_saved_message,
+                                                           leave_as_unread))
+
+    async def send_review(self, order_id: str, text: str, rating: Literal[1, 2, 3, 4, 5] = 5) -> str:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.send_review`."""
+        return await self.run_flow(self._send_review_flow(order_id, text, rating))
+
+    async def delete_review(self, order_id: str) -> str:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.delete_review`."""
+        return await self.run_flow(self._delete_review_flow(order_id))
+
+    async def refund(self, order_id):
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.refund`."""
+        await self.run_flow(self._refund_flow(order_id))
+
+    async def withdraw(self, currency: enums.Currency, wallet: enums.Wallet, amount: int | float,
+                       address: str) -> float:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.withdraw`."""
+        return await self.run_flow(self._withdraw_flow(currency, wallet, amount, address))
+
+    async def get_raise_modal(self, category_id: int) -> dict:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get_raise_modal`."""
+        return await self.run_flow(self._get_raise_modal_flow(category_id))
+
+    async def raise_lots(self, category_id: int, subcategories: Optional[list[int | types.SubCategory]] = None,
+                         exclude: list[int] | None = None) -> bool:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.raise_lots`."""
+        return await self.run_flow(self._raise_lots_flow(category_id, subcategories, exclude))
+
+    async def get_user(self, user_id: int, locale: Literal["ru", "en", "uk"] | None = None) -> types.UserProfile:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get_user`."""
+        return await self.run_flow(self._get_user_flow(user_id, locale))
+
+    async def get_chat(self, chat_id: int, with_history: bool = True,
+                       locale: Literal["ru", "en", "uk"] | None = None) -> types.Chat:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get_chat`."""
+        return await self.run_flow(self._get_chat_flow(chat_id, with_history, locale))
+
+    async def get_order(self, order_id: str, locale: Literal["ru", "en", "uk"] | None = None) -> types.Order:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get_order`."""
+        return await self.run_flow(self._get_order_flow(order_id, locale))
+
+    async def get_sales(self, start_from: str | None = None, include_paid: bool = True, include_closed: bool = True,
+                        include_refunded: bool = True, exclude_ids: list[str] | None = None,
+                        id: Optional[str] = None, buyer: Optional[str] = None,
+                        state: Optional[Literal["closed", "paid", "refunded"]] = None, game: Optional[int] = None,
+                        section: Optional[str] = None, server: Optional[int] = None,
+                        side: Optional[int] = None, locale: Literal["ru", "en", "uk"] | None = None,
+                        subcategories: dict[str, tuple[types.SubCategoryTypes, int]] | None = None,
+                        stop_at: dict[str, types.OrderStatuses] | None = None, **more_filters) -> \
+                  tuple[str | None, list[types.OrderShortcut], Literal["ru", "en", "uk"],
+                  dict[str, types.SubCategory]]:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get_sales`."""
+        return await self.run_flow(self._get_sales_flow(start_from, include_paid, include_closed, include_refunded,
+                                                        exclude_ids, id, buyer, state, game, section, server, side,
+                                                        locale, subcategories, stop_at, **more_filters))
+
+    async def request_chats(self) -> list[types.ChatShortcut]:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.request_chats`."""
+        return await self.run_flow(self._request_chats_flow())
+
+    async def calc(self, subcategory_type: enums.SubCategoryTypes, subcategory_id: int | None = None,
+                   game_id: int | None = None, price: int | float = 1000):
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.calc`."""
+        return await self.run_flow(self._calc_flow(subcategory_type, subcategory_id, game_id, price))
+
+    async def get_lot_fields(self, lot_id: int) -> types.LotFields:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get_lot_fields`."""
+        return await self.run_flow(self._get_lot_fields_flow(lot_id))
+
+    async def get_lots_activity(self, lot_ids: list[int] | set[int]) -> dict[int, bool]:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get_lots_activity`."""
+        return await self.run_flow(self._get_lots_activity_flow(lot_ids))
+
+    async def get_chip_fields(self, subcategory_id: int) -> types.ChipFields:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get_chip_fields`."""
+        return await self.run_flow(self._get_chip_fields_flow(subcategory_id))
+
+    async def save_offer(self, offer_fields: types.LotFields | types.ChipFields):
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.save_offer`."""
+        await self.run_flow(self._save_offer_flow(offer_fields))
+
+    async def get_exchange_rate(self, currency: types.Currency) -> tuple[float, types.Currency]:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get_exchange_rate`."""
+        return await self.run_flow(self._get_exchange_rate_flow(currency))
+
+    async def logout(self) -> None:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.logout`."""
+        await self.run_flow(self._logout_flow())
+
+    async def send_image(self, chat_id: int, image: int | str | IO[bytes], chat_name: Optional[str] = None,
+                         interlocutor_id: Optional[int] = None,
+                         add_to_ignore_list: bool = True, update_last_saved_message: bool = False,
+                         leave_as_unread: bool = False) -> types.Message:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.send_image`."""
+        if not self.is_initiated:
+            raise exceptions.AccountNotInitiatedError()
+
+        if not isinstance(image, int):
+            image = await self.upload_image(image, type_="chat")
+        return await self.send_message(chat_id, None, chat_name, interlocutor_id,
+                                       image, add_to_ignore_list, update_last_saved_message,
+                                       leave_as_unread)
+
+    async def get_order_shortcut(self, order_id: str) -> types.OrderShortcut:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get_order_shortcut`."""
+        if order_id in self.runner.saved_orders:
+            return self.runner.saved_orders[order_id]
+        return (await self.get_sales(id=order_id))[1][0]
+
+    async def get_sells(self, start_from: str | None = None, include_paid: bool = True, include_closed: bool = True,
+                        include_refunded: bool = True, exclude_ids: list[str] | None = None,
+                        id: Optional[str] = None, buyer: Optional[str] = None,
+                        state: Optional[Literal["closed", "paid", "refunded"]] = None, game: Optional[int] = None,
+                        section: Optional[str] = None, server: Optional[int] = None,
+                        side: Optional[int] = None, **more_filters) -> tuple[str | None, list[types.OrderShortcut]]:
+        """Эта функция вскоре будет удалена. Используйте AsyncAccount.get_sales()."""
+        start_from, orders, loc, subcs = await self.get_sales(start_from, include_paid, include_closed,
+                                                              include_refunded, exclude_ids, id, buyer, state, game,
+                                                              section, server, side, None, None, **more_filters)
+        return start_from, orders
+
+    async def get_chats(self, update: bool = False) -> dict[int, types.ChatShortcut]:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get_chats`."""
+        if update:
+            if not self.is_initiated:
+                raise exceptions.AccountNotInitiatedError()
+            self.add_chats(await self.request_chats())
+        return super(AsyncAccount, self).get_chats()
+
+    async def get_chat_by_name(self, name: str, make_request: bool = False) -> types.ChatShortcut | None:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get_chat_by_name`."""
+        if (chat := super(AsyncAccount, self).get_chat_by_name(name)) or not make_request:
+            return chat
+        self.add_chats(await self.request_chats())
+        return super(AsyncAccount, self).get_chat_by_name(name)
+
+    async def get_chat_by_id(self, chat_id: int, make_request: bool = False) -> types.ChatShortcut | None:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.get_chat_by_id`."""
+        if (chat := super(AsyncAccount, self).get_chat_by_id(chat_id)) or not make_request:
+            return chat
+        self.add_chats(await self.request_chats())
+        return super(AsyncAccount, self).get_chat_by_id(chat_id)
+
+    async def save_chip(self, chip_fields: types.ChipFields):
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.save_chip`."""
+        await self.save_offer(chip_fields)
+
+    async def save_lot(self, lot_fields: types.LotFields):
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.save_lot`."""
+        await self.save_offer(lot_fields)
+
+    async def delete_lot(self, lot_id: int) -> None:
+        """Асинхронная версия :meth:`FunPayAPI.account.Account.delete_lot`."""
+        await self.save_lot(types.LotFields(lot_id, {"csrf_token": self.csrf_token, "offer_id": lot_id, "deleted": "1"}))
@@ -0,0 +1,121 @@
+"""
+В данном модуле описан ограничитель частоты запросов к FunPay (token bucket).
+"""
+from __future__ import annotations
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Потокобезопасное "ведро токенов": пропускает в среднем `rate` запросов в секунду
+    с возможностью "всплеска" до `capacity` запросов подряд.
+
+    :param rate: скорость пополнения ведра (токенов в секунду).
+    :type rate: :obj:`float`
+
+    :param capacity: вместимость ведра (максимальный размер "всплеска").
+    :type capacity: :obj:`int`
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate должен быть > 0, capacity - >= 1.")
+        self.rate: float = rate
+        """Скорость пополнения ведра (токенов в секунду)."""
+        self.capacity: int = capacity
+        """Вместимость ведра."""
+        self.__tokens: float = capacity
+        self.__last: float = time.monotonic()
+        """Момент времени, до которого учтено пополнение ведра (может быть в будущем после штрафа)."""
+        self.__lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Резервирует токен.
+
+        :return: время (в секундах), которое необходимо подождать перед выполнением запроса.
+        :rtype: :obj:`float`
+        """
+        with self.__lock:
+            now = time.monotonic()
+            if now > self.__last:
+                self.__tokens = min(self.capacity, self.__tokens + (now - self.__last) * self.rate)
+                self.__last = now
+            self.__tokens -= 1
+            wait = (self.__last - now) + max(0.0, -self.__tokens) / self.rate
+            return max(0.0, wait)
+
+    def penalize(self, delay: float):
+        """
+        Блокирует ведро на `delay` секунд (например, после ответа 429).
+        Уже выданные резервации сдвигаются на время блокировки.
+
+        :param delay: время блокировки (в секундах).
+        :type delay: :obj:`float`
+        """
+        with self.__lock:
+            until = time.monotonic() + delay
+            if until > self.__last:
+                self.__tokens = min(self.__tokens, 1)
+                self.__last = until
+
+
+class RateLimiter:
+    """
+    Набор именованных :class:`FunPayAPI.common.rate_limiter.TokenBucket`. Один экземпляр можно разделять между
+    несколькими потоками (и несколькими аккаунтами).
+
+    :param limits: лимиты в формате {название ведра: (запросов в секунду, размер всплеска)}.
+        Переданные значения дополняют / переопределяют :py:obj:`RateLimiter.DEFAULT_LIMITS`.
+    :type limits: :obj:`dict` {:obj:`str`: :obj:`tuple` (:obj:`float`, :obj:`int`)}, опционально
+    """
+
+    DEFAULT_LIMITS: dict[str, tuple[float, int]] = {
+        "runner": (1.0, 3),
+        "chat_message": (0.5, 3),
+        "offer_save": (0.5, 2),
+        "page": (1.0, 3),
+        "default": (2.0, 5)
+    }
+    """Лимиты по умолчанию: {название ведра: (запросов в секунду, размер всплеска)}."""
+
+    def __init__(self, limits: dict[str, tuple[float, int]] | None = None):
+        self.limits: dict[str, tuple[float, int]] = {**self.DEFAULT_LIMITS, **(limits or {})}
+        """Лимиты ведер."""
+        self.__buckets: dict[str, TokenBucket] = {name: TokenBucket(*limit) for name, limit in self.limits.items()}
+
+    def get_bucket(self, name: str) -> TokenBucket:
+        """
+        Возвращает ведро по названию (ведро "default", если ведро с таким названием не настроено).
+
+        :param name: название ведра.
+        :type name: :obj:`str`
+
+        :return: ведро токенов.
+        :rtype: :class:`FunPayAPI.common.rate_limiter.TokenBucket`
+        """
+        return self.__buckets.get(name) or self.__buckets["default"]
+
+    def acquire(self, name: str):
+        """
+        Блокирует поток, пока ведро не разрешит выполнить запрос.
+
+        :param name: название ведра.
+        :type name: :obj:`str`
+        """
+        if (wait := self.get_bucket(name).reserve()) > 0:
+            time.sleep(wait)
+
+    def penalize(self, name: str, delay: float):
+        """
+        Блокирует ведро на `delay` секунд для всех потоков.
+
+        :param name: название ведра.
+        :type name: :obj:`str`
+
+        :param delay: время блокировки (в секундах).
+        :type delay: :obj:`float`
+        """
+        self.get_bucket(name).penalize(delay)
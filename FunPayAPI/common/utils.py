@@ -1,10 +1,17 @@
 """
 В данном модуле написаны вспомогательные функции.
 """
+from __future__ import annotations
 
+from typing import Any, Callable
+import json
 import string
 import random
 import re
+from collections import OrderedDict
+from bs4 import BeautifulSoup
+from bs4.filter import ElementFilter
+from lxml import etree
 from .enums import Currency
 
 MONTHS = {
@@ -75,6 +82,254 @@ def parse_wait_time(response: str) -> int:
         return 10
 
 
+class LRUDict(OrderedDict):
+    """
+    Словарь ограниченного размера: при добавлении элемента сверх maxsize удаляется элемент,
+    который дольше всех не добавлялся и не изменялся.
+
+    :param maxsize: максимальное кол-во элементов.
+    :type maxsize: :obj:`int`
+
+    :param on_evict: функция, которая вызывается с ключом и значением каждого вытесненного элемента.
+    :type on_evict: :obj:`Callable`, опционально
+    """
+
+    def __init__(self, maxsize: int = 1000, *args, on_evict: Callable[[Any, Any], None] | None = None, **kwargs):
+        self.maxsize: int = maxsize
+        """Максимальное кол-во элементов."""
+        self.on_evict: Callable[[Any, Any], None] | None = on_evict
+        """Функция, которая вызывается с ключом и значением каждого вытесненного элемента."""
+        super().__init__(*args, **kwargs)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.maxsize:
+            evicted_key, evicted_value = self.popitem(last=False)
+            if self.on_evict is not None:
+                self.on_evict(evicted_key, evicted_value)
+
+    def copy(self) -> LRUDict:
+        return self.__class__(self.maxsize, self, on_evict=self.on_evict)
+
+
+def _xpath_has_class(tag: str, class_name: str) -> str:
+    return f"{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+
+_CONTACT_ITEMS_XPATH = etree.XPath("//" + _xpath_has_class("a", "contact-item"))
+_CONTACT_ITEM_MESSAGE_XPATH = etree.XPath(".//" + _xpath_has_class("div", "contact-item-message"))
+_CONTACT_ITEM_NAME_XPATH = etree.XPath(".//" + _xpath_has_class("div", "media-user-name"))
+
+
+class ContactItem:
+    """
+    Данные виджета чата (a.contact-item) из HTML списка чатов (chat_bookmarks).
+    Из этих данных :class:`FunPayAPI.account.Account` и :class:`FunPayAPI.updater.runner.Runner`
+    создают :class:`FunPayAPI.types.ChatShortcut`.
+
+    :param id_: ID чата (data-id).
+    :type id_: :obj:`int`
+
+    :param name: никнейм собеседника или :obj:`None`, если блока нет.
+    :type name: :obj:`str` or :obj:`None`
+
+    :param last_message_text: текст последнего сообщения или :obj:`None`, если блока нет (чат удален).
+    :type last_message_text: :obj:`str` or :obj:`None`
+
+    :param node_msg_id: ID последнего сообщения в чате (data-node-msg).
+    :type node_msg_id: :obj:`int`
+
+    :param user_msg_id: ID последнего прочитанного сообщения (data-user-msg).
+    :type user_msg_id: :obj:`int`
+
+    :param unread: есть ли у виджета класс unread.
+    :type unread: :obj:`bool`
+
+    :param element: элемент виджета (lxml или BeautifulSoup).
+
+    :param serializer: функция, преобразующая элемент в HTML код.
+    :type serializer: :obj:`Callable`
+    """
+
+    def __init__(self, id_: int, name: str | None, last_message_text: str | None, node_msg_id: int,
+                 user_msg_id: int, unread: bool, element: Any, serializer: Callable[[Any], str]):
+        self.id: int = id_
+        """ID чата."""
+        self.name: str | None = name
+        """Никнейм собеседника."""
+        self.last_message_text: str | None = last_message_text
+        """Текст последнего сообщения."""
+        self.node_msg_id: int = node_msg_id
+        """ID последнего сообщения в чате."""
+        self.user_msg_id: int = user_msg_id
+        """ID последнего прочитанного сообщения."""
+        self.unread: bool = unread
+        """Есть ли непрочитанные сообщения."""
+        self.__element = element
+        self.__serializer = serializer
+
+    @property
+    def html(self) -> str:
+        """HTML код виджета чата (вычисляется при обращении)."""
+        return self.__serializer(self.__element)
+
+
+def _serialize_lxml(element: etree._Element) -> str:
+    return etree.tostring(element, encoding="unicode", method="html", with_tail=False)
+
+
+def _parse_contact_items_lxml(html: str) -> list[ContactItem]:
+    root = etree.HTML(html)
+    if root is None:
+        return []
+    result = []
+    for item in _CONTACT_ITEMS_XPATH(root):
+        message = _CONTACT_ITEM_MESSAGE_XPATH(item)
+        name = _CONTACT_ITEM_NAME_XPATH(item)
+        result.append(ContactItem(int(item.get("data-id")),
+                                  "".join(name[0].itertext()) if name else None,
+                                  "".join(message[0].itertext()) if message else None,
+                                  int(item.get("data-node-msg")), int(item.get("data-user-msg")),
+                                  "unread" in item.get("class", "").split(), item, _serialize_lxml))
+    return result
+
+
+def _parse_contact_items_bs4(html: str) -> list[ContactItem]:
+    result = []
+    for item in BeautifulSoup(html, "lxml").find_all("a", {"class": "contact-item"}):
+        message = item.find("div", {"class": "contact-item-message"})
+        name = item.find("div", {"class": "media-user-name"})
+        result.append(ContactItem(int(item["data-id"]), name.text if name else None,
+                                  message.text if message else None,
+                                  int(item.get("data-node-msg")), int(item.get("data-user-msg")),
+                                  "unread" in item.get("class"), item, str))
+    return result
+
+
+_A_TAG_RE = re.compile(r"<a\s[^>]*>", re.IGNORECASE)
+_ATTR_RE = r"""\s{}\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))"""
+_CLASS_ATTR_RE = re.compile(_ATTR_RE.format("class"), re.IGNORECASE)
+_DATA_ID_ATTR_RE = re.compile(_ATTR_RE.format("data-id"), re.IGNORECASE)
+
+
+def split_contact_items(html: str) -> list[tuple[int, int, int]] | None:
+    """
+    Делит HTML списка чатов (chat_bookmarks) на фрагменты отдельных виджетов чатов с помощью регулярных выражений,
+    без построения дерева. Позволяет найти изменившиеся чаты до разбора HTML.
+    Фрагмент виджета продолжается до начала следующего виджета (или до конца HTML).
+
+    :param html: HTML списка чатов.
+    :type html: :obj:`str`
+
+    :return: [(ID чата, начало фрагмента, конец фрагмента), ...] или :obj:`None`,
+        если разметку не удалось разделить однозначно.
+    :rtype: :obj:`list` of :obj:`tuple` (:obj:`int`, :obj:`int`, :obj:`int`) or :obj:`None`
+    """
+    starts = []
+    for match in _A_TAG_RE.finditer(html):
+        tag = match.group()
+        class_attr = _CLASS_ATTR_RE.search(tag)
+        if not class_attr or "contact-item" not in "".join(class_attr.groups("")).split():
+            continue
+        data_id = _DATA_ID_ATTR_RE.search(tag)
+        data_id = "".join(data_id.groups("")) if data_id else ""
+        if not data_id.isdigit():
+            return None
+        starts.append((match.start(), int(data_id)))
+    # Класс contact-item встретился где-то еще (например, тег разбит нестандартно) - доверять разбиению нельзя
+    if len(starts) != html.count("contact-item") - html.count("contact-item-"):
+        return None
+    ends = [start for start, _ in starts[1:]] + [len(html)]
+    return [(chat_id, start, end) for (start, chat_id), end in zip(starts, ends)]
+
+
+def parse_contact_items(html: str, fast: bool = True) -> list[ContactItem]:
+    """
+    Парсит HTML списка чатов (chat_bookmarks): этот фрагмент разбирается при каждом запросе к runner'у,
+    поэтому по умолчанию используется lxml.etree + XPath. Если быстрый парсер не справился
+    (неожиданная разметка), HTML разбирается BeautifulSoup.
+
+    :param html: HTML списка чатов.
+    :type html: :obj:`str`
+
+    :param fast: использовать ли быстрый парсер (:obj:`False` - сразу BeautifulSoup).
+    :type fast: :obj:`bool`, опционально
+
+    :return: виджеты чатов в порядке следования в HTML.
+    :rtype: :obj:`list` of :class:`FunPayAPI.common.utils.ContactItem`
+    """
+    if fast:
+        try:
+            return _parse_contact_items_lxml(html)
+        except (ValueError, TypeError, etree.LxmlError):
+            pass
+    return _parse_contact_items_bs4(html)
+
+
+class TagsStrainer(ElementFilter):
+    """
+    Фильтр для аргумента parse_only :class:`bs4.BeautifulSoup`: в дерево попадают только теги, подходящие хотя бы
+    под одно правило, вместе со всем содержимым (остальная страница - шапка, меню, скрипты - не строится).
+    Порядок подходящих тегов сохраняется, поэтому find / find_all по ним дают тот же результат, что и по всей странице.
+
+    :param rules: правила (имя тега, атрибут, значение). Для атрибута class значение - один из классов тега,
+        для остальных атрибутов - значение целиком; :obj:`True` - тег с таким атрибутом.
+    :type rules: :obj:`tuple` (:obj:`str`, :obj:`str`, :obj:`str` or :obj:`bool`)
+    """
+
+    def __init__(self, *rules: tuple[str, str, str | bool]):
+        super().__init__()
+        self.rules: dict[str, list[tuple[str, str | bool]]] = {}
+        """Правила {имя тега: [(атрибут, значение), ...]}."""
+        for name, attr, value in rules:
+            self.rules.setdefault(name, []).append((attr, value))
+
+    @property
+    def includes_everything(self) -> bool:
+        return False
+
+    def allow_tag_creation(self, nsprefix: str | None, name: str, attrs: dict | None) -> bool:
+        for attr, value in self.rules.get(name, ()):
+            if not attrs or (attr_value := attrs.get(attr)) is None:
+                continue
+            if value is True:
+                return True
+            if attr == "class":
+                if value in (attr_value.split() if isinstance(attr_value, str) else attr_value):
+                    return True
+            elif attr_value == value:
+                return True
+        return False
+
+    def allow_string_creation(self, string: str) -> bool:
+        return False
+
+
+_BODY_TAG_RE = re.compile(r"""<body(?:\s+[^\s=>/]+(?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s>]+))?)*\s*/?>""", re.IGNORECASE)
+
+
+def parse_app_data(html: str) -> dict:
+    """
+    Возвращает данные приложения FunPay (атрибут data-app-data тега body): locale, csrf-token, userId и т.д.
+    Разбирается только открывающий тег body, а не вся страница.
+
+    :param html: HTML страницы FunPay.
+    :type html: :obj:`str`
+
+    :return: данные приложения.
+    :rtype: :obj:`dict`
+
+    :raises: :class:`ValueError`, если на странице нет data-app-data.
+    """
+    for match in _BODY_TAG_RE.finditer(html):
+        body = etree.HTML(match.group() + "</body>")
+        body = body.find("body") if body is not None else None
+        if body is not None and (app_data := body.get("data-app-data")) is not None:
+            return json.loads(app_data)
+    raise ValueError("На странице нет data-app-data.")
+
+
 def parse_currency(s: str) -> Currency:
     return {"₽": Currency.RUB,
             "€": Currency.EUR,
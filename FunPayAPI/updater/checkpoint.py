@@ -0,0 +1,86 @@
+"""
+В данном модуле описаны хранилища контрольных точек (checkpoint) состояния :class:`FunPayAPI.updater.runner.Runner`.
+Контрольная точка позволяет после перезапуска продолжить получение событий с того места, где Runner остановился:
+без повторной выдачи InitialChatEvent / InitialOrderEvent и без потери заказов, оплаченных во время простоя.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+class RunnerCheckpoint(ABC):
+    """
+    Базовый класс хранилища контрольных точек Runner'а.
+    Состояние передается в виде JSON-совместимого словаря (см. :meth:`FunPayAPI.updater.runner.Runner.get_state`).
+    Наследник должен реализовать :meth:`load` и :meth:`save`, иначе его экземпляр не создастся.
+    """
+
+    @abstractmethod
+    def load(self) -> dict | None:
+        """
+        Загружает сохраненное состояние Runner'а.
+
+        :return: состояние или :obj:`None`, если контрольной точки нет.
+        :rtype: :obj:`dict` or :obj:`None`
+        """
+
+    @abstractmethod
+    def save(self, state: dict):
+        """
+        Сохраняет состояние Runner'а.
+
+        :param state: состояние Runner'а.
+        :type state: :obj:`dict`
+        """
+
+
+class SQLiteCheckpoint(RunnerCheckpoint):
+    """
+    Хранит контрольные точки в таблице funpay_runner_checkpoints SQLite базы данных.
+
+    :param path: путь к файлу базы данных.
+    :type path: :obj:`str`
+
+    :param key: ключ контрольной точки (например, ID аккаунта), позволяет хранить в одной БД точки нескольких Runner'ов.
+    :type key: :obj:`str` or :obj:`int`, опционально
+    """
+
+    def __init__(self, path: str, key: str | int = "default"):
+        self.path: str = path
+        """Путь к файлу базы данных."""
+        self.key: str = str(key)
+        """Ключ контрольной точки."""
+        self.__conn: sqlite3.Connection | None = None
+        self.__lock = threading.Lock()
+
+    def __get_connection(self) -> sqlite3.Connection:
+        if self.__conn is None:
+            self.__conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self.__conn.execute("CREATE TABLE IF NOT EXISTS funpay_runner_checkpoints "
+                                "(key TEXT PRIMARY KEY, state TEXT NOT NULL, saved_at REAL NOT NULL)")
+        return self.__conn
+
+    def load(self) -> dict | None:
+        with self.__lock:
+            row = self.__get_connection().execute("SELECT state FROM funpay_runner_checkpoints WHERE key = ?",
+                                                  (self.key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, state: dict):
+        data = json.dumps(state, ensure_ascii=False)
+        with self.__lock:
+            self.__get_connection().execute(
+                "INSERT INTO funpay_runner_checkpoints (key, state, saved_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET state = excluded.state, saved_at = excluded.saved_at",
+                (self.key, data, time.time()))
+
+    def close(self):
+        """Закрывает соединение с базой данных."""
+        with self.__lock:
+            if self.__conn is not None:
+                self.__conn.close()
+                self.__conn = None
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
 import re
-from typing import TYPE_CHECKING, Generator
+import asyncio
+import inspect
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Callable, Generator
 
 if TYPE_CHECKING:
     from ..account import Account
+    from .checkpoint import RunnerCheckpoint
 
 import json
 import logging
-from bs4 import BeautifulSoup
 
+from ..account import Request, Parallel
 from ..common import exceptions
 from .events import *
 
@@ -39,11 +42,23 @@ class Runner:
         Из событий, связанных с заказами, будет возвращаться только
         :class:`FunPayAPI.updater.events.OrdersListChangedEvent`.
     :type disabled_order_requests: :obj:`bool`, опционально
+
+    :param checkpoint: хранилище контрольных точек (например, :class:`FunPayAPI.updater.checkpoint.SQLiteCheckpoint`).\n
+        Если передано, Runner восстанавливает из него состояние при создании (первый запрос не генерирует
+        Initial-события, а заказы, оплаченные во время простоя, выдаются как
+        :class:`FunPayAPI.updater.events.NewOrderEvent`) и сохраняет состояние после выдачи каждой пачки событий.
+    :type checkpoint: :class:`FunPayAPI.updater.checkpoint.RunnerCheckpoint` or :obj:`None`, опционально
+
+    :param chats_cache_size: максимальное кол-во чатов (и собеседников), состояние которых хранится в памяти.
+        Дольше всех не изменявшиеся чаты вытесняются; вытесненный чат считается чатом с неизвестным ID последнего
+        сообщения, его старые сообщения повторно не выдаются.
+    :type chats_cache_size: :obj:`int`, опционально
     """
 
     def __init__(self, account: Account, disable_message_requests: bool = False,
                  disabled_order_requests: bool = False,
-                 disabled_buyer_viewing_requests: bool = True):
+                 disabled_buyer_viewing_requests: bool = True,
+                 checkpoint: RunnerCheckpoint | None = None, chats_cache_size: int = 5000):
         # todo добавить события и исключение событий о новых покупках (не продажах!)
         if not account.is_initiated:
             raise exceptions.AccountNotInitiatedError()
@@ -61,24 +76,66 @@ class Runner:
         self.__last_msg_event_tag = utils.random_tag()
         self.__last_order_event_tag = utils.random_tag()
 
-        self.saved_orders: dict[str, types.OrderShortcut] = {}
-        """Сохраненные состояния заказов ({ID заказа: экземпляр types.OrderShortcut})."""
+        self.saved_orders: utils.LRUDict[str, types.OrderShortcut] = utils.LRUDict(1000)
+        """Сохраненные состояния последних полученных заказов ({ID заказа: экземпляр types.OrderShortcut}).
+        Кол-во ограничено saved_orders.maxsize."""
+
+        self.order_statuses: utils.LRUDict[str, types.OrderStatuses] = utils.LRUDict(1000)
+        """Известные статусы последних заказов ({ID заказа: статус}), в т.ч. восстановленные из контрольной точки.
+        Кол-во ограничено order_statuses.maxsize."""
+
+        self.incremental_orders: bool = True
+        """Получать ли список продаж инкрементально?\n
+        Если `True`, парсинг списка продаж прекращается на первом заказе с уже известным статусом, а следующие
+        страницы запрашиваются, только если счетчик незавершенных продаж не сходится с известными статусами."""
+        self.max_order_pages: int = 3
+        """Максимальное кол-во страниц списка продаж, запрашиваемых за одно изменение счетчиков заказов."""
+        self.__orders_initialized = False
+        """Известен ли список заказов (получен хотя бы раз или восстановлен из контрольной точки)?"""
 
-        self.runner_last_messages: dict[int, list[int, int, str | None]] = {}
+        self.__evicted_msg_id: int = 0
+        """Максимальный ID последнего сообщения среди вытесненных из памяти чатов."""
+
+        self.runner_last_messages: utils.LRUDict[int, list[int, int, str | None]] = \
+            utils.LRUDict(chats_cache_size, on_evict=lambda chat_id, last: self.__on_chat_evicted(last[0]))
         """ID последний сообщений {ID чата: [ID последего сообщения чата, ID последнего прочитанного сообщения чата, 
         текст последнего сообщения или None, если это изображение]}."""
 
-        self.by_bot_ids: dict[int, list[int]] = {}
+        self.__chat_fingerprints: utils.LRUDict[int, tuple[int, list | None]] = utils.LRUDict(chats_cache_size)
+        """Отпечатки виджетов чатов ({ID чата: (хэш HTML виджета, значение runner_last_messages после его разбора)}).
+        Виджет с тем же хэшем не разбирается повторно, пока значение в runner_last_messages не заменено."""
+
+        self.by_bot_ids: utils.LRUDict[int, list[int]] = utils.LRUDict(chats_cache_size)
         """ID сообщений, отправленных с помощью self.account.send_message ({ID чата: [ID сообщения, ...]})."""
 
-        self.last_messages_ids: dict[int, int] = {}
+        self.last_messages_ids: utils.LRUDict[int, int] = \
+            utils.LRUDict(chats_cache_size, on_evict=lambda chat_id, msg_id: self.__on_chat_evicted(msg_id))
         """ID последних сообщений в чатах ({ID чата: ID последнего сообщения})."""
 
-        self.buyers_viewing: dict[int, types.BuyerViewing] = {}
+        self.buyers_viewing: utils.LRUDict[int, types.BuyerViewing] = utils.LRUDict(chats_cache_size)
         """Что смотрит покупатель? ({ID покупателя: что смотрит}"""
 
         self.runner_len: int = 10
         """Количество событий, на которое успешно отвечает funpay.com/runner/"""
+
+        self.max_parallel_chat_requests: int = 3
+        """Максимальное кол-во одновременных запросов историй чатов (по runner_len чатов в каждом)."""
+
+        self.adaptive_delay: bool = False
+        """Подбирать ли задержку между запросами в :meth:`FunPayAPI.updater.runner.Runner.listen` автоматически?\n
+        Если `True`, после событий заказов / сообщений Runner опрашивает FunPay с задержкой
+        :py:obj:`FunPayAPI.updater.runner.Runner.min_delay`, а при простое и после ошибок (в т.ч. 429)
+        экспоненциально увеличивает ее до :py:obj:`FunPayAPI.updater.runner.Runner.max_delay`."""
+        self.min_delay: float = 1.5
+        """Минимальная задержка между запросами (в секундах) в адаптивном режиме."""
+        self.max_delay: float = 30.0
+        """Максимальная задержка между запросами (в секундах) в адаптивном режиме."""
+        self.backoff_factor: float = 2.0
+        """Во сколько раз увеличивается задержка при простое / после ошибки в адаптивном режиме."""
+        self.active_period: float = 60.0
+        """Сколько секунд после последнего события заказа / сообщения опрашивать FunPay с минимальной задержкой."""
+        self.__current_delay: float | None = None
+        self.__last_activity: float = 0
         self.__interlocutor_ids: set = set()
         """Айди собеседников, у которых будет получено поле "Покупатель смотрит\""""
 
@@ -88,6 +145,82 @@ class Runner:
 
         self.__msg_time_re = re.compile(r"\d{2}:\d{2}")
 
+        self.checkpoint: RunnerCheckpoint | None = checkpoint
+        """Хранилище контрольных точек."""
+        self.checkpoint_defer: Callable[[Callable[[], None]], None] | None = None
+        """Функция, которой передается сохранение контрольной точки вместо немедленного выполнения
+        (например, чтобы сохранить ее только после обработки выданных событий пулом обработчиков)."""
+        self.__last_saved_state: str | None = None
+        if checkpoint is not None and (state := checkpoint.load()):
+            self.set_state(state)
+            self.__last_saved_state = json.dumps(state, sort_keys=True)
+
+    def get_state(self) -> dict:
+        """
+        Возвращает состояние Runner'а, необходимое для продолжения работы после перезапуска.
+
+        :return: JSON-совместимое состояние.
+        :rtype: :obj:`dict`
+        """
+        orders = {order_id: status.name for order_id, status in self.order_statuses.items()}
+        return {
+            "last_msg_event_tag": self.__last_msg_event_tag,
+            "last_order_event_tag": self.__last_order_event_tag,
+            "orders": orders if self.__orders_initialized else None,
+            "runner_last_messages": self.runner_last_messages,
+            "last_messages_ids": self.last_messages_ids,
+            "by_bot_ids": self.by_bot_ids,
+            "evicted_msg_id": self.__evicted_msg_id
+        }
+
+    def set_state(self, state: dict):
+        """
+        Восстанавливает состояние Runner'а (результат :meth:`FunPayAPI.updater.runner.Runner.get_state`).
+        После восстановления первый запрос не считается первым: Initial-события не генерируются,
+        а изменения, произошедшие во время простоя, выдаются обычными событиями.
+
+        :param state: состояние Runner'а.
+        :type state: :obj:`dict`
+        """
+        self.__last_msg_event_tag = state.get("last_msg_event_tag") or self.__last_msg_event_tag
+        self.__last_order_event_tag = state.get("last_order_event_tag") or self.__last_order_event_tag
+        if (orders := state.get("orders")) is not None:
+            self.order_statuses.clear()
+            for order_id, status in orders.items():
+                self.order_statuses[order_id] = types.OrderStatuses[status]
+            self.__orders_initialized = True
+        self.saved_orders.clear()
+        # ключи JSON - строки, ID чатов - числа
+        self.__evicted_msg_id = state.get("evicted_msg_id", 0)
+        for attr in ("runner_last_messages", "last_messages_ids", "by_bot_ids"):
+            storage = getattr(self, attr)
+            storage.clear()
+            storage.update((int(k), v) for k, v in state.get(attr, {}).items())
+        self.__chat_fingerprints.clear()
+        self.__first_request = False
+
+    def __on_chat_evicted(self, last_msg_id: int):
+        """Запоминает ID последнего сообщения вытесненного из памяти чата."""
+        self.__evicted_msg_id = max(self.__evicted_msg_id, last_msg_id)
+
+    def save_checkpoint(self):
+        """
+        Сохраняет состояние Runner'а в :py:obj:`FunPayAPI.updater.runner.Runner.checkpoint`, если оно изменилось.
+        Вызывается :meth:`FunPayAPI.updater.runner.Runner.listen` после выдачи каждой пачки событий.
+        """
+        if self.checkpoint is None:
+            return
+        state = self.get_state()
+        serialized = json.dumps(state, sort_keys=True)
+        if serialized == self.__last_saved_state:
+            return
+        self.__last_saved_state = serialized
+        if self.checkpoint_defer is not None:
+            snapshot = json.loads(serialized)  # состояние изменится до отложенного сохранения
+            self.checkpoint_defer(lambda: self.checkpoint.save(snapshot))
+        else:
+            self.checkpoint.save(state)
+
     def get_updates(self) -> dict:
         """
         Запрашивает список событий FunPay.
@@ -95,6 +228,10 @@ class Runner:
         :return: ответ FunPay.
         :rtype: :obj:`dict`
         """
+        return self.account.run_flow(self._get_updates_flow())
+
+    def _get_updates_flow(self) -> Generator[Request | float, Any, dict]:
+        """Сценарий запросов :meth:`FunPayAPI.updater.runner.Runner.get_updates`."""
         orders = {
             "type": "orders_counters",
             "id": self.account.id,
@@ -122,7 +259,7 @@ class Runner:
             "x-requested-with": "XMLHttpRequest"
         }
 
-        response = self.account.method("post", "runner/", headers, payload, raise_not_200=True)
+        response = yield Request("post", "runner/", headers, payload, raise_not_200=True)
         json_response = response.json()
         logger.debug(f"Получены данные о событиях: {json_response}")
         return json_response
@@ -145,13 +282,17 @@ class Runner:
             :class:`FunPayAPI.updater.events.NewOrderEvent`,
             :class:`FunPayAPI.updater.events.OrderStatusChangedEvent`
         """
+        return self.account.run_flow(self._parse_updates_flow(updates))
+
+    def _parse_updates_flow(self, updates: dict) -> Generator[Request | float, Any, list[BaseEvent]]:
+        """Сценарий запросов :meth:`FunPayAPI.updater.runner.Runner.parse_updates`."""
         events = []
         # сортируем в т.ч. для того, корректно реагировало на сообщения покупателей сразу после оплаты (плагины автовыдачи)
         for obj in sorted(updates["objects"], key=lambda x: x.get("type") == "orders_counters", reverse=True):
             if obj.get("type") == "chat_bookmarks":
-                events.extend(self.parse_chat_updates(obj))
+                events.extend((yield from self._parse_chat_updates_flow(obj)))
             elif obj.get("type") == "orders_counters":
-                events.extend(self.parse_order_updates(obj))
+                events.extend((yield from self._parse_order_updates_flow(obj)))
             elif obj.get("type") == "c-p-u":
                 bv = self.account.parse_buyer_viewing(obj)
                 self.buyers_viewing[bv.buyer_id] = bv
@@ -174,22 +315,63 @@ class Runner:
             :class:`FunPayAPI.updater.events.LastChatMessageChangedEvent`,
             :class:`FunPayAPI.updater.events.NewMessageEvent`
         """
+        return self.account.run_flow(self._parse_chat_updates_flow(obj))
+
+    def __changed_contact_items(self, html: str, fingerprints: dict[int, int]) -> Generator[utils.ContactItem]:
+        """
+        Возвращает виджеты чатов, HTML которых изменился с прошлого разбора, и записывает хэши их HTML в fingerprints.
+        Повторный разбор неизменившегося виджета ничего не меняет, если runner_last_messages[ID чата] - тот же объект,
+        что был сохранен после прошлого разбора (его заменяют update_last_message, set_state и вытеснение из памяти).
+        Это проверяется в момент обработки виджета: чат может быть вытеснен обработкой предыдущих чатов.
+        """
+        items = utils.split_contact_items(html)
+        if items is None:
+            yield from utils.parse_contact_items(html)
+            return
+
+        def unchanged(chat_id: int, fingerprint: int) -> bool:
+            known = self.__chat_fingerprints.get(chat_id)
+            return known is not None and known[0] == fingerprint and known[1] is not None \
+                and self.runner_last_messages.get(chat_id) is known[1]
+
+        items = [(chat_id, start, end, hash(html[start:end])) for chat_id, start, end in items]
+        changed = [item for item in items if not unchanged(item[0], item[3])]
+        parsed = utils.parse_contact_items(html if len(changed) == len(items) else
+                                           "".join(html[start:end] for _, start, end, _ in changed))
+        if [chat.id for chat in parsed] != [item[0] for item in changed]:
+            # предварительное разбиение не совпало с разбором - разбираем весь список
+            yield from utils.parse_contact_items(html)
+            return
+
+        parsed = iter(parsed)
+        changed_ids = {item[0] for item in changed}
+        for chat_id, start, end, fingerprint in items:
+            if chat_id in changed_ids:
+                chat = next(parsed)
+            elif unchanged(chat_id, fingerprint):
+                continue
+            else:
+                chat = next(iter(utils.parse_contact_items(html[start:end])), None)
+                if chat is None:
+                    continue
+            fingerprints[chat_id] = fingerprint
+            yield chat
+
+    def _parse_chat_updates_flow(self, obj) -> Generator[Request | float, Any, list[BaseEvent]]:
+        """Сценарий запросов :meth:`FunPayAPI.updater.runner.Runner.parse_chat_updates`."""
         events, lcmc_events = [], []
         self.__last_msg_event_tag = obj.get("tag")
-        parser = BeautifulSoup(obj["data"]["html"], "lxml")
-        chats = parser.find_all("a", {"class": "contact-item"})
+        fingerprints = {}
 
-        # Получаем все изменившиеся чаты
-        for chat in chats:
-            chat_id = int(chat["data-id"])
+        # Получаем все изменившиеся чаты (виджеты, не изменившиеся с прошлого запроса, не разбираются)
+        for chat in self.__changed_contact_items(obj["data"]["html"], fingerprints):
+            chat_id = chat.id
             # Если чат удален админами - скип.
-            if not (last_msg_text := chat.find("div", {"class": "contact-item-message"})):
+            if (last_msg_text := chat.last_message_text) is None:
                 continue
 
-            last_msg_text = last_msg_text.text
-
-            node_msg_id = int(chat.get('data-node-msg'))
-            user_msg_id = int(chat.get('data-user-msg'))
+            node_msg_id = chat.node_msg_id
+            user_msg_id = chat.user_msg_id
             by_bot = False
             by_vertex = False
             if last_msg_text.startswith(self.account.bot_character):
@@ -201,17 +383,18 @@ class Runner:
             # если сообщение отправлено непрочитанным и вкл старый режим, то [0, 0, None] или [0, 0, "text"]
             prev_node_msg_id, prev_user_msg_id, prev_text = self.runner_last_messages.get(chat_id) or [-1, -1, None]
             last_msg_text_or_none = None if last_msg_text in ("Изображение", "Зображення", "Image") else last_msg_text
+            if chat_id not in self.runner_last_messages and node_msg_id <= self.__evicted_msg_id:
+                # чат был вытеснен из памяти, новых сообщений в нем нет - просто запоминаем
+                self.runner_last_messages[chat_id] = [node_msg_id, user_msg_id, last_msg_text_or_none]
+                continue
             if node_msg_id <= prev_node_msg_id:
                 continue
             elif not prev_node_msg_id and not prev_user_msg_id and prev_text == last_msg_text_or_none:
                 # значит сообщение отправлено ботом и оставлено непрочитанным - просто обновляем инфу
                 self.runner_last_messages[chat_id] = [node_msg_id, user_msg_id, last_msg_text_or_none]
                 continue
-            unread = True if "unread" in chat.get("class") else False
-
-            chat_with = chat.find("div", {"class": "media-user-name"}).text
-            chat_obj = types.ChatShortcut(chat_id, chat_with, last_msg_text, node_msg_id,
-                                          user_msg_id, unread, str(chat))
+            chat_obj = types.ChatShortcut(chat_id, chat.name, last_msg_text, node_msg_id,
+                                          user_msg_id, chat.unread, chat.html)
             if last_msg_text_or_none is not None:
                 chat_obj.last_by_bot = by_bot
                 chat_obj.last_by_vertex = by_vertex
@@ -226,6 +409,9 @@ class Runner:
             else:
                 lcmc_events.append(LastChatMessageChangedEvent(self.__last_msg_event_tag, chat_obj))
 
+        for chat_id, fingerprint in fingerprints.items():
+            self.__chat_fingerprints[chat_id] = (fingerprint, self.runner_last_messages.get(chat_id))
+
         # Если есть события изменения чатов, значит это не первый запрос и ChatsListChangedEvent будет первым событием
         if lcmc_events:
             events.append(ChatsListChangedEvent(self.__last_msg_event_tag))
@@ -237,7 +423,7 @@ class Runner:
         lcmc_events_without_new_mess = []
         lcmc_events_with_new_mess = []
         for lcmc_event in lcmc_events:
-            if lcmc_event.chat.node_msg_id <= self.last_messages_ids.get(lcmc_event.chat.id, -1):
+            if lcmc_event.chat.node_msg_id <= self.last_messages_ids.get(lcmc_event.chat.id, self.__evicted_msg_id):
                 lcmc_events_without_new_mess.append(lcmc_event)
             else:
                 lcmc_events_with_new_mess.append(lcmc_event)
@@ -251,30 +437,44 @@ class Runner:
                                                                      i.chat.id in self.account.interlocutor_ids])
 
         while lcmc_events_with_new_mess or len(self.__interlocutor_ids) >= self.runner_len - 2:
-            chats_pack = lcmc_events_with_new_mess[:self.runner_len]
-            del lcmc_events_with_new_mess[:self.runner_len]
-            bv_pack = []
-            while self.make_buyer_viewing_requests and \
-                    len(chats_pack) + len(bv_pack) < self.runner_len and self.__interlocutor_ids:
-                interlocutor_id = self.__interlocutor_ids.pop()
-                if interlocutor_id not in self.buyers_viewing:
-                    bv_pack.append(interlocutor_id)
-
-            chats_data = {i.chat.id: i.chat.name for i in chats_pack}
-            new_msg_events = self.generate_new_message_events(chats_data, bv_pack)
-
-            if self.make_buyer_viewing_requests:
-                # Если раньше айди не знали, то добавляем
-                for chat_id, msgs in new_msg_events.items():
-                    if chat_id not in self.account.interlocutor_ids and msgs and msgs[0].message.interlocutor_id:
-                        self.account.interlocutor_ids[chat_id] = msgs[0].message.interlocutor_id
-                        self.__interlocutor_ids.add(msgs[0].message.interlocutor_id)
-
-            # [LastChatMessageChanged, NewMSG, NewMSG ..., LastChatMessageChanged, NewMSG, NewMSG ...]
-            for i in chats_pack:
-                events.append(i)
-                if new_msg_events.get(i.chat.id):
-                    events.extend(new_msg_events[i.chat.id])
+            # Делим изменившиеся чаты на пачки по runner_len и получаем их истории одновременно
+            packs = []
+            while lcmc_events_with_new_mess or len(self.__interlocutor_ids) >= self.runner_len - 2:
+                chats_pack = lcmc_events_with_new_mess[:self.runner_len]
+                del lcmc_events_with_new_mess[:self.runner_len]
+                bv_pack = []
+                while self.make_buyer_viewing_requests and \
+                        len(chats_pack) + len(bv_pack) < self.runner_len and self.__interlocutor_ids:
+                    interlocutor_id = self.__interlocutor_ids.pop()
+                    if interlocutor_id not in self.buyers_viewing:
+                        bv_pack.append(interlocutor_id)
+                packs.append((chats_pack, {i.chat.id: i.chat.name for i in chats_pack}, bv_pack))
+
+            if len(packs) == 1:
+                histories = [(yield from self._get_chats_histories_flow(packs[0][1], packs[0][2]))]
+            else:
+                histories = yield Parallel([self._get_chats_histories_flow(chats_data, bv_pack)
+                                            for _, chats_data, bv_pack in packs], self.max_parallel_chat_requests)
+
+            # Результаты обрабатываем последовательно в порядке пачек, поэтому порядок событий не зависит от того,
+            # какой запрос завершился первым
+            for (chats_pack, _, _), (chats, buyers_viewing) in zip(packs, histories):
+                for bv in buyers_viewing:
+                    self.buyers_viewing[bv.buyer_id] = bv
+                new_msg_events = self._make_new_message_events(chats)
+
+                if self.make_buyer_viewing_requests:
+                    # Если раньше айди не знали, то добавляем
+                    for chat_id, msgs in new_msg_events.items():
+                        if chat_id not in self.account.interlocutor_ids and msgs and msgs[0].message.interlocutor_id:
+                            self.account.interlocutor_ids[chat_id] = msgs[0].message.interlocutor_id
+                            self.__interlocutor_ids.add(msgs[0].message.interlocutor_id)
+
+                # [LastChatMessageChanged, NewMSG, NewMSG ..., LastChatMessageChanged, NewMSG, NewMSG ...]
+                for i in chats_pack:
+                    events.append(i)
+                    if new_msg_events.get(i.chat.id):
+                        events.extend(new_msg_events[i.chat.id])
         return events
 
     def generate_new_message_events(self, chats_data: dict[int, str],
@@ -290,22 +490,50 @@ class Runner:
         :return: словарь с событиями новых сообщений в формате {ID чата: [список событий]}
         :rtype: :obj:`dict` {:obj:`int`: :obj:`list` of :class:`FunPayAPI.updater.events.NewMessageEvent`}
         """
+        return self.account.run_flow(self._generate_new_message_events_flow(chats_data, interlocutor_ids))
+
+    def _generate_new_message_events_flow(self, chats_data: dict[int, str], interlocutor_ids: list[int] | None = None) \
+            -> Generator[Request | float, Any, dict[int, list[NewMessageEvent]]]:
+        """Сценарий запросов :meth:`FunPayAPI.updater.runner.Runner.generate_new_message_events`."""
+        chats, buyers_viewing = yield from self._get_chats_histories_flow(chats_data, interlocutor_ids)
+        for bv in buyers_viewing:
+            self.buyers_viewing[bv.buyer_id] = bv
+        return self._make_new_message_events(chats)
+
+    def _get_chats_histories_flow(self, chats_data: dict[int, str], interlocutor_ids: list[int] | None = None) \
+            -> Generator[Request | float, Any, tuple[dict[int, list[types.Message]], list[types.BuyerViewing]]]:
+        """
+        Сценарий запросов: получает истории чатов и информацию о том, какие лоты смотрят собеседники (до 3 попыток).
+        Не изменяет состояние Runner'а и аккаунта, поэтому несколько таких сценариев можно выполнять одновременно:
+        полученные :class:`FunPayAPI.types.BuyerViewing` записывает в buyers_viewing вызывающий сценарий.
+
+        :return: истории чатов ({ID чата: [сообщения]}) и список :class:`FunPayAPI.types.BuyerViewing`
+            или пустые словарь и список, если получить их не удалось.
+        """
         attempts = 3
         while attempts:
             attempts -= 1
             try:
-                chats = self.account.get_chats_histories(chats_data, interlocutor_ids)
-                break
+                return (yield from self.account._get_chats_histories_and_viewing_flow(chats_data, interlocutor_ids))
             except exceptions.RequestFailedError as e:
                 logger.error(e)
             except:
                 logger.error(f"Не удалось получить истории чатов {list(chats_data.keys())}.")
                 logger.debug("TRACEBACK", exc_info=True)
-            time.sleep(1)
-        else:
-            logger.error(f"Не удалось получить истории чатов {list(chats_data.keys())}: превышено кол-во попыток.")
-            return {}
+            yield 1
+        logger.error(f"Не удалось получить истории чатов {list(chats_data.keys())}: превышено кол-во попыток.")
+        return {}, []
+
+    def _make_new_message_events(self, chats: dict[int, list[types.Message]]) -> dict[int, list[NewMessageEvent]]:
+        """
+        Генерирует события новых сообщений по историям чатов и обновляет ID последних сообщений.
 
+        :param chats: истории чатов ({ID чата: [сообщения]}).
+        :type chats: :obj:`dict` {:obj:`int`: :obj:`list` of :class:`FunPayAPI.types.Message`}
+
+        :return: словарь с событиями новых сообщений в формате {ID чата: [список событий]}
+        :rtype: :obj:`dict` {:obj:`int`: :obj:`list` of :class:`FunPayAPI.updater.events.NewMessageEvent`}
+        """
         result = {}
 
         for cid in chats:
@@ -327,10 +555,10 @@ class Runner:
 
             stack = MessageEventsStack()
 
-            # Если нет сохраненного ID последнего сообщения
+            # Если нет сохраненного ID последнего сообщения (в т.ч. чат вытеснен из памяти)
             if not self.last_messages_ids.get(cid):
-                messages = [m for m in messages if
-                            m.id > min(self.last_messages_ids.values(), default=10 ** 20)] or messages[-1:]
+                min_id = max(min(self.last_messages_ids.values(), default=10 ** 20), self.__evicted_msg_id)
+                messages = [m for m in messages if m.id > min_id] or messages[-1:]
 
             self.last_messages_ids[cid] = messages[-1].id  # Перезаписываем ID последнего сообщение
             self.by_bot_ids[cid] = [i for i in self.by_bot_ids[cid] if i > self.last_messages_ids[cid]]  # чистим память
@@ -356,6 +584,10 @@ class Runner:
             :class:`FunPayAPI.updater.events.NewOrderEvent`,
             :class:`FunPayAPI.updater.events.OrderStatusChangedEvent`
         """
+        return self.account.run_flow(self._parse_order_updates_flow(obj))
+
+    def _parse_order_updates_flow(self, obj) -> Generator[Request | float, Any, list[BaseEvent]]:
+        """Сценарий запросов :meth:`FunPayAPI.updater.runner.Runner.parse_order_updates`."""
         events = []
         self.__last_order_event_tag = obj.get("tag")
         if not self.__first_request:
@@ -364,37 +596,104 @@ class Runner:
         if not self.make_order_requests:
             return events
 
+        # Счетчик незавершенных (оплаченных) продаж, если он совпадает с кол-вом известных оплаченных заказов,
+        # то изменились только новые заказы вверху списка.
+        sales_counter = obj["data"].get("seller") if isinstance(obj.get("data"), dict) else None
+        incremental = self.incremental_orders and self.__orders_initialized
+        stop_at = self.order_statuses if incremental else None
+        start_from, pages = None, 0
+        reached_known = False  # новые заказы появляются вверху списка, неизвестные заказы ниже известных - старые
+        while True:
+            orders_list = yield from self._get_sales_page_flow(start_from, stop_at)
+            if orders_list is None:
+                break
+            pages += 1
+            for order in orders_list[1]:
+                self.saved_orders[order.id] = order
+                prev_status = self.order_statuses.get(order.id)
+                self.order_statuses[order.id] = order.status
+                if prev_status is None:
+                    if reached_known:
+                        continue
+                    if not self.__orders_initialized:
+                        events.append(InitialOrderEvent(self.__last_order_event_tag, order))
+                    else:
+                        events.append(NewOrderEvent(self.__last_order_event_tag, order))
+                        if order.status == types.OrderStatuses.CLOSED:
+                            events.append(OrderStatusChangedEvent(self.__last_order_event_tag, order))
+
+                else:
+                    reached_known = True
+                    if order.status != prev_status:
+                        events.append(OrderStatusChangedEvent(self.__last_order_event_tag, order))
+            self.__orders_initialized = True
+
+            if not incremental or sales_counter is None or pages >= self.max_order_pages:
+                break
+            paid = sum(1 for status in self.order_statuses.values() if status == types.OrderStatuses.PAID)
+            if paid == int(sales_counter):
+                break
+            if not orders_list[0]:
+                break
+            # Изменился статус заказа ниже уже разобранных - продолжаем с места остановки без stop_at
+            start_from, stop_at = orders_list[0], None
+            reached_known = reached_known or start_from in self.order_statuses
+        return events
+
+    def _get_sales_page_flow(self, start_from: str | None = None,
+                             stop_at: dict[str, types.OrderStatuses] | None = None) \
+            -> Generator[Request | float, Any, tuple[str | None, list[types.OrderShortcut]] | None]:
+        """
+        Сценарий запросов: получает страницу списка продаж (до 3 попыток).
+
+        :return: (ID след. заказа, список заказов) или :obj:`None`, если получить список не удалось.
+        """
         attempts = 3
         while attempts:
             attempts -= 1
             try:
-                orders_list = self.account.get_sales()  # todo добавить возможность реакции на подтверждение очень старых заказов
-                break
+                result = yield from self.account._get_sales_flow(start_from, stop_at=stop_at)
+                return result[0], result[1]
             except exceptions.RequestFailedError as e:
                 logger.error(e)
             except:
                 logger.error("Не удалось обновить список заказов.")
                 logger.debug("TRACEBACK", exc_info=True)
-            time.sleep(1)
-        else:
-            logger.error("Не удалось обновить список продаж: превышено кол-во попыток.")
-            return events
+            yield 1
+        logger.error("Не удалось обновить список продаж: превышено кол-во попыток.")
+        return None
 
-        saved_orders = {}
-        for order in orders_list[1]:
-            saved_orders[order.id] = order
-            if order.id not in self.saved_orders:
-                if self.__first_request:
-                    events.append(InitialOrderEvent(self.__last_order_event_tag, order))
-                else:
-                    events.append(NewOrderEvent(self.__last_order_event_tag, order))
-                    if order.status == types.OrderStatuses.CLOSED:
-                        events.append(OrderStatusChangedEvent(self.__last_order_event_tag, order))
+    def get_next_delay(self, requests_delay: int | float, events: list[BaseEvent], failed: bool = False) -> float:
+        """
+        Вычисляет задержку перед следующим запросом :meth:`FunPayAPI.updater.runner.Runner.listen`.
 
-            elif order.status != self.saved_orders[order.id].status:
-                events.append(OrderStatusChangedEvent(self.__last_order_event_tag, order))
-        self.saved_orders = saved_orders
-        return events
+        :param requests_delay: задержка, переданная в listen (используется, если адаптивный режим выключен,
+            и как начальное значение в адаптивном режиме).
+        :type requests_delay: :obj:`int` or :obj:`float`
+
+        :param events: события, полученные на текущей итерации (в т.ч. отложенные).
+        :type events: :obj:`list` of :class:`FunPayAPI.updater.events.BaseEvent`
+
+        :param failed: завершилась ли итерация ошибкой / ответом 429?
+        :type failed: :obj:`bool`, опционально
+
+        :return: задержка (в секундах).
+        :rtype: :obj:`float`
+        """
+        if not self.adaptive_delay:
+            return requests_delay
+        now = time.time()
+        delay = self.__current_delay or requests_delay
+        if failed:
+            delay = max(delay, requests_delay) * self.backoff_factor
+        else:
+            if any(event.type in (EventTypes.NEW_MESSAGE, EventTypes.NEW_ORDER, EventTypes.ORDER_STATUS_CHANGED,
+                                  EventTypes.LAST_CHAT_MESSAGE_CHANGED) for event in events):
+                self.__last_activity = now
+            # покупатель активен (идет переписка / оплата) - опрашиваем чаще, иначе - реже
+            delay = self.min_delay if now - self.__last_activity < self.active_period else delay * self.backoff_factor
+        self.__current_delay = min(max(delay, self.min_delay), self.max_delay)
+        return self.__current_delay
 
     def update_last_message(self, chat_id: int, message_id: int, message_text: str | None):
         """
@@ -434,7 +733,8 @@ class Runner:
         """
         Бесконечно отправляет запросы для получения новых событий.
 
-        :param requests_delay: задержка между запросами (в секундах).
+        :param requests_delay: задержка между запросами (в секундах). В адаптивном режиме
+            (:py:obj:`FunPayAPI.updater.runner.Runner.adaptive_delay`) - начальная задержка.
         :type requests_delay: :obj:`int` or :obj:`float`, опционально
 
         :param ignore_exceptions: игнорировать ошибки?
@@ -449,31 +749,86 @@ class Runner:
             :class:`FunPayAPI.updater.events.NewOrderEvent`,
             :class:`FunPayAPI.updater.events.OrderStatusChangedEvent`
         """
+        if inspect.iscoroutinefunction(self.account.run_flow):
+            raise TypeError("Для асинхронного аккаунта используйте Runner.listen_async().")
         events = []
         while True:
+            ready_events, failed, last_429_err_time = [], False, self.account.last_429_err_time
             try:
-                self.__interlocutor_ids = set([event.message.interlocutor_id for event in events
-                                               if event.type == EventTypes.NEW_MESSAGE])
-                updates = self.get_updates()
-                events.extend(self.parse_updates(updates))
-                next_events = []
-                for event in events:
-                    if self.make_msg_requests and self.make_buyer_viewing_requests \
-                            and event.type == EventTypes.NEW_MESSAGE \
-                            and event.message.interlocutor_id is not None:
-                        event.message.buyer_viewing = self.buyers_viewing.get(event.message.interlocutor_id)
-                        if event.message.buyer_viewing is None:
-                            next_events.append(event)
-                            continue
+                ready_events, events = self.account.run_flow(self._listen_iteration_flow(events))
+                for event in ready_events:
+                    yield event
+                # сохраняем после обработки событий: при падении во время обработки они будут выданы повторно
+                self.save_checkpoint()
+            except Exception as e:
+                failed = True
+                if not ignore_exceptions:
+                    raise e
+                else:
+                    logger.error("Произошла ошибка при получении событий. "
+                                 "(ничего страшного, если это сообщение появляется нечасто).")
+                    logger.debug("TRACEBACK", exc_info=True)
+            failed = failed or self.account.last_429_err_time != last_429_err_time
+            time.sleep(self.get_next_delay(requests_delay, ready_events + events, failed))
+
+    async def listen_async(self, requests_delay: int | float = 6.0,
+                           ignore_exceptions: bool = True) -> AsyncGenerator[BaseEvent, None]:
+        """
+        Асинхронная версия :meth:`FunPayAPI.updater.runner.Runner.listen`.
+        Доступна только для Runner'а, привязанного к :class:`FunPayAPI.async_account.AsyncAccount`.
+
+        :param requests_delay: задержка между запросами (в секундах).
+        :type requests_delay: :obj:`int` or :obj:`float`, опционально
 
+        :param ignore_exceptions: игнорировать ошибки?
+        :type ignore_exceptions: :obj:`bool`, опционально
+
+        :return: асинхронный генератор событий FunPay.
+        :rtype: :obj:`AsyncGenerator` of :class:`FunPayAPI.updater.events.BaseEvent`
+        """
+        if not inspect.iscoroutinefunction(self.account.run_flow):
+            raise TypeError("Runner.listen_async() доступен только для FunPayAPI.async_account.AsyncAccount.")
+        events = []
+        while True:
+            ready_events, failed, last_429_err_time = [], False, self.account.last_429_err_time
+            try:
+                ready_events, events = await self.account.run_flow(self._listen_iteration_flow(events))
+                for event in ready_events:
                     yield event
-                events = next_events
-                self.buyers_viewing = {}
+                self.save_checkpoint()
             except Exception as e:
+                failed = True
                 if not ignore_exceptions:
                     raise e
                 else:
                     logger.error("Произошла ошибка при получении событий. "
                                  "(ничего страшного, если это сообщение появляется нечасто).")
                     logger.debug("TRACEBACK", exc_info=True)
-            time.sleep(requests_delay)
+            failed = failed or self.account.last_429_err_time != last_429_err_time
+            await asyncio.sleep(self.get_next_delay(requests_delay, ready_events + events, failed))
+
+    def _listen_iteration_flow(self, events: list[BaseEvent]) \
+            -> Generator[Request | float, Any, tuple[list[BaseEvent], list[BaseEvent]]]:
+        """
+        Сценарий запросов одной итерации :meth:`FunPayAPI.updater.runner.Runner.listen`.
+
+        :param events: события, отложенные на предыдущей итерации (ожидают поле "Покупатель смотрит").
+
+        :return: (события, готовые к выдаче, события, отложенные до следующей итерации)
+        """
+        self.__interlocutor_ids = set([event.message.interlocutor_id for event in events
+                                       if event.type == EventTypes.NEW_MESSAGE])
+        updates = yield from self._get_updates_flow()
+        events = events + (yield from self._parse_updates_flow(updates))
+        ready_events, next_events = [], []
+        for event in events:
+            if self.make_msg_requests and self.make_buyer_viewing_requests \
+                    and event.type == EventTypes.NEW_MESSAGE \
+                    and event.message.interlocutor_id is not None:
+                event.message.buyer_viewing = self.buyers_viewing.get(event.message.interlocutor_id)
+                if event.message.buyer_viewing is None:
+                    next_events.append(event)
+                    continue
+            ready_events.append(event)
+        self.buyers_viewing.clear()
+        return ready_events, next_events
@@ -0,0 +1,219 @@
+# bench_parsers.py
+# Бенчмарк парсинга страниц FunPay на фикстурах fixtures/funpay (см. funpay_offline.py): 50 чатов в списке,
+# 100 заказов на странице продаж, 200 лотов в профиле, 100 сообщений в истории.
+# Сценарии запросов выполняются без сети: вместо ответа FunPay в генератор отправляется ответ из фикстуры,
+# поэтому измеряется только разбор ответа. Для каждой функции выводятся пропускная способность (вызовов/сек)
+# и пиковый объем памяти одного вызова (tracemalloc).
+# Результат сравнивается с bench_baseline.json: скорость нормируется по калибровочной нагрузке (разные машины),
+# при замедлении больше чем на --time-tolerance или росте памяти больше чем на --memory-tolerance - код 1.
+# Перед замерами быстрый парсер списка чатов (utils.parse_contact_items) сверяется с BeautifulSoup на фикстуре
+# и на граничных случаях разметки; при расхождении - код 1.
+# Запуск: python bench_parsers.py [--update-baseline] [--only get_sales ...]
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import requests
+from bs4 import BeautifulSoup
+
+from FunPayAPI.account import Account, Request
+from FunPayAPI.common import utils
+from FunPayAPI.updater.runner import Runner
+from funpay_offline import DEFAULT_FIXTURES_DIR, DEMO_USER_ID, FixtureStore
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+
+def fixture_response(store, key):
+    """Ответ (requests.Response) из фикстуры для ключа запроса."""
+    store.reset()
+    status, content_type, body = store.next(key)
+    response = requests.Response()
+    response.status_code = status
+    response.headers["Content-Type"] = content_type
+    response._content = body
+    response.encoding = "utf-8"
+    return response
+
+
+def run_offline(flow, response):
+    """Выполняет сценарий запросов, отвечая на каждый запрос переданным ответом."""
+    step = next(flow)
+    try:
+        while True:
+            step = flow.send(response if isinstance(step, Request) else None)
+    except StopIteration as e:
+        return e.value
+
+
+def make_cases(store):
+    account = Account("offline-golden-key")
+    main_page = fixture_response(store, "GET /")
+    run_offline(account._get_flow(), main_page)
+    runner = Runner(account, disable_message_requests=True, disabled_order_requests=True)
+
+    responses = {key: fixture_response(store, key) for key in (
+        "GET /users/*/", "GET /orders/trade", "GET /lots/offerEdit", "GET /chat/history", "POST /runner/ chat_bookmarks")}
+    bookmarks = responses["POST /runner/ chat_bookmarks"].json()["objects"][0]
+
+    def parse_chat_updates():
+        # каждый раз разбираем список как первый: все 50 чатов новые
+        runner.runner_last_messages.clear()
+        runner._Runner__first_request = True
+        return runner.parse_chat_updates(bookmarks)
+
+    steady_account = Account("offline-golden-key")
+    run_offline(steady_account._get_flow(), main_page)
+    steady_runner = Runner(steady_account, disable_message_requests=True, disabled_order_requests=True)
+    steady_runner.parse_chat_updates(bookmarks)
+
+    return {
+        "get": lambda: run_offline(account._get_flow(), main_page),
+        "get_user": lambda: run_offline(account._get_user_flow(DEMO_USER_ID), responses["GET /users/*/"]),
+        "get_sales": lambda: run_offline(account._get_sales_flow(), responses["GET /orders/trade"]),
+        "get_lot_fields": lambda: run_offline(account._get_lot_fields_flow(3000000), responses["GET /lots/offerEdit"]),
+        "parse_messages": lambda: run_offline(account._get_chat_history_flow(100001), responses["GET /chat/history"]),
+        "request_chats": lambda: run_offline(account._request_chats_flow(), responses["POST /runner/ chat_bookmarks"]),
+        "parse_chat_updates": parse_chat_updates,
+        # повторный опрос без изменений в списке чатов
+        "parse_chat_updates_unchanged": lambda: steady_runner.parse_chat_updates(bookmarks),
+    }
+
+
+# Граничные случаи разметки списка чатов для сверки парсеров
+CONTACT_ITEMS_EDGE_CASES = [
+    "",
+    '<a class="contact-item" data-id="1" data-node-msg="5" data-user-msg="5"></a>',
+    '<a class=" contact-item  unread " data-id="2" data-node-msg="7" data-user-msg="6">'
+    '<div class="media-user-name">user &amp; <b>co</b></div>'
+    '<div class="contact-item-message">привет<br><!-- комментарий -->&lt;мир&gt; \u2061 бот</div></a>'
+    '<a class="contact-item-photo" data-id="x"></a>',
+    '<div class="contact-list"><a class="contact-item" data-id="3" data-node-msg="0" data-user-msg="0">'
+    '<div class="contact-item-message">Изображение</div><div class="media-user-name">a</div>'
+    '<div class="contact-item-message">второй</div></a><p>незакрытый',
+]
+
+
+def check_contact_items(store):
+    """Сверяет быстрый парсер списка чатов с BeautifulSoup. Возвращает список расхождений."""
+    bookmarks = fixture_response(store, "POST /runner/ chat_bookmarks").json()["objects"][0]["data"]["html"]
+    mismatches = []
+    for n, html in enumerate([bookmarks] + CONTACT_ITEMS_EDGE_CASES):
+        fast, reference = utils.parse_contact_items(html), utils.parse_contact_items(html, fast=False)
+        if len(fast) != len(reference):
+            mismatches.append(f"фрагмент {n}: {len(fast)} чатов вместо {len(reference)}")
+            continue
+        for a, b in zip(fast, reference):
+            fields_a = (a.id, a.name, a.last_message_text, a.node_msg_id, a.user_msg_id, a.unread)
+            fields_b = (b.id, b.name, b.last_message_text, b.node_msg_id, b.user_msg_id, b.unread)
+            if fields_a != fields_b:
+                mismatches.append(f"фрагмент {n}: {fields_a} != {fields_b}")
+            # HTML сравнивается как дерево: порядок атрибутов у сериализаторов разный
+            elif BeautifulSoup(a.html, "lxml").a != BeautifulSoup(b.html, "lxml").a:
+                mismatches.append(f"фрагмент {n}, чат {a.id}: HTML виджета отличается")
+    return mismatches
+
+
+def calibrate():
+    """Время (сек) фиксированной нагрузки на чистом Python - для сравнения результатов разных машин."""
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        sum(i * i % 7 for i in range(300000))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(func, min_time=0.5, repeats=5):
+    """Возвращает (вызовов/сек - лучший из repeats прогонов, пиковая память одного вызова в КиБ)."""
+    func()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeats:
+            break
+        loops *= 2
+    best = elapsed / loops
+    for _ in range(repeats - 1):
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        best = min(best, (time.perf_counter() - start) / loops)
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return 1 / best, peak / 1024
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Бенчмарк парсинга страниц FunPay.")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true", help="сохранить результаты как новый baseline")
+    parser.add_argument("--only", nargs="*", help="запустить только перечисленные функции")
+    parser.add_argument("--min-time", type=float, default=0.5, help="минимальное время замера одной функции (сек)")
+    parser.add_argument("--time-tolerance", type=float, default=0.4,
+                        help="допустимое замедление (замеры на общих машинах шумят на 20-30%%)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    store = FixtureStore(args.fixtures)
+    if mismatches := check_contact_items(store):
+        for mismatch in mismatches:
+            print(f"РАСХОЖДЕНИЕ parse_contact_items: {mismatch}")
+        return 1
+    cases = make_cases(store)
+    if args.only:
+        cases = {name: func for name, func in cases.items() if name in args.only}
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    measured, calibration = {}, float("inf")
+    for name, func in cases.items():
+        # калибруем перед каждой функцией: берется лучший результат за весь прогон
+        calibration = min(calibration, calibrate())
+        measured[name] = measure(func, args.min_time)
+    # Во сколько раз эта машина медленнее машины, на которой снят baseline
+    scale = calibration / baseline["calibration"] if baseline.get("calibration") else 1
+
+    results, failures = {}, []
+    print(f"{'функция':<30}{'вызовов/сек':>14}{'мс/вызов':>11}{'пик КиБ':>10}{'baseline/сек':>15}{'изм.':>8}")
+    for name, (ops, peak) in measured.items():
+        results[name] = {"ops_per_sec": round(ops, 2), "peak_kib": round(peak, 1)}
+        line = f"{name:<30}{ops:>14.1f}{1000 / ops:>11.3f}{peak:>10.1f}"
+        if base := baseline.get("functions", {}).get(name):
+            expected = base["ops_per_sec"] / scale
+            change = ops / expected - 1
+            line += f"{expected:>15.1f}{change:>+8.0%}"
+            if change < -args.time_tolerance:
+                failures.append(f"{name}: медленнее baseline на {-change:.0%}")
+            if peak > base["peak_kib"] * (1 + args.memory_tolerance):
+                failures.append(f"{name}: пик памяти {peak:.0f} КиБ > {base['peak_kib']:.0f} КиБ в baseline")
+        print(line)
+
+    if args.update_baseline:
+        functions = dict(baseline.get("functions", {}), **results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"calibration": round(calibration, 5), "functions": functions}, f, ensure_ascii=False,
+                      indent=2, sort_keys=True)
+        print(f"Baseline сохранен в {args.baseline}.")
+        return 0
+    for failure in failures:
+        print(f"РЕГРЕССИЯ {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
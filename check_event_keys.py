@@ -0,0 +1,47 @@
+# check_event_keys.py
+# Проверка ключей очередности EventDispatcher (bot_handler._event_key): заказ и сообщения одного покупателя
+# должны попадать в одну очередь, иначе команда из чата может обрабатываться одновременно с выдачей аккаунта
+# по заказу. Заказы и сообщения берутся из фикстур fixtures/funpay (разбираются теми же сценариями, что и в Runner).
+# При расхождении ключей - код 1. Запуск: python check_event_keys.py
+import sys
+
+from FunPayAPI.account import Account
+from FunPayAPI.updater.events import NewMessageEvent, NewOrderEvent
+from bench_parsers import fixture_response, run_offline
+from bot_handler import _event_key
+from funpay_offline import DEFAULT_FIXTURES_DIR, FixtureStore
+
+
+def main():
+    store = FixtureStore(DEFAULT_FIXTURES_DIR)
+    account = Account("offline-golden-key")
+    run_offline(account._get_flow(), fixture_response(store, "GET /"))
+
+    _, orders, _, _ = run_offline(account._get_sales_flow(), fixture_response(store, "GET /orders/trade"))
+    chat_node = fixture_response(store, "POST /runner/ chat_node")
+    chats_data = {i["id"]: None for i in chat_node.json()["objects"]}
+    histories = run_offline(account._get_chats_histories_flow(chats_data), chat_node)
+
+    failures, checked = [], 0
+    orders_by_buyer = {order.buyer_id: order for order in orders}
+    for chat_id, messages in histories.items():
+        for message in messages:
+            if (order := orders_by_buyer.get(message.interlocutor_id)) is None:
+                continue
+            checked += 1
+            order_key = _event_key(NewOrderEvent("", order))
+            message_key = _event_key(NewMessageEvent("", message))
+            if order_key != message_key:
+                failures.append(f"заказ {order.id} ({order_key}) и сообщение {message.id} в чате {chat_id} "
+                                f"({message_key}) одного покупателя")
+    for failure in failures:
+        print(f"РАЗНЫЕ КЛЮЧИ: {failure}")
+    if not checked:
+        print("В фикстурах нет заказа и сообщения одного покупателя - проверять нечего.")
+        return 1
+    print(f"Проверено пар заказ / сообщение: {checked}.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
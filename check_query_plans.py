@@ -0,0 +1,81 @@
+# check_query_plans.py
+# Проверка индексов: прогоняет EXPLAIN QUERY PLAN для всех SQL-запросов из модулей (по умолчанию db_handler.py)
+# на пустой БД с актуальной схемой и завершается с кодом 1, если какой-либо запрос полностью сканирует
+# растущие таблицы (rentals, accounts). Запуск: python check_query_plans.py [модуль.py ...]
+import ast
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+
+import config
+
+# Таблицы, размер которых не ограничен; маленькие справочники (games) сканировать допустимо
+CHECKED_TABLES = {"rentals", "accounts"}
+SQL_RE = re.compile(r"^\s*(SELECT|UPDATE|DELETE|INSERT)\b", re.IGNORECASE)
+# "SCAN rentals" / "SCAN r" - полный проход по таблице; "SCAN ... USING [COVERING] INDEX" - проход по индексу
+FULL_SCAN_RE = re.compile(r"^SCAN (\w+)(?: AS (\w+))?$")
+
+
+def collect_queries(path):
+    """
+    Возвращает [(номер строки, SQL)] для всех строковых литералов модуля, похожих на SQL-запросы.
+    Запросы разовых миграций (функции _migrate_*) пропускаются: они читают таблицы целиком намеренно.
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    skipped = {id(node) for func in ast.walk(tree)
+               if isinstance(func, ast.FunctionDef) and func.name.startswith("_migrate")
+               for node in ast.walk(func)}
+    return [(node.lineno, node.value) for node in ast.walk(tree)
+            if isinstance(node, ast.Constant) and isinstance(node.value, str) and SQL_RE.match(node.value)
+            and id(node) not in skipped]
+
+
+def table_aliases(query):
+    """{псевдоним или имя: таблица} для таблиц из FROM / JOIN / UPDATE / INTO."""
+    aliases = {}
+    for table, alias in re.findall(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", query, re.IGNORECASE):
+        aliases[table] = table
+        if alias and alias.upper() not in ("WHERE", "SET", "ON", "JOIN", "LEFT", "INNER", "GROUP", "ORDER", "LIMIT",
+                                           "VALUES"):
+            aliases[alias] = table
+    return aliases
+
+
+def main(paths):
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    config.DB_FILE = db_path
+    import db_handler  # импорт после подмены config.DB_FILE
+    from database import get_connection, close_all_connections
+
+    failures = 0
+    try:
+        db_handler.initialize_and_update_db()
+        conn = get_connection()
+        for path in paths:
+            for lineno, query in collect_queries(path):
+                try:
+                    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, (None,) * query.count("?"))]
+                except sqlite3.OperationalError as e:
+                    # Например, запросы миграций к устаревшим колонкам, которых нет в актуальной схеме
+                    print(f"{path}:{lineno}: пропущен ({e})")
+                    continue
+                aliases = table_aliases(query)
+                scanned = {aliases.get(m.group(2) or m.group(1), m.group(1))
+                           for m in map(FULL_SCAN_RE.match, plan) if m}
+                if bad := scanned & CHECKED_TABLES:
+                    failures += 1
+                    print(f"{path}:{lineno}: полное сканирование {', '.join(sorted(bad))}\n"
+                          f"    {' '.join(query.split())}\n    план: {plan}")
+    finally:
+        close_all_connections()
+        os.remove(db_path)
+    print(f"Проверено модулей: {len(paths)}, запросов с полным сканированием: {failures}.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:] or ["db_handler.py"]))
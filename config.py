@@ -13,11 +13,15 @@ else:
 
 DB_FILE = os.path.join(SAVE_FOLDER, "rentals.db")
 LOG_FILE = os.path.join(SAVE_FOLDER, 'rentals_app.log')
+# Контрольная точка Runner'а FunPay. Отдельный файл: rentals.db синхронизируется с GUI через SFTP и может быть перезаписан
+RUNNER_CHECKPOINT_FILE = os.path.join(SAVE_FOLDER, "runner_state.db")
 
 
 # --- НАСТРОЙКИ СЕРВЕРНОГО БОТА ---
 GOLDEN_KEY = os.getenv("GOLDEN_KEY")
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+# Адрес FunPay. Для запуска без сети: python funpay_offline.py serve и FUNPAY_BASE_URL=http://127.0.0.1:8800
+FUNPAY_BASE_URL = os.getenv("FUNPAY_BASE_URL", "https://funpay.com")
 
 # --- ДАННЫЕ ДЛЯ TELEGRAM ---
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -31,4 +35,16 @@ RENTAL_KEYWORDS = ['аренда', 'час', 'часа', 'часов', 'h', 'day
 # Использовать задержку перед повторной активацией лота после окончания аренды?
 USE_EXPIRATION_GRACE_PERIOD = True
 # Длительность задержки в минутах.
-EXPIRATION_GRACE_PERIOD_MINUTES = 10
\ No newline at end of file
+EXPIRATION_GRACE_PERIOD_MINUTES = 10
+# Как часто (в секундах) перечитывать с FunPay фактический статус лотов (для отлова ручных изменений).
+LOT_STATE_TTL_SECONDS = 15 * 60
+# Как часто (в секундах) планировщик сроков аренд полностью перечитывает аренды из БД (для изменений из GUI).
+RENTAL_SCHEDULER_RELOAD_SECONDS = 5 * 60
+# Количество потоков, обрабатывающих события FunPay (заказы и команды в чате).
+EVENT_WORKERS = 4
+# Адаптивная задержка опроса FunPay: после заказов / сообщений - RUNNER_MIN_DELAY секунд,
+# при простое и после ошибок задержка растет до RUNNER_MAX_DELAY секунд.
+RUNNER_MIN_DELAY = 1.5
+RUNNER_MAX_DELAY = 30.0
+# Сколько чатов FunPay (последние сообщения, собеседники) хранится в памяти: дольше всех не менявшиеся вытесняются.
+CHATS_CACHE_SIZE = 5000
\ No newline at end of file
@@ -2,6 +2,8 @@
 
 import sqlite3
 import logging
+import threading
+from contextlib import contextmanager
 from config import DB_FILE
 
 def init_database():
@@ -9,6 +11,10 @@ def init_database():
     try:
         with sqlite3.connect(DB_FILE) as conn:
             cursor = conn.cursor()
+            # Файл БД синхронизируется копированием по SFTP (main.download_db / upload_db), поэтому все
+            # закоммиченные данные должны быть в самом rentals.db: WAL (включался раньше) переводим обратно
+            # в журнал отката. Режим хранится в файле; если БД уже в этом режиме, блокировка не нужна.
+            cursor.execute("PRAGMA journal_mode = DELETE;")
             cursor.execute("PRAGMA foreign_keys = ON;")
             cursor.execute('''
                            CREATE TABLE IF NOT EXISTS games
@@ -20,30 +26,131 @@ def init_database():
                             game_id INTEGER NOT NULL, rented_by TEXT,
                             FOREIGN KEY (game_id) REFERENCES games (id) ON DELETE CASCADE)
                            ''')
+            # Время аренды хранится в секундах Unix (UTC), см. db_handler.to_timestamp / from_timestamp
             cursor.execute('''
                            CREATE TABLE IF NOT EXISTS rentals
                            (id TEXT PRIMARY KEY, client_name TEXT NOT NULL, account_id INTEGER, 
-                            start_time TEXT NOT NULL, end_time TEXT NOT NULL, remind_time TEXT NOT NULL,
+                            start_time INTEGER NOT NULL, end_time INTEGER NOT NULL, remind_time INTEGER NOT NULL,
                             initial_minutes INTEGER, info TEXT, reminded INTEGER DEFAULT 0, is_history INTEGER DEFAULT 0,
+                            funpay_chat_id TEXT, pre_reminded INTEGER DEFAULT 0,
                             FOREIGN KEY (account_id) REFERENCES accounts (id) ON DELETE SET NULL)
                            ''')
+            # Желаемое и последнее известное (на FunPay) состояние лотов, см. lot_reconciler.py
+            cursor.execute('''
+                           CREATE TABLE IF NOT EXISTS lot_states
+                           (offer_id INTEGER PRIMARY KEY, game_id INTEGER, desired_active INTEGER,
+                            observed_active INTEGER, observed_at REAL)
+                           ''')
+            # Привязка лотов FunPay к играм (лот принадлежит одной игре)
+            cursor.execute('''
+                           CREATE TABLE IF NOT EXISTS game_offers
+                           (offer_id INTEGER PRIMARY KEY, game_id INTEGER NOT NULL,
+                            FOREIGN KEY (game_id) REFERENCES games (id) ON DELETE CASCADE)
+                           ''')
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_game_offers_game_id ON game_offers (game_id)")
+            # Журнал обработанных заказов FunPay: повторно выданное событие заказа не приводит к повторной выдаче аккаунта.
+            # delivered_at - когда данные аккаунта отправлены покупателю (NULL - отправка не удалась и будет повторена)
+            cursor.execute('''
+                           CREATE TABLE IF NOT EXISTS processed_orders
+                           (order_id TEXT PRIMARY KEY, status TEXT NOT NULL, rental_id TEXT,
+                            processed_at INTEGER NOT NULL, delivered_at INTEGER)
+                           ''')
             conn.commit()
     except sqlite3.Error as e:
         logging.error(f"Failed to initialize database: {e}")
         # Мы логируем ошибку, а обработка (показ messagebox) будет в main.py
         raise e
 
-def db_query(query, params=(), fetch=None):
-    """Универсальная функция для выполнения запросов к БД."""
+# Пул соединений: у каждого потока (слушатель FunPay, проверщик, Telegram, GUI) одно долгоживущее соединение.
+# Соединение закрывает только поток-владелец: другой поток может быть посреди transaction().
+# Соединения завершившихся потоков (например, таймеров) закрываются сборщиком мусора.
+_local = threading.local()
+_generation_lock = threading.Lock()
+_generation = 0
+"""Увеличивается при close_all_connections(), после чего потоки переоткрывают свои соединения."""
+
+
+def _close_own_connection():
+    """Закрывает соединение текущего потока, если оно открыто и не находится в транзакции."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or conn.in_transaction:
+        return
+    _local.conn = None
     try:
-        with sqlite3.connect(DB_FILE) as conn:
-            cursor = conn.cursor()
-            cursor.execute("PRAGMA foreign_keys = ON;")
-            cursor.execute(query, params)
-            conn.commit()
-            if fetch == "one": return cursor.fetchone()
-            if fetch == "all": return cursor.fetchall()
-            return cursor
+        conn.close()
+    except sqlite3.Error as e:
+        logging.error(f"Failed to close DB connection: {e}")
+
+
+def get_connection():
+    """
+    Возвращает соединение текущего потока (открывает его при первом обращении).
+    После close_all_connections() старое соединение закрывается и открывается новое,
+    но не посреди транзакции: она завершается на том соединении, на котором началась.
+    """
+    if getattr(_local, "conn", None) is not None and _local.generation != _generation:
+        _close_own_connection()
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        # isolation_level=None - автокоммит: одиночные запросы (в т.ч. SELECT) не требуют commit(),
+        # а транзакции открываются явно в transaction()
+        conn = sqlite3.connect(DB_FILE, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA foreign_keys = ON;")
+        _local.conn, _local.generation = conn, _generation
+    return conn
+
+
+def close_all_connections():
+    """
+    Сбрасывает пул: соединение текущего потока закрывается сразу, остальные потоки закроют свои
+    и откроют новые при следующем обращении к БД.
+    Вызывается перед копированием / заменой файла БД (SFTP, резервная копия, восстановление).
+    """
+    global _generation
+    with _generation_lock:
+        _generation += 1
+    _close_own_connection()
+
+
+@contextmanager
+def transaction(immediate=True):
+    """
+    Открывает транзакцию на соединении текущего потока; коммитит при успешном выходе из блока,
+    откатывает при исключении. Вложенные вызовы (и db_query внутри блока) выполняются в рамках внешней транзакции.
+    immediate=True (BEGIN IMMEDIATE) сразу берет блокировку записи, поэтому параллельные транзакции
+    выполняются по очереди и не могут прочитать одну и ту же "свободную" строку.
+    """
+    conn = get_connection()
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def db_query(query, params=(), fetch=None, many=False):
+    """
+    Универсальная функция для выполнения запросов к БД. many=True - executemany (одной транзакцией).
+    Ошибка БД логируется и возвращается None, но внутри внешнего transaction() исключение пробрасывается,
+    чтобы транзакция откатилась, а не закоммитила часть изменений.
+    """
+    try:
+        conn = get_connection()
+        if many:
+            with transaction():
+                cursor = conn.executemany(query, params)
+        else:
+            cursor = conn.execute(query, params)
+        if fetch == "one": return cursor.fetchone()
+        if fetch == "all": return cursor.fetchall()
+        return cursor
     except sqlite3.Error as e:
         logging.error(f"DB Error: '{e}'\nQuery: '{query}'\nParams: '{params}'")
-        return None
\ No newline at end of file
+        if get_connection().in_transaction:
+            raise
+        return None
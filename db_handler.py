@@ -7,65 +7,206 @@ from datetime import timedelta
 import uuid
 import csv
 from config import DB_FILE
-from database import db_query, init_database
+from database import db_query, init_database, transaction
 
 # Устанавливаем часовой пояс, который будет использоваться во всем проекте
 MOSCOW_TZ = pytz.timezone('Europe/Moscow')
 
+# Подписчики на изменения аренд (например, планировщик сроков). Вызываются с ID измененной аренды.
+_rental_listeners = []
 
-def find_game_by_offer_id(offer_id: str):
+
+def add_rental_listener(callback):
+    _rental_listeners.append(callback)
+
+
+def _notify_rental_changed(rental_id):
+    for callback in _rental_listeners:
+        try:
+            callback(rental_id)
+        except Exception as e:
+            logging.error(f"[DB] Ошибка уведомления об изменении аренды {rental_id}: {e}")
+
+
+def find_game_by_offer_id(offer_id):
     """
     Находит игру, к которой привязан указанный ID лота.
     Возвращает (id, name) игры или None.
     """
-    all_games = db_query("SELECT id, name, funpay_offer_ids FROM games", fetch="all")
-    if not all_games:
-        return None
+    return db_query("SELECT g.id, g.name FROM game_offers o JOIN games g ON g.id = o.game_id WHERE o.offer_id = ?",
+                    (int(offer_id),), fetch="one")
+
+
+def get_game_offer_ids(game_id=None):
+    """Возвращает отсортированный список ID лотов игры (или всех привязанных лотов, если game_id не указан)."""
+    if game_id is None:
+        rows = db_query("SELECT offer_id FROM game_offers ORDER BY offer_id", fetch="all")
+    else:
+        rows = db_query("SELECT offer_id FROM game_offers WHERE game_id = ? ORDER BY offer_id", (game_id,), fetch="all")
+    return [row[0] for row in rows or []]
 
-    for game_id, game_name, ids_str in all_games:
-        if ids_str:
-            if offer_id in ids_str.split(','):
-                return game_id, game_name
-    return None
 
 def add_offer_id_to_game(game_id: int, offer_ids_to_add):
-    if not game_id or not offer_ids_to_add: return
-    if not isinstance(offer_ids_to_add, list):
-        offer_ids_to_add = [str(offer_ids_to_add)]
+    """
+    Привязывает ID лота (или список ID) к игре. Лоты, уже привязанные к какой-либо игре, не перепривязываются.
+    """
+    if not game_id or not offer_ids_to_add:
+        return
+    if not isinstance(offer_ids_to_add, (list, tuple, set)):
+        offer_ids_to_add = [offer_ids_to_add]
     try:
-        current_ids_str = db_query("SELECT funpay_offer_ids FROM games WHERE id = ?", (game_id,), fetch="one")
-        current_ids = set(current_ids_str[0].split(',')) if (current_ids_str and current_ids_str[0]) else set()
-
-        updated = False
-        for offer_id in offer_ids_to_add:
-            if str(offer_id) not in current_ids:
-                current_ids.add(str(offer_id))
-                updated = True
-
-        if updated:
-            new_ids_str = ",".join(sorted(list(current_ids), key=int))
-            db_query("UPDATE games SET funpay_offer_ids = ? WHERE id = ?", (new_ids_str, game_id))
-            logging.info(f"[DB] Обновлен список лотов для игры {game_id}. Новые ID: {offer_ids_to_add}.")
-    except Exception as e:
+        with transaction() as conn:
+            added = [offer_id for offer_id in offer_ids_to_add if conn.execute(
+                "INSERT INTO game_offers (offer_id, game_id) VALUES (?, ?) ON CONFLICT(offer_id) DO NOTHING",
+                (int(offer_id), game_id)).rowcount]
+        if added:
+            logging.info(f"[DB] Обновлен список лотов для игры {game_id}. Новые ID: {added}.")
+    except (sqlite3.Error, ValueError) as e:
         logging.error(f"[DB] Ошибка при добавлении лотов к игре {game_id}: {e}")
 
+
+def remove_offer_id_from_game(game_id: int, offer_id):
+    db_query("DELETE FROM game_offers WHERE game_id = ? AND offer_id = ?", (game_id, int(offer_id)))
+
+
+def _migrate_offer_ids(cursor):
+    """Переносит ID лотов из устаревшей колонки games.funpay_offer_ids (через запятую) в таблицу game_offers."""
+    cursor.execute("SELECT id, funpay_offer_ids FROM games WHERE funpay_offer_ids IS NOT NULL AND funpay_offer_ids != ''")
+    rows = [(int(offer_id.strip()), game_id) for game_id, ids_str in cursor.fetchall()
+            for offer_id in ids_str.split(',') if offer_id.strip().isdigit()]
+    if rows:
+        cursor.executemany("INSERT OR IGNORE INTO game_offers (offer_id, game_id) VALUES (?, ?)", rows)
+        logging.info(f"[DB] Перенесено {len(rows)} ID лотов в таблицу game_offers.")
+    cursor.execute("UPDATE games SET funpay_offer_ids = NULL WHERE funpay_offer_ids IS NOT NULL")
+
+
+def to_timestamp(dt):
+    """datetime (с часовым поясом) -> время Unix в секундах, в котором хранятся сроки аренд."""
+    return int(dt.timestamp())
+
+
+def from_timestamp(ts, tz=MOSCOW_TZ):
+    """Время Unix из БД -> datetime в указанном часовом поясе (по умолчанию МСК)."""
+    return datetime.fromtimestamp(ts, tz)
+
+
+def _iso_to_timestamp(value):
+    """ISO-строка из старой схемы -> время Unix. Время без часового пояса считается UTC (как в GUI)."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = pytz.utc.localize(dt)
+    return to_timestamp(dt)
+
+
+def _migrate_rental_times(conn):
+    """
+    Переводит start_time / end_time / remind_time из ISO-строк (TEXT) в INTEGER (время Unix, UTC).
+    Таблица пересоздается одной транзакцией BEGIN IMMEDIATE: если бот и GUI запускаются одновременно,
+    миграцию выполнит только один из них, второй увидит уже обновленную схему.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        columns = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(rentals)")}
+        if columns.get("end_time", "").upper() != "TEXT":
+            conn.execute("ROLLBACK")
+            return
+        rows, broken_account_ids, active_account_ids = [], set(), set()
+        for row in conn.execute("SELECT id, client_name, account_id, start_time, end_time, remind_time, initial_minutes, "
+                                "info, reminded, is_history, funpay_chat_id, pre_reminded FROM rentals"):
+            try:
+                times = [_iso_to_timestamp(value) for value in row[3:6]]
+                if not row[9]:
+                    active_account_ids.add(row[2])
+            except (TypeError, ValueError) as e:
+                logging.error(f"[DB] Некорректное время у аренды {row[0]} ({e}), аренда перенесена в историю.")
+                if not row[9]:
+                    broken_account_ids.add(row[2])
+                times, row = [0, 0, 0], row[:9] + (1,) + row[10:]
+            rows.append(row[:3] + tuple(times) + row[6:])
+        # Аккаунты перенесенных в историю аренд освобождаем, иначе их не освободит ни одна проверка сроков
+        # (если аккаунт не занят другой активной арендой)
+        conn.executemany("UPDATE accounts SET rented_by = NULL WHERE id = ?",
+                         [(account_id,) for account_id in broken_account_ids - active_account_ids - {None}])
+        conn.execute("ALTER TABLE rentals RENAME TO rentals_iso_old")
+        # Индексы старой таблицы переезжают вместе с ней и удаляются вместе с ней
+        conn.execute('''
+                     CREATE TABLE rentals
+                     (id TEXT PRIMARY KEY, client_name TEXT NOT NULL, account_id INTEGER,
+                      start_time INTEGER NOT NULL, end_time INTEGER NOT NULL, remind_time INTEGER NOT NULL,
+                      initial_minutes INTEGER, info TEXT, reminded INTEGER DEFAULT 0, is_history INTEGER DEFAULT 0,
+                      funpay_chat_id TEXT, pre_reminded INTEGER DEFAULT 0,
+                      FOREIGN KEY (account_id) REFERENCES accounts (id) ON DELETE SET NULL)
+                     ''')
+        conn.executemany("INSERT INTO rentals VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.execute("DROP TABLE rentals_iso_old")
+        conn.execute("COMMIT")
+        logging.info(f"[DB] Время {len(rows)} аренд переведено в формат Unix time.")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _create_rentals_iso_view(cursor):
+    """Представление с прежним форматом времени (ISO-строки, UTC) для внешних инструментов и выгрузок."""
+    cursor.execute("""
+        CREATE VIEW IF NOT EXISTS rentals_iso AS
+        SELECT id, client_name, account_id,
+               strftime('%Y-%m-%dT%H:%M:%S+00:00', start_time, 'unixepoch') AS start_time,
+               strftime('%Y-%m-%dT%H:%M:%S+00:00', end_time, 'unixepoch') AS end_time,
+               strftime('%Y-%m-%dT%H:%M:%S+00:00', remind_time, 'unixepoch') AS remind_time,
+               initial_minutes, info, reminded, is_history, funpay_chat_id, pre_reminded
+        FROM rentals
+    """)
+
+
 def _check_column_exists(cursor, table_name, column_name):
     cursor.execute(f"PRAGMA table_info({table_name})")
     return column_name in [row[1] for row in cursor.fetchall()]
 
 
+# Индексы под частые запросы. Частичные индексы (WHERE is_history = 0) содержат только активные аренды,
+# поэтому проверки сроков не зависят от размера истории. Колонки после ключа делают индекс покрывающим.
+_INDEXES = {
+    "idx_rentals_active_end": "rentals (end_time, id, account_id) WHERE is_history = 0",
+    "idx_rentals_pending_remind": "rentals (remind_time, id, client_name, funpay_chat_id) "
+                                  "WHERE is_history = 0 AND pre_reminded = 0",
+    "idx_rentals_client": "rentals (client_name, is_history, end_time)",
+    "idx_rentals_account": "rentals (account_id)",  # ON DELETE SET NULL при удалении аккаунта
+    "idx_accounts_game_rented": "accounts (game_id, rented_by)",
+    "idx_accounts_login": "accounts (login)",
+    "idx_processed_orders_undelivered": "processed_orders (processed_at) "
+                                        "WHERE status = 'rented' AND delivered_at IS NULL",
+}
+
+
+def _create_indexes(cursor):
+    for name, definition in _INDEXES.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+
+
 def initialize_and_update_db():
     logging.info("Проверка и инициализация базы данных...")
     init_database()
     try:
         with sqlite3.connect(DB_FILE) as conn:
             cursor = conn.cursor()
-            if not _check_column_exists(cursor, "games", "funpay_offer_ids"):
-                cursor.execute("ALTER TABLE games ADD COLUMN funpay_offer_ids TEXT")
             if not _check_column_exists(cursor, "rentals", "funpay_chat_id"):
                 cursor.execute("ALTER TABLE rentals ADD COLUMN funpay_chat_id TEXT")
             if not _check_column_exists(cursor, "rentals", "pre_reminded"):
                 cursor.execute("ALTER TABLE rentals ADD COLUMN pre_reminded INTEGER DEFAULT 0")
+            if _check_column_exists(cursor, "games", "funpay_offer_ids"):
+                _migrate_offer_ids(cursor)
+            if not _check_column_exists(cursor, "processed_orders", "delivered_at"):
+                cursor.execute("ALTER TABLE processed_orders ADD COLUMN delivered_at INTEGER")
+                # Заказы, записанные до появления колонки, считаем доставленными (иначе данные уйдут повторно)
+                cursor.execute("UPDATE processed_orders SET delivered_at = processed_at WHERE status = 'rented'")
+            conn.commit()
+            _migrate_rental_times(conn)
+            # После ALTER TABLE и пересоздания rentals: индексы используют добавленные колонки
+            _create_indexes(cursor)
+            _create_rentals_iso_view(cursor)
             conn.commit()
             logging.info("Схема базы данных актуальна.")
     except sqlite3.Error as e:
@@ -83,9 +224,10 @@ def create_rental_from_gui(client_name, account_id, total_minutes, info):
 
         db_query(
             "INSERT INTO rentals (id, client_name, account_id, start_time, end_time, remind_time, initial_minutes, info) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (rental_id, client_name, account_id, start_time.isoformat(), end_time.isoformat(), remind_time.isoformat(),
-             total_minutes, info))
+            (rental_id, client_name, account_id, to_timestamp(start_time), to_timestamp(end_time),
+             to_timestamp(remind_time), total_minutes, info))
         db_query("UPDATE accounts SET rented_by = ? WHERE id = ?", (client_name, account_id))
+        _notify_rental_changed(rental_id)
         return True
     except Exception as e:
         logging.error(f"Ошибка создания аренды из GUI: {e}")
@@ -98,6 +240,7 @@ def move_rental_to_history(rental_id):
         if rental_info and rental_info[0]:
             db_query("UPDATE accounts SET rented_by = NULL WHERE id = ?", (rental_info[0],))
         db_query("UPDATE rentals SET is_history = 1 WHERE id = ?", (rental_id,))
+        _notify_rental_changed(rental_id)
         return True
     except Exception as e:
         logging.error(f"Ошибка перемещения аренды {rental_id} в историю: {e}")
@@ -109,14 +252,15 @@ def extend_rental_from_gui(rental_id, minutes_to_add):
         res = db_query("SELECT end_time, initial_minutes FROM rentals WHERE id = ?", (rental_id,), fetch="one")
         if not res: return False
 
-        current_end_time = datetime.fromisoformat(res[0])
+        current_end_time = from_timestamp(res[0])
         new_end = current_end_time + timedelta(minutes=minutes_to_add)
         new_remind = new_end - timedelta(minutes=5)
         new_initial_minutes = (res[1] or 0) + minutes_to_add
 
         db_query(
             "UPDATE rentals SET end_time = ?, remind_time = ?, reminded = 0, pre_reminded = 0, initial_minutes = ? WHERE id = ?",
-            (new_end.isoformat(), new_remind.isoformat(), new_initial_minutes, rental_id))
+            (to_timestamp(new_end), to_timestamp(new_remind), new_initial_minutes, rental_id))
+        _notify_rental_changed(rental_id)
         return True
     except Exception as e:
         logging.error(f"Ошибка продления аренды {rental_id} из GUI: {e}")
@@ -181,47 +325,119 @@ def get_games_stats():
         fetch="all")
 
 
-def rent_account(game_name, client_name, minutes, chat_id):
-    game_id_res = db_query("SELECT id FROM games WHERE name LIKE ?", (f"%{game_name}%",), fetch="one")
-    if not game_id_res: return None
-    game_id = game_id_res[0]
-    free_account = db_query(
-        "SELECT id, login, password FROM accounts WHERE game_id = ? AND (rented_by IS NULL OR rented_by = '') LIMIT 1",
-        (game_id,), fetch="one")
-    if not free_account: return None
-    acc_id, login, password = free_account
+class OrderAlreadyProcessedError(Exception):
+    """Заказ уже есть в журнале processed_orders (событие заказа выдано повторно)."""
+
+
+def is_order_processed(order_id):
+    return db_query("SELECT 1 FROM processed_orders WHERE order_id = ?", (str(order_id),), fetch="one") is not None
+
+
+def _record_processed_order(conn, order_id, status, rental_id=None):
+    conn.execute("INSERT INTO processed_orders (order_id, status, rental_id, processed_at) VALUES (?, ?, ?, ?)",
+                 (str(order_id), status, rental_id, to_timestamp(datetime.now(MOSCOW_TZ))))
+
+
+def mark_order_delivered(order_id):
+    """Отмечает, что данные выданного по заказу аккаунта отправлены покупателю."""
+    db_query("UPDATE processed_orders SET delivered_at = ? WHERE order_id = ?",
+             (to_timestamp(datetime.now(MOSCOW_TZ)), str(order_id)))
+
+
+def get_undelivered_orders(order_id=None, min_age=0):
+    """
+    Заказы с выданным аккаунтом (активная аренда), данные которого не удалось отправить покупателю.
+    order_id - только указанный заказ; min_age - только записи старше min_age секунд
+    (чтобы не отправить данные повторно, пока заказ еще обрабатывается).
+    Возвращает [(order_id, client_name, funpay_chat_id, initial_minutes, login, password, game_name)].
+    """
+    max_processed_at = to_timestamp(datetime.now(MOSCOW_TZ)) - min_age
+    return db_query(
+        "SELECT p.order_id, r.client_name, r.funpay_chat_id, r.initial_minutes, a.login, a.password, g.name "
+        "FROM processed_orders p JOIN rentals r ON r.id = p.rental_id "
+        "JOIN accounts a ON a.id = r.account_id JOIN games g ON g.id = a.game_id "
+        "WHERE p.status = 'rented' AND p.delivered_at IS NULL AND p.processed_at <= ? "
+        "AND (? IS NULL OR p.order_id = ?) AND r.is_history = 0",
+        (max_processed_at, order_id and str(order_id), order_id and str(order_id)), fetch="all") or []
+
+
+def rent_account(game_name, client_name, minutes, chat_id, order_id=None):
+    """
+    Выдает свободный аккаунт игры одной транзакцией (BEGIN IMMEDIATE): аккаунт "захватывается" условным
+    UPDATE ... WHERE rented_by IS NULL, поэтому два параллельных заказа не могут получить один и тот же аккаунт.
+    Если передан order_id, в той же транзакции заказ записывается в журнал processed_orders
+    ("rented" или "no_accounts"), а для уже записанного заказа выбрасывается OrderAlreadyProcessedError.
+    После отправки данных покупателю нужно вызвать mark_order_delivered.
+    Возвращает (login, password, game_id) или None, если свободных аккаунтов нет.
+    """
     now = datetime.now(MOSCOW_TZ)  # <-- Используем МСК
     end_time = now + timedelta(minutes=minutes)
     remind_time = end_time - timedelta(minutes=10)
     rental_id = str(uuid.uuid4())
-    db_query(
-        "INSERT INTO rentals (id, client_name, account_id, start_time, end_time, remind_time, initial_minutes, funpay_chat_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-        (rental_id, client_name, acc_id, now.isoformat(), end_time.isoformat(), remind_time.isoformat(), minutes,
-         str(chat_id)))
-    db_query("UPDATE accounts SET rented_by = ? WHERE id = ?", (client_name, acc_id))
+    try:
+        with transaction() as conn:
+            if order_id is not None and conn.execute("SELECT 1 FROM processed_orders WHERE order_id = ?",
+                                                     (str(order_id),)).fetchone():
+                raise OrderAlreadyProcessedError(order_id)
+            game_id_res = conn.execute("SELECT id FROM games WHERE name LIKE ?", (f"%{game_name}%",)).fetchone()
+            # Если захват не удался (аккаунт уже занят), берем следующий свободный аккаунт
+            acc_id = 0
+            while True:
+                free_account = game_id_res and conn.execute(
+                    "SELECT id FROM accounts WHERE game_id = ? AND id > ? AND (rented_by IS NULL OR rented_by = '') "
+                    "ORDER BY id LIMIT 1", (game_id_res[0], acc_id)).fetchone()
+                if not free_account:
+                    if order_id is not None:
+                        _record_processed_order(conn, order_id, "no_accounts")
+                    return None
+                game_id, acc_id = game_id_res[0], free_account[0]
+                if conn.execute(
+                        "UPDATE accounts SET rented_by = ? WHERE id = ? AND (rented_by IS NULL OR rented_by = '')",
+                        (client_name, acc_id)).rowcount == 1:
+                    break
+            login, password = conn.execute("SELECT login, password FROM accounts WHERE id = ?", (acc_id,)).fetchone()
+            conn.execute(
+                "INSERT INTO rentals (id, client_name, account_id, start_time, end_time, remind_time, initial_minutes, funpay_chat_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (rental_id, client_name, acc_id, to_timestamp(now), to_timestamp(end_time), to_timestamp(remind_time),
+                 minutes, str(chat_id)))
+            if order_id is not None:
+                _record_processed_order(conn, order_id, "rented", rental_id)
+    except sqlite3.Error as e:
+        logging.error(f"[DB] Ошибка выдачи аккаунта игры '{game_name}' клиенту {client_name}: {e}")
+        return None
+    _notify_rental_changed(rental_id)
     return login, password, game_id
 
 
 def check_and_process_expired_rentals():
-    now_iso = datetime.now(MOSCOW_TZ).isoformat()  # <-- Используем МСК
-    expired_rentals = db_query("SELECT id, account_id FROM rentals WHERE end_time <= ? AND is_history = 0", (now_iso,),
-                               fetch="all")
-    if not expired_rentals: return set()
-    freed_game_ids = set()
-    for rental_id, account_id in expired_rentals:
-        move_rental_to_history(rental_id)
-        if account_id:
-            game_id_res = db_query("SELECT game_id FROM accounts WHERE id = ?", (account_id,), fetch="one")
-            if game_id_res:
-                freed_game_ids.add(game_id_res[0])
+    """
+    Переносит в историю все истекшие аренды и освобождает их аккаунты одной транзакцией
+    (после простоя сервера их могут быть сотни). Возвращает множество game_id освобожденных аккаунтов.
+    """
+    now_ts = to_timestamp(datetime.now(MOSCOW_TZ))
+    try:
+        with transaction() as conn:
+            freed_game_ids = {row[0] for row in conn.execute(
+                "SELECT DISTINCT a.game_id FROM rentals r JOIN accounts a ON a.id = r.account_id "
+                "WHERE r.end_time <= ? AND r.is_history = 0", (now_ts,))}
+            conn.execute(
+                "UPDATE accounts SET rented_by = NULL "
+                "WHERE id IN (SELECT account_id FROM rentals WHERE end_time <= ? AND is_history = 0)", (now_ts,))
+            moved = conn.execute("UPDATE rentals SET is_history = 1 WHERE end_time <= ? AND is_history = 0",
+                                 (now_ts,)).rowcount
+    except sqlite3.Error as e:
+        logging.error(f"[DB] Ошибка обработки истекших аренд: {e}")
+        return set()
+    if moved:
+        logging.info(f"[DB] В историю перенесено истекших аренд: {moved}.")
     return freed_game_ids
 
 
 def get_rentals_for_reminder():
-    now_iso = datetime.now(MOSCOW_TZ).isoformat()  # <-- Используем МСК
+    now_ts = to_timestamp(datetime.now(MOSCOW_TZ))
     return db_query(
         "SELECT id, client_name, funpay_chat_id FROM rentals WHERE remind_time <= ? AND is_history = 0 AND pre_reminded = 0",
-        (now_iso,), fetch="all")
+        (now_ts,), fetch="all")
 
 
 def mark_rental_as_reminded(rental_id):
@@ -238,48 +454,14 @@ def extend_user_rental(username, hours_to_add):
         "SELECT id, end_time, initial_minutes FROM rentals WHERE client_name = ? AND is_history = 0 ORDER BY end_time DESC LIMIT 1",
         (username,), fetch="one")
     if not rental: return None
-    rental_id, current_end_iso, initial_minutes = rental
-    current_end_time = datetime.fromisoformat(current_end_iso)
+    rental_id, current_end_ts, initial_minutes = rental
+    current_end_time = from_timestamp(current_end_ts)
     minutes_to_add = hours_to_add * 60
     new_end_time = current_end_time + timedelta(minutes=minutes_to_add)
     new_remind_time = new_end_time - timedelta(minutes=10)
     new_total_minutes = (initial_minutes or 0) + minutes_to_add
     db_query(
         "UPDATE rentals SET end_time = ?, remind_time = ?, initial_minutes = ?, reminded = 0, pre_reminded = 0 WHERE id = ?",
-        (new_end_time.isoformat(), new_remind_time.isoformat(), new_total_minutes, rental_id))
+        (to_timestamp(new_end_time), to_timestamp(new_remind_time), new_total_minutes, rental_id))
+    _notify_rental_changed(rental_id)
     return new_end_time
-
-
-def set_game_offer_ids(game_id, offer_ids_str):
-    db_query("UPDATE games SET funpay_offer_ids = ? WHERE id = ?", (offer_ids_str, game_id))
-
-
-def add_offer_id_to_game(game_id: int, offer_id: int):
-    """
-    Добавляет ID нового лота к игре, избегая дубликатов.
-    """
-    if not game_id or not offer_id:
-        return
-
-    try:
-        # 1. Получаем текущий список ID
-        current_ids_str = db_query("SELECT funpay_offer_ids FROM games WHERE id = ?", (game_id,), fetch="one")
-        if not current_ids_str:
-            # Если у игры вообще не было списка, создаем новый
-            new_ids_str = str(offer_id)
-        else:
-            # 2. Преобразуем строку в множество, чтобы избежать дублей
-            current_ids = set(current_ids_str[0].split(',')) if current_ids_str[0] else set()
-
-            # 3. Добавляем новый ID
-            current_ids.add(str(offer_id))
-
-            # 4. Собираем обратно в отсортированную строку
-            new_ids_str = ",".join(sorted(list(current_ids), key=int))
-
-        # 5. Сохраняем новый список в БД
-        set_game_offer_ids(game_id, new_ids_str)
-        logging.info(f"[DB] Лот {offer_id} успешно привязан к игре {game_id}.")
-
-    except Exception as e:
-        logging.error(f"[DB] Ошибка при добавлении лота {offer_id} к игре {game_id}: {e}")
\ No newline at end of file
@@ -0,0 +1,108 @@
+# event_dispatcher.py
+# Пул обработчиков событий FunPay. Поток Runner'а только ставит события в очередь и сразу продолжает опрос,
+# а обработчики выполняются в нескольких рабочих потоках.
+# События с одинаковым ключом (один чат / покупатель) обрабатываются строго по очереди,
+# среди готовых к обработке событий первыми берутся события с меньшим приоритетом (например, новые заказы).
+import heapq
+import logging
+import threading
+from collections import deque
+
+from config import EVENT_WORKERS
+
+
+class EventDispatcher:
+    """
+    handler(event) - обработчик события.
+    key_func(event) - ключ очередности (None - событие можно обрабатывать параллельно с любыми другими).
+    priority_func(event) - приоритет события (меньше - раньше).
+    """
+
+    def __init__(self, handler, workers=EVENT_WORKERS, key_func=None, priority_func=None):
+        self.handler = handler
+        self.workers = workers
+        self.key_func = key_func or (lambda event: None)
+        self.priority_func = priority_func or (lambda event: 0)
+        self._cond = threading.Condition()
+        self._lanes = {}  # {ключ: deque[(приоритет, номер, событие)]} - ожидающие и выполняющееся событие ключа
+        self._ready = []  # куча [(приоритет, номер, ключ)] - ключи, первое событие которых можно обрабатывать
+        self._seq = 0
+        self._unfinished = set()  # номера поставленных, но еще не обработанных событий
+        self._callbacks = deque()  # [(номер последнего события на момент вызова after_pending, функция)]
+        self._callbacks_lock = threading.Lock()  # сохраняет порядок вызова функций after_pending
+
+    def start(self):
+        for i in range(self.workers):
+            threading.Thread(target=self._run, name=f"EventWorker-{i + 1}", daemon=True).start()
+        logging.info(f"[DISPATCHER] Запущено обработчиков событий: {self.workers}.")
+
+    def submit(self, event):
+        """Ставит событие в очередь."""
+        with self._cond:
+            self._seq += 1
+            key = self.key_func(event)
+            if key is None:
+                key = ("event", self._seq)
+            item = (self.priority_func(event), self._seq, event)
+            self._unfinished.add(self._seq)
+            if key in self._lanes:
+                # Ключ уже занят: событие будет поставлено в кучу после обработки предыдущих
+                self._lanes[key].append(item)
+            else:
+                self._lanes[key] = deque([item])
+                heapq.heappush(self._ready, (item[0], item[1], key))
+                self._cond.notify()
+
+    def after_pending(self, callback):
+        """
+        Вызывает callback() после обработки всех уже поставленных в очередь событий
+        (сразу, если очередь пуста). Функции вызываются в порядке регистрации.
+        """
+        with self._callbacks_lock:
+            with self._cond:
+                if self._unfinished:
+                    self._callbacks.append((self._seq, callback))
+                    return
+            self._call(callback)
+
+    def pending(self):
+        with self._cond:
+            return len(self._unfinished)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._ready:
+                    self._cond.wait()
+                _, seq, key = heapq.heappop(self._ready)
+                event = self._lanes[key][0][2]
+            try:
+                self.handler(event)
+            except Exception:
+                logging.exception(f"[DISPATCHER] Ошибка обработки события {getattr(event, 'type', event)}.")
+            self._finish(key, seq)
+
+    def _finish(self, key, seq):
+        with self._callbacks_lock:
+            with self._cond:
+                lane = self._lanes[key]
+                lane.popleft()
+                if lane:
+                    heapq.heappush(self._ready, (lane[0][0], lane[0][1], key))
+                    self._cond.notify()
+                else:
+                    del self._lanes[key]
+                self._unfinished.discard(seq)
+                first_unfinished = min(self._unfinished, default=self._seq + 1)
+                ready_callbacks = []
+                while self._callbacks and self._callbacks[0][0] < first_unfinished:
+                    ready_callbacks.append(self._callbacks.popleft()[1])
+            for callback in ready_callbacks:
+                self._call(callback)
+
+    @staticmethod
+    def _call(callback):
+        try:
+            callback()
+        except Exception:
+            logging.exception("[DISPATCHER] Ошибка отложенного вызова.")
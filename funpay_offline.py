@@ -0,0 +1,462 @@
+# funpay_offline.py
+# Локальная замена funpay.com: позволяет запускать Account, Runner и bot_handler без сети
+# (Account(..., base_url="http://127.0.0.1:8800")).
+# Фикстуры - записанные ответы FunPay: каталог с index.json ({ключ запроса: [ответы]}) и файлами тел ответов.
+# Ответы одного ключа отдаются по очереди, последний повторяется (или по кругу с --loop).
+# Запуск: python funpay_offline.py serve [каталог] [--port 8800] [--loop]
+#         python funpay_offline.py record [каталог]  - записать реальные ответы FunPay (нужен GOLDEN_KEY), секреты вычищаются
+#         python funpay_offline.py demo [каталог]    - сгенерировать синтетические фикстуры
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "funpay")
+INDEX_FILE = "index.json"
+
+# Подстановки вместо секретов в записанных ответах
+SCRUBBED_GOLDEN_KEY = "offline-golden-key"
+SCRUBBED_PHPSESSID = "offline-phpsessid"
+SCRUBBED_CSRF_TOKEN = "offline-csrf-token"
+SCRUB_PATTERNS = [
+    (re.compile(r'("csrf-token"\s*:\s*")[^"]*(")'), rf"\g<1>{SCRUBBED_CSRF_TOKEN}\g<2>"),
+    (re.compile(r'(&quot;csrf-token&quot;:&quot;).*?(&quot;)'), rf"\g<1>{SCRUBBED_CSRF_TOKEN}\g<2>"),
+    (re.compile(r'(name="csrf_token"[^>]*value=")[^"]*(")'), rf"\g<1>{SCRUBBED_CSRF_TOKEN}\g<2>"),
+    (re.compile(r'(value=")[^"]*("[^>]*name="csrf_token")'), rf"\g<1>{SCRUBBED_CSRF_TOKEN}\g<2>"),
+    (re.compile(r"([?&](?:token|key|hash)=)[\w-]+"), r"\g<1>offline"),
+]
+
+
+def request_key(method, url, form=None):
+    """
+    Ключ фикстуры для запроса: метод и путь без языка, числовые части пути заменяются на *.
+    Запросы к runner/ различаются по типам запрошенных объектов (без c-p-u) и действию (chat_message - отправка
+    сообщения), например: "POST /runner/ chat_bookmarks+orders_counters", "POST /runner/ chat_message".
+    """
+    path = urlparse(url).path or "/"
+    path = re.sub(r"^/(en|uk)(?=/)", "", path)
+    path = re.sub(r"/\d+(?=/|$)", "/*", path)
+    key = f"{method.upper()} {path}"
+    if path == "/runner/" and form:
+        if request := form.get("request"):
+            try:
+                action = json.loads(request).get("action") if request != "false" else None
+            except ValueError:
+                action = None
+            if action:
+                return f"{key} {action}"
+        try:
+            objects = json.loads(form.get("objects") or "[]")
+        except ValueError:
+            objects = []
+        types = sorted({obj.get("type") for obj in objects if obj.get("type") != "c-p-u"})
+        if types:
+            key += " " + "+".join(types)
+    return key
+
+
+def scrub(text, secrets=()):
+    """Заменяет секреты (golden_key, PHPSESSID, csrf-токен) в тексте ответа."""
+    for secret, placeholder in secrets:
+        if secret:
+            text = text.replace(secret, placeholder)
+    for pattern, replacement in SCRUB_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+class FixtureStore:
+    """Каталог фикстур: index.json {ключ: [{"status", "content_type", "file"}]} и файлы тел ответов."""
+
+    def __init__(self, directory, loop=False):
+        self.directory = directory
+        self.loop = loop
+        self._lock = threading.Lock()
+        self._cursors = {}
+        path = os.path.join(directory, INDEX_FILE)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.index = json.load(f)
+        else:
+            self.index = {}
+
+    def add(self, key, body, status=200, content_type="text/html; charset=UTF-8"):
+        """Сохраняет ответ для ключа (в конец очереди ответов ключа)."""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            responses = self.index.setdefault(key, [])
+            ext = "json" if "json" in content_type else "html"
+            slug = re.sub(r"[^a-zA-Z0-9]+", "_", key).strip("_").lower()
+            name = f"{slug}_{len(responses) + 1}.{ext}"
+            with open(os.path.join(self.directory, name), "w", encoding="utf-8") as f:
+                f.write(body)
+            responses.append({"status": status, "content_type": content_type, "file": name})
+            with open(os.path.join(self.directory, INDEX_FILE), "w", encoding="utf-8") as f:
+                json.dump(self.index, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+    def next(self, key):
+        """Возвращает (статус, content-type, тело) следующего ответа для ключа или None, если фикстуры нет."""
+        with self._lock:
+            responses = self.index.get(key)
+            if not responses:
+                return None
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            response = responses[cursor % len(responses) if self.loop else min(cursor, len(responses) - 1)]
+        with open(os.path.join(self.directory, response["file"]), "rb") as f:
+            return response["status"], response["content_type"], f.read()
+
+    def reset(self):
+        """Начинает выдачу ответов всех ключей сначала."""
+        with self._lock:
+            self._cursors = {}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "FunPayOffline/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8", "replace") if length else ""
+        form = dict(parse_qsl(body)) if "x-www-form-urlencoded" in (self.headers.get("Content-Type") or "") else {}
+        key = request_key(self.command, self.path, form)
+        self.server.requests_count += 1
+        fixture = self.server.store.next(key)
+        if fixture is None:
+            logging.warning(f"[OFFLINE] Нет фикстуры для {key}.")
+            status, content_type, data = 404, "application/json", json.dumps({"error": f"no fixture: {key}"}).encode()
+        else:
+            status, content_type, data = fixture
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        if key == "GET /":
+            self.send_header("Set-Cookie", f"PHPSESSID={SCRUBBED_PHPSESSID}; path=/")
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, format, *args):
+        logging.debug(f"[OFFLINE] {self.address_string()} {format % args}")
+
+
+class OfflineFunPayServer(ThreadingHTTPServer):
+    """HTTP-сервер, отдающий фикстуры из FixtureStore. port=0 - любой свободный порт."""
+    daemon_threads = True
+
+    def __init__(self, store, host="127.0.0.1", port=0):
+        super().__init__((host, port), _Handler)
+        self.store = store
+        self.requests_count = 0
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def start(self):
+        """Запускает сервер в фоновом потоке и возвращает его адрес (для Account(base_url=...))."""
+        self._thread = threading.Thread(target=self.serve_forever, name="OfflineFunPay", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class Recorder:
+    """
+    Записывает ответы, которые аккаунт получает от FunPay, в FixtureStore.
+    Перехватывает account.session.request; Set-Cookie не сохраняются, секреты в телах ответов заменяются.
+    """
+
+    def __init__(self, account, store):
+        self.account = account
+        self.store = store
+        self._original = account.session.request
+        account.session.request = self._request
+
+    def _request(self, method, url, *args, **kwargs):
+        response = self._original(method, url, *args, **kwargs)
+        if 300 <= response.status_code < 400:
+            return response
+        data = kwargs.get("data")
+        form = {k: str(v) for k, v in data.items()} if isinstance(data, dict) else None
+        secrets = [(self.account.golden_key, SCRUBBED_GOLDEN_KEY),
+                   (self.account.phpsessid or response.cookies.get("PHPSESSID"), SCRUBBED_PHPSESSID),
+                   (self.account.csrf_token, SCRUBBED_CSRF_TOKEN)]
+        self.store.add(request_key(method, url, form), scrub(response.content.decode("utf-8", "replace"), secrets),
+                       response.status_code, response.headers.get("Content-Type", "text/html; charset=UTF-8"))
+        return response
+
+    def stop(self):
+        self.account.session.request = self._original
+
+
+def record(directory):
+    """Записывает ответы на основные запросы бота (без изменения лотов и отправки сообщений)."""
+    import config
+    from FunPayAPI.account import Account
+    from FunPayAPI.updater.runner import Runner
+
+    account = Account(golden_key=config.GOLDEN_KEY, user_agent=config.USER_AGENT)
+    recorder = Recorder(account, FixtureStore(directory))
+    try:
+        account.get()
+        chats = account.request_chats()
+        if chats:
+            account.get_chat_history(chats[0].id)
+            account.get_chats_histories({chat.id: chat.name for chat in chats[:10]})
+        account.get_sales()
+        profile = account.get_user(account.id)
+        if lots := profile.get_lots():
+            account.get_lot_fields(int(lots[0].id))
+        runner = Runner(account)
+        runner.get_updates()
+    finally:
+        recorder.stop()
+    print(f"Ответы записаны в {directory}.")
+
+
+# --- Синтетические фикстуры (разметка повторяет ту, которую разбирает FunPayAPI) ---
+
+DEMO_USER_ID = 1000001
+DEMO_USERNAME = "offline_seller"
+DEMO_GAME_ID = 41
+DEMO_SUBCATEGORY_ID = 110
+DEMO_BUYER_ID = 2000000
+
+
+def _app_data():
+    data = json.dumps({"locale": "ru", "csrf-token": SCRUBBED_CSRF_TOKEN, "userId": DEMO_USER_ID})
+    return data.replace('"', "&quot;")
+
+
+def _page(content):
+    return (f'<!DOCTYPE html><html lang="ru"><head><meta charset="utf-8"><title>FunPay</title>'
+            f'<link rel="stylesheet" href="/css/main.css"><script src="/js/app.js"></script></head>'
+            f'<body data-app-data="{_app_data()}"><div class="wrapper"><header><nav class="navbar">'
+            f'<a href="https://funpay.com/" class="logo"></a><ul class="nav navbar-nav">'
+            f'<li><a href="https://funpay.com/orders/trade">Продажи <span class="badge badge-trade">3</span></a></li>'
+            f'<li><a href="https://funpay.com/orders/">Покупки <span class="badge badge-orders">0</span></a></li>'
+            f'<li><a href="https://funpay.com/account/balance">Баланс <span class="badge badge-balance">12 345 ₽</span></a></li>'
+            f'</ul><div class="user-link-dropdown"><div class="user-link-name">{DEMO_USERNAME}</div>'
+            f'<a href="https://funpay.com/account/logout" class="menu-item-logout">Выйти</a></div></nav></header>'
+            f'<div class="content">{content}</div><footer class="footer">'
+            + "".join(f'<a href="https://funpay.com/en/help/{i}">Раздел помощи {i}</a>' for i in range(30))
+            + '</footer></div></body></html>')
+
+
+def _main_page():
+    games = "".join(
+        f'<div class="promo-game-item"><div class="game-title" data-id="{DEMO_GAME_ID + g}">'
+        f'<a href="https://funpay.com/lots/{DEMO_SUBCATEGORY_ID + g * 10}/">Игра {g}</a></div>'
+        f'<ul class="list-inline" data-id="{DEMO_GAME_ID + g}">'
+        + "".join(f'<li><a href="https://funpay.com/lots/{DEMO_SUBCATEGORY_ID + g * 10 + s}/">Раздел {s}</a></li>'
+                  for s in range(3))
+        + f'<li><a href="https://funpay.com/chips/{DEMO_SUBCATEGORY_ID + g * 10 + 5}/">Валюта</a></li></ul></div>'
+        for g in range(20))
+    return _page(f'<div class="promo-game-list">{games}</div>')
+
+
+def _contact_item(i, last_msg_id):
+    unread = " unread" if i % 3 == 0 else ""
+    return (f'<a href="https://funpay.com/chat/?node={100000 + i}" class="contact-item{unread}" '
+            f'data-id="{100000 + i}" data-node-msg="{last_msg_id}" data-user-msg="{last_msg_id - (i % 2)}">'
+            f'<div class="contact-item-photo"><div class="avatar-photo" style="background-image: '
+            f'url(/img/layout/avatar.png);"></div></div><div class="media-user-name">buyer{i}</div>'
+            f'<div class="contact-item-message">Здравствуйте, сообщение номер {last_msg_id}</div>'
+            f'<div class="contact-item-time">12:{i % 60:02d}</div></a>')
+
+
+def _system_message_text(msg_id):
+    """Текст системного сообщения: оплата, повторное открытие, возврат / подтверждение администратором."""
+    buyer = f'<a href="https://funpay.com/users/{DEMO_BUYER_ID + 1}/">buyer1</a>'
+    admin = '<a href="https://funpay.com/users/7/">admin</a>'
+    seller = f'<a href="https://funpay.com/users/{DEMO_USER_ID}/">seller</a>'
+    order = f'<a href="https://funpay.com/orders/ABCD{msg_id % 10000:04d}/">#ABCD{msg_id % 10000:04d}</a>'
+    return [f"Покупатель {buyer} оплатил заказ {order}. Игра 0, Раздел 0, 1 шт. buyer1, не забудьте потом нажать "
+            f"кнопку «Подтвердить выполнение заказа».",
+            f"Заказ {order} открыт повторно.",
+            f"Администратор {admin} вернул деньги покупателю {buyer} по заказу {order}.",
+            f"Администратор {admin} подтвердил успешное выполнение заказа {order} и отправил деньги продавцу "
+            f"{seller}."][msg_id // 10 % 4]
+
+
+def _message(msg_id, author_id, text):
+    if author_id == 0:
+        return {"id": msg_id, "author": 0, "html":
+                f'<div class="chat-msg-item chat-msg-with-head" id="message-{msg_id}"><div class="chat-message">'
+                f'<div class="media-user-name">FunPay <span class="chat-msg-author-label label label-primary">'
+                f'оповещение</span></div><div class="chat-msg-body"><div class="alert alert-with-icon alert-info" '
+                f'role="alert"><i class="fa fa-info-circle alert-icon"></i>{_system_message_text(msg_id)}'
+                f'</div></div></div></div>'}
+    name = DEMO_USERNAME if author_id == DEMO_USER_ID else f"buyer{author_id - DEMO_BUYER_ID}"
+    return {"id": msg_id, "author": author_id, "html":
+            f'<div class="chat-msg-item chat-msg-with-head" id="message-{msg_id}"><div class="chat-message">'
+            f'<div class="media-user-name"><a href="https://funpay.com/users/{author_id}/" '
+            f'class="chat-msg-author-link">{name}</a><div class="chat-msg-date" title="12:00:00">12:00</div></div>'
+            f'<div class="chat-msg-body"><div class="chat-msg-text">{text}</div></div></div></div>'}
+
+
+def _messages(count, first_id=500000):
+    buyer = DEMO_BUYER_ID + 1
+    result = []
+    for n in range(count):
+        msg_id = first_id + n
+        if n % 10 == 9:
+            result.append(_message(msg_id, 0, None))
+        else:
+            author = buyer if n % 2 == 0 else DEMO_USER_ID
+            result.append(_message(msg_id, author, f"Сообщение {n}: аренда аккаунта<br>на 2 часа"))
+    return result
+
+
+def _chat_node(chat_id, messages):
+    return {"type": "chat_node", "id": chat_id, "tag": "00000000",
+            "data": {"node": {"id": chat_id, "name": f"users-{DEMO_USER_ID}-{DEMO_BUYER_ID + 1}", "silent": False},
+                     "messages": messages}}
+
+
+def _order_item(n, status):
+    cls = {"paid": "tc-item info", "closed": "tc-item", "refunded": "tc-item warning"}[status]
+    buyer = DEMO_BUYER_ID + n % 40
+    return (f'<a href="https://funpay.com/orders/ORD{n:05d}/" class="{cls}">'
+            f'<div class="tc-date"><div class="tc-date-time">{n % 28 + 1} января, 12:{n % 60:02d}</div>'
+            f'<div class="tc-date-left">{n} дней назад</div></div><div class="tc-order">#ORD{n:05d}</div>'
+            f'<div class="order-desc"><div>Аренда аккаунта на {n % 24 + 1} ч., без активации</div>'
+            f'<div class="text-muted">Игра 0, Раздел 0</div></div>'
+            f'<div class="tc-user"><div class="media media-user"><div class="media-body">'
+            f'<div class="media-user-name"><span class="pseudo-a" data-href="https://funpay.com/users/{buyer}/">'
+            f'buyer{n % 40}</span></div></div></div></div>'
+            f'<div class="tc-status text-primary">Оплачен</div><div class="tc-price text-nowrap tc-seller-sum">'
+            f'{100 + n}.00 <span class="unit">₽</span></div></a>')
+
+
+def _trade_page(count):
+    statuses = ("paid", "closed", "closed", "refunded")
+    items = "".join(_order_item(count - n, statuses[n % 4 if n else 0]) for n in range(count))
+    return _page(f'<div class="tc table-hover table-clickable">{items}</div>'
+                 f'<input type="hidden" name="continue" value="ORD{0:05d}">')
+
+
+def _lot_item(n):
+    auto = '<i class="auto-dlv-icon"></i>' if n % 2 else ""
+    return (f'<a href="https://funpay.com/lots/offer?id={3000000 + n}" class="tc-item">'
+            f'<div class="tc-desc"><div class="tc-desc-text">Аккаунт {n}, аренда от 1 часа</div></div>'
+            f'<div class="tc-server">Сервер {n % 5}</div><div class="tc-amount">{n % 7 + 1}</div>'
+            f'<div class="tc-price" data-s="{50 + n}.5"><div>{50 + n}.5 <span class="unit">₽</span></div></div>'
+            f'{auto}</a>')
+
+
+def _user_page(lots, per_subcategory=50):
+    blocks = []
+    for start in range(0, lots, per_subcategory):
+        subcategory = DEMO_SUBCATEGORY_ID + (start // per_subcategory) % 3
+        items = "".join(_lot_item(n) for n in range(start, min(start + per_subcategory, lots)))
+        blocks.append(f'<div class="offer"><div class="offer-list-title-container"><div class="offer-list-title">'
+                      f'<h3><a href="https://funpay.com/lots/{subcategory}/">Раздел</a></h3></div></div>'
+                      f'<div class="offer-tc-container"><div class="tc">{items}</div></div></div>')
+    return _page(f'<div class="profile-header"><div class="avatar-photo" style="background-image: '
+                 f'url(/img/layout/avatar.png);"></div><h1><span class="mr4">{DEMO_USERNAME}</span></h1>'
+                 f'<span class="media-user-status">Онлайн</span></div>{"".join(blocks)}')
+
+
+def _offer_edit_page(lot_id):
+    groups = "".join(f'<div class="form-group"><label>Поле {n}</label><input class="form-control" '
+                     f'name="fields[f{n}]" value="значение {n}"></div>' for n in range(10))
+    return _page(
+        f'<form method="post" action="https://funpay.com/lots/offerSave" class="form-offer-editor">'
+        f'<input type="hidden" name="csrf_token" value="{SCRUBBED_CSRF_TOKEN}">'
+        f'<input type="hidden" name="offer_id" value="{lot_id}"><input type="hidden" name="node_id" '
+        f'value="{DEMO_SUBCATEGORY_ID}"><input type="hidden" name="location" value="">'
+        f'<input type="hidden" name="deleted" value="">{groups}'
+        f'<div class="form-group"><textarea class="form-control" name="fields[summary][ru]">Аренда аккаунта'
+        f'</textarea></div><div class="form-group"><textarea class="form-control" name="fields[desc][ru]">'
+        f'Описание лота</textarea></div><div class="form-group"><select name="fields[method]" class="form-control">'
+        f'<option value="">-</option><option value="1" selected>Вход</option></select></div>'
+        f'<div class="form-group hidden"><select name="fields[hidden]"><option value="0">0</option></select></div>'
+        f'<div class="form-group"><input class="form-control" name="price" value="150"><span '
+        f'class="form-control-feedback">₽</span></div><div class="form-group"><input name="amount" value="1"></div>'
+        f'<div class="form-group"><input type="checkbox" name="active" checked></div>'
+        f'<div class="form-group"><input type="checkbox" name="auto_delivery"></div>'
+        f'<table class="table-buyers-prices"><tr><th>Банковская карта</th><td>165.5 ₽</td></tr>'
+        f'<tr><th>СБП</th><td>160 ₽</td></tr><tr><th>Криптовалюта</th><td>2.1 $</td></tr></table></form>')
+
+
+def _runner_response(objects, response=False):
+    return json.dumps({"objects": objects, "response": response}, ensure_ascii=False)
+
+
+def write_demo_fixtures(directory, chats=50, orders=100, lots=200, messages=100):
+    """Генерирует синтетические фикстуры: chats чатов, orders заказов, lots лотов профиля, messages сообщений."""
+    store = FixtureStore(directory)
+    store.index = {}
+    chat_html = "".join(_contact_item(i, 600000 + i * 10) for i in range(chats))
+    bookmarks = {"type": "chat_bookmarks", "id": DEMO_USER_ID, "tag": "demotag1",
+                 "data": {"order": [100000 + i for i in range(chats)], "html": chat_html}}
+    counters = {"type": "orders_counters", "id": DEMO_USER_ID, "tag": "demotag2", "data": {"buyer": 0, "seller": 3}}
+    history = _messages(messages)
+
+    store.add("GET /", _main_page())
+    store.add("GET /orders/trade", _trade_page(orders))
+    store.add("POST /orders/trade", _trade_page(0))
+    store.add("GET /users/*/", _user_page(lots))
+    store.add("GET /lots/offerEdit", _offer_edit_page(3000000))
+    store.add("POST /lots/offerSave", json.dumps({"done": True, "url": "https://funpay.com/lots/110/trade"}),
+              content_type="application/json")
+    store.add("GET /chat/history", json.dumps({"chat": _chat_node(100001, history)["data"]}, ensure_ascii=False),
+              content_type="application/json")
+    store.add("POST /runner/ chat_bookmarks+orders_counters", _runner_response([counters, bookmarks]),
+              content_type="application/json")
+    store.add("POST /runner/ chat_bookmarks", _runner_response([bookmarks]), content_type="application/json")
+    store.add("POST /runner/ chat_node", _runner_response([_chat_node(100000 + i, history[-5:]) for i in range(10)]),
+              content_type="application/json")
+    sent = _message(history[-1]["id"] + 1, DEMO_USER_ID, "⁡Сообщение отправлено")
+    store.add("POST /runner/ chat_message", _runner_response([_chat_node(100001, [sent])], {"error": None}),
+              content_type="application/json")
+    print(f"Синтетические фикстуры записаны в {directory}.")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Локальная замена funpay.com с записанными ответами.")
+    parser.add_argument("command", choices=("serve", "record", "demo"))
+    parser.add_argument("directory", nargs="?", default=DEFAULT_FIXTURES_DIR)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--loop", action="store_true", help="отдавать ответы ключа по кругу")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        record(args.directory)
+    elif args.command == "demo":
+        write_demo_fixtures(args.directory)
+    else:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+        server = OfflineFunPayServer(FixtureStore(args.directory, args.loop), args.host, args.port)
+        print(f"Замена FunPay запущена: {server.base_url} (фикстуры: {args.directory}).")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
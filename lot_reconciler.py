@@ -0,0 +1,118 @@
+# lot_reconciler.py
+# Приводит статусы лотов на FunPay к желаемому состоянию.
+# Желаемое состояние лота: активен <=> у игры есть свободные аккаунты и управление лотами включено.
+# Пауза после окончания аренды (hold_activation) только откладывает активацию: активный лот она не выключает.
+# Последнее известное состояние лота на FunPay хранится в таблице lot_states и обновляется раз в LOT_STATE_TTL_SECONDS,
+# поэтому запросы к FunPay отправляются только для лотов, у которых желаемое и известное состояния различаются.
+import logging
+import threading
+import time
+
+from FunPayAPI.account import Account
+from config import LOT_STATE_TTL_SECONDS
+from database import db_query
+from telegram_bot import send_telegram_notification
+import state_manager
+
+# Сверка выполняется из нескольких потоков (обработчик заказов, проверщик, таймеры) - выполняем ее по очереди
+_reconcile_lock = threading.Lock()
+# {game_id: время (time.time()), до которого лоты игры нельзя активировать}
+_activation_holds: dict[int, float] = {}
+
+
+def hold_activation(game_id: int, seconds: float):
+    """
+    Запрещает активацию неактивных лотов игры на указанное время (пауза после окончания аренды).
+    Уже активные лоты остаются активными.
+    """
+    _activation_holds[game_id] = time.time() + seconds
+
+
+def update_desired_states(game_ids=None):
+    """Пересчитывает желаемое состояние лотов (всех игр или только переданных)."""
+    offers = db_query("""
+        SELECT o.offer_id, o.game_id,
+               (SELECT COUNT(*) FROM accounts a WHERE a.game_id = o.game_id AND a.rented_by IS NULL)
+        FROM game_offers o
+    """, fetch="all") or []
+    rows = []
+    for offer_id, game_id, free_accounts in offers:
+        if game_ids is not None and game_id not in game_ids:
+            continue
+        desired = int(free_accounts > 0 and state_manager.are_lots_enabled)
+        rows.append((offer_id, game_id, desired))
+
+    if rows:
+        db_query("""
+            INSERT INTO lot_states (offer_id, game_id, desired_active) VALUES (?, ?, ?)
+            ON CONFLICT(offer_id) DO UPDATE SET game_id = excluded.game_id, desired_active = excluded.desired_active
+        """, rows, many=True)
+    if game_ids is None:
+        # Лоты, отвязанные от игр, больше не отслеживаем
+        db_query("DELETE FROM lot_states WHERE offer_id NOT IN (SELECT offer_id FROM game_offers)")
+
+
+def set_observed_state(offer_id: int, active: bool):
+    db_query("UPDATE lot_states SET observed_active = ?, observed_at = ? WHERE offer_id = ?",
+             (int(active), time.time(), offer_id))
+
+
+def refresh_observed_states(account: Account, game_ids=None, force: bool = False):
+    """Обновляет известное состояние лотов, у которых оно устарело (старше LOT_STATE_TTL_SECONDS)."""
+    rows = db_query("SELECT offer_id, game_id, observed_at FROM lot_states", fetch="all") or []
+    stale_before = time.time() - LOT_STATE_TTL_SECONDS
+    offer_ids = {offer_id for offer_id, game_id, observed_at in rows
+                 if (game_ids is None or game_id in game_ids)
+                 and (force or observed_at is None or observed_at < stale_before)}
+    if not offer_ids:
+        return
+    logging.info(f"[RECONCILER] Обновление статусов {len(offer_ids)} лот(ов) с FunPay.")
+    activity = account.get_lots_activity(offer_ids)
+    for offer_id, active in activity.items():
+        set_observed_state(offer_id, active)
+    if missing := offer_ids - activity.keys():
+        logging.warning(f"[RECONCILER] Не удалось получить статусы лотов: {sorted(missing)}.")
+
+
+def reconcile(account: Account, game_ids=None, force_refresh: bool = False) -> int:
+    """
+    Сверяет желаемое и известное состояние лотов и переключает только расходящиеся лоты.
+    Возвращает количество переключенных лотов.
+    """
+    if game_ids is not None:
+        game_ids = set(game_ids)
+    with _reconcile_lock:
+        update_desired_states(game_ids)
+        refresh_observed_states(account, game_ids, force_refresh)
+
+        diverged = db_query("""
+            SELECT offer_id, game_id, desired_active FROM lot_states
+            WHERE observed_active IS NOT NULL AND desired_active != observed_active
+        """, fetch="all") or []
+        switched = 0
+        now = time.time()
+        for offer_id, game_id, desired in diverged:
+            if game_ids is not None and game_id not in game_ids:
+                continue
+            if desired and _activation_holds.get(game_id, 0) > now:
+                # Пауза после окончания аренды: лот включится при сверке после ее окончания
+                continue
+            try:
+                fields = account.get_lot_fields(offer_id)
+                if fields.active == bool(desired):
+                    # Лот уже в нужном состоянии (например, изменен вручную) - просто запоминаем
+                    set_observed_state(offer_id, fields.active)
+                    continue
+                fields.active = bool(desired)
+                account.save_lot(fields)
+                set_observed_state(offer_id, fields.active)
+                switched += 1
+                if desired:
+                    logging.info(f"[RECONCILER] Лот {offer_id} активирован.")
+                    send_telegram_notification(f"✅ Лот {offer_id} АКТИВИРОВАН.")
+                else:
+                    logging.info(f"[RECONCILER] Лот {offer_id} деактивирован.")
+                    send_telegram_notification(f"⛔️ Лот {offer_id} ДЕАКТИВИРОВАН.")
+            except Exception as e:
+                logging.error(f"[RECONCILER] Ошибка переключения лота {offer_id}: {e}")
+        return switched
@@ -14,6 +14,7 @@ import pysftp
 
 import config
 import db_handler
+from database import close_all_connections
 from ui import UIManager
 from utils import background_checker, format_timedelta, format_display_time
 
@@ -36,6 +37,7 @@ def download_db():
     sftp = sftp_connect()
     if sftp:
         try:
+            close_all_connections()  # закрываем соединения перед заменой файла БД
             sftp.get(config.REMOTE_DB_PATH, config.DB_FILE)
             logging.info("База данных успешно скачана.")
             messagebox.showinfo("Синхронизация", "Актуальная база данных успешно скачана с сервера.")
@@ -51,6 +53,7 @@ def upload_db():
     sftp = sftp_connect()
     if sftp:
         try:
+            close_all_connections()  # закрываем соединения перед копированием файла БД
             sftp.put(config.DB_FILE, config.REMOTE_DB_PATH)
             logging.info("База данных успешно загружена на сервер.")
             messagebox.showinfo("Синхронизация", "Изменения успешно сохранены на сервере.")
@@ -95,8 +98,13 @@ class RentalApp:
         self.ui.update_lots_listbox(self.games, self.ui.game_var.get())
 
     def load_all_data_from_db(self):
-        games_raw = db_handler.db_query("SELECT id, name, funpay_offer_ids FROM games ORDER BY name", fetch="all") or []
-        self.games[:] = [{"id": g[0], "name": g[1], "offer_ids": g[2]} for g in games_raw]
+        games_raw = db_handler.db_query("SELECT id, name FROM games ORDER BY name", fetch="all") or []
+        offers_raw = db_handler.db_query("SELECT game_id, offer_id FROM game_offers ORDER BY offer_id",
+                                         fetch="all") or []
+        offer_ids_by_game = {}
+        for game_id, offer_id in offers_raw:
+            offer_ids_by_game.setdefault(game_id, []).append(offer_id)
+        self.games[:] = [{"id": g[0], "name": g[1], "offer_ids": offer_ids_by_game.get(g[0], [])} for g in games_raw]
         game_id_map = {g['id']: g['name'] for g in self.games}
         accounts_raw = db_handler.db_query("SELECT id, login, password, game_id, rented_by FROM accounts",
                                            fetch="all") or []
@@ -108,12 +116,8 @@ class RentalApp:
             fetch="all") or []
         new_rentals, new_history = [], []
         for row in rentals_raw:
-            try:
-                start_time = datetime.fromisoformat(row[2]).astimezone(MOSCOW_TZ) if row[2] else None
-                end_time = datetime.fromisoformat(row[3]).astimezone(MOSCOW_TZ) if row[3] else None
-            except ValueError:  # На случай, если в БД есть старые "наивные" даты
-                start_time = pytz.utc.localize(datetime.fromisoformat(row[2])).astimezone(MOSCOW_TZ) if row[2] else None
-                end_time = pytz.utc.localize(datetime.fromisoformat(row[3])).astimezone(MOSCOW_TZ) if row[3] else None
+            start_time = db_handler.from_timestamp(row[2]) if row[2] else None
+            end_time = db_handler.from_timestamp(row[3]) if row[3] else None
 
             item = {"id": row[0], "name": row[1], "start": start_time, "end": end_time, "minutes": row[4],
                     "info": row[5], "account_login": row[7] or "УДАЛЕН", "account_password": row[8] or "УДАЛЕН",
@@ -140,9 +144,9 @@ class RentalApp:
         selected_game_name = self.ui.game_var.get()
         if not selected_game_name: return
         game = next((g for g in self.games if g['name'] == selected_game_name), None)
-        if game and game.get('offer_ids'):
-            for lot_id in sorted(game['offer_ids'].split(',')):
-                if lot_id: listbox.insert(tk.END, lot_id)
+        if game:
+            for lot_id in game['offer_ids']:
+                listbox.insert(tk.END, lot_id)
 
     def add_lot_to_game(self):
         selected_game_name = self.ui.game_var.get()
@@ -155,15 +159,11 @@ class RentalApp:
             return
         game = next((g for g in self.games if g['name'] == selected_game_name), None)
         if not game: return
-        current_ids_str = game.get('offer_ids') or ""
-        current_ids = set(current_ids_str.split(',')) if current_ids_str else set()
-        if new_lot_id in current_ids:
-            messagebox.showwarning("Внимание", "Этот ID лота уже добавлен к игре.")
+        owner = db_handler.find_game_by_offer_id(new_lot_id)
+        if owner:
+            messagebox.showwarning("Внимание", f"Этот ID лота уже привязан к игре '{owner[1]}'.")
             return
-        current_ids.add(new_lot_id)
-        current_ids.discard('')
-        new_ids_str = ",".join(sorted(list(current_ids)))
-        db_handler.set_game_offer_ids(game['id'], new_ids_str)
+        db_handler.add_offer_id_to_game(game['id'], int(new_lot_id))
         self.ui.lot_id_entry.delete(0, tk.END)
         self.full_update()
 
@@ -176,11 +176,7 @@ class RentalApp:
         selected_game_name = self.ui.game_var.get()
         game = next((g for g in self.games if g['name'] == selected_game_name), None)
         if not game: return
-        current_ids_str = game.get('offer_ids') or ""
-        current_ids = set(current_ids_str.split(','))
-        current_ids.discard(lot_id_to_remove)
-        new_ids_str = ",".join(sorted(list(current_ids)))
-        db_handler.set_game_offer_ids(game['id'], new_ids_str)
+        db_handler.remove_offer_id_from_game(game['id'], lot_id_to_remove)
         self.full_update()
 
     def update_rental_details(self, rental_id, new_name, new_info):
@@ -258,8 +254,9 @@ class RentalApp:
             end_time = start_time + timedelta(minutes=total_minutes)
             remind_time = end_time - timedelta(minutes=5)
             rental_id = str(uuid.uuid4())
-            db_query_params = (rental_id, name, account_id, start_time.isoformat(), end_time.isoformat(),
-                               remind_time.isoformat(), total_minutes, info)
+            db_query_params = (rental_id, name, account_id, db_handler.to_timestamp(start_time),
+                               db_handler.to_timestamp(end_time), db_handler.to_timestamp(remind_time), total_minutes,
+                               info)
             db_handler.db_query(
                 "INSERT INTO rentals (id, client_name, account_id, start_time, end_time, remind_time, initial_minutes, info) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
                 db_query_params)
@@ -408,6 +405,7 @@ class RentalApp:
                                                    initialfile=f"rentals_backup_{datetime.now().strftime('%Y-%m-%d')}.db")
         if not backup_path: return
         try:
+            close_all_connections()  # закрываем соединения перед копированием файла БД
             shutil.copy(config.DB_FILE, backup_path)
             messagebox.showinfo("Успех", f"Резервная копия успешно создана:\n{backup_path}")
         except Exception as e:
@@ -420,6 +418,7 @@ class RentalApp:
                                                   filetypes=[("База данных", "*.db")])
         if not restore_path: return
         try:
+            close_all_connections()  # закрываем соединения перед заменой файла БД
             shutil.copy(restore_path, config.DB_FILE)
             messagebox.showinfo("Успех", "База данных успешно восстановлена.")
             self.full_update()
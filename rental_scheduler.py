@@ -0,0 +1,109 @@
+# rental_scheduler.py
+# Планировщик сроков аренд: хранит remind_time / end_time активных аренд в куче (min-heap)
+# и спит ровно до ближайшего срока, вместо того чтобы раз в минуту сканировать таблицу rentals.
+import heapq
+import logging
+import threading
+import time
+
+from config import RENTAL_SCHEDULER_RELOAD_SECONDS
+from database import db_query
+
+REMIND = "remind"
+EXPIRE = "expire"
+
+
+class RentalScheduler:
+    """
+    Вызывает on_remind() при наступлении remind_time и on_expire() при наступлении end_time любой активной аренды.
+    Обработчики сами выбирают из БД все наступившие напоминания / истекшие аренды, поэтому срабатывания идемпотентны.
+    Аренды, измененные в этом процессе, перепланируются через rearm(); изменения из других процессов (GUI)
+    подхватываются полной перезагрузкой раз в RENTAL_SCHEDULER_RELOAD_SECONDS.
+    """
+
+    def __init__(self, on_remind, on_expire, reload_interval=RENTAL_SCHEDULER_RELOAD_SECONDS):
+        self.on_remind = on_remind
+        self.on_expire = on_expire
+        self.reload_interval = reload_interval
+        self._heap = []  # [(время, тип, id аренды)]
+        self._deadlines = {}  # {(тип, id аренды): время} - актуальные сроки, устаревшие записи кучи пропускаются
+        self._cond = threading.Condition()
+        self._reload_requested = True
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="RentalScheduler", daemon=True)
+        self._thread.start()
+        logging.info("[SCHEDULER] Планировщик сроков аренд запущен.")
+
+    def request_reload(self):
+        """Запрашивает полную перезагрузку сроков из БД."""
+        with self._cond:
+            self._reload_requested = True
+            self._cond.notify()
+
+    def rearm(self, rental_id):
+        """Перечитывает сроки одной аренды (после создания / продления / завершения)."""
+        row = db_query("SELECT remind_time, end_time, pre_reminded, is_history FROM rentals WHERE id = ?",
+                       (rental_id,), fetch="one")
+        with self._cond:
+            self._deadlines.pop((REMIND, rental_id), None)
+            self._deadlines.pop((EXPIRE, rental_id), None)
+            if row and not row[3]:
+                self._push_rental(rental_id, row[0], row[1], row[2])
+            self._cond.notify()
+
+    def _push_rental(self, rental_id, remind_time, end_time, pre_reminded):
+        # Сроки хранятся в БД как время Unix (UTC)
+        if remind_time and not pre_reminded:
+            self._push(remind_time, REMIND, rental_id)
+        self._push(end_time, EXPIRE, rental_id)
+
+    def _push(self, deadline, kind, rental_id):
+        self._deadlines[(kind, rental_id)] = deadline
+        heapq.heappush(self._heap, (deadline, kind, rental_id))
+
+    def _reload(self):
+        rows = db_query("SELECT id, remind_time, end_time, pre_reminded FROM rentals WHERE is_history = 0",
+                        fetch="all") or []
+        self._heap, self._deadlines = [], {}
+        for rental_id, remind_time, end_time, pre_reminded in rows:
+            self._push_rental(rental_id, remind_time, end_time, pre_reminded)
+        logging.debug(f"[SCHEDULER] Загружено сроков: {len(self._heap)}.")
+
+    def _pop_due(self, now):
+        """Извлекает из кучи все наступившие сроки и возвращает множество их типов."""
+        due = set()
+        while self._heap and self._heap[0][0] <= now:
+            deadline, kind, rental_id = heapq.heappop(self._heap)
+            if self._deadlines.get((kind, rental_id)) == deadline:
+                del self._deadlines[(kind, rental_id)]
+                due.add(kind)
+        return due
+
+    def _run(self):
+        next_reload = 0
+        while True:
+            with self._cond:
+                now = time.time()
+                if self._reload_requested or now >= next_reload:
+                    self._reload_requested = False
+                    next_reload = now + self.reload_interval
+                    try:
+                        self._reload()
+                    except Exception:
+                        logging.exception("[SCHEDULER] Ошибка загрузки сроков аренд.")
+                due = self._pop_due(now)
+                if not due:
+                    timeout = next_reload - now
+                    if self._heap:
+                        timeout = min(timeout, self._heap[0][0] - now)
+                    self._cond.wait(max(timeout, 0))
+                    continue
+            # Обработчики вызываются без блокировки: они могут обращаться к rearm()
+            for kind, handler in ((REMIND, self.on_remind), (EXPIRE, self.on_expire)):
+                if kind in due:
+                    try:
+                        handler()
+                    except Exception:
+                        logging.exception(f"[SCHEDULER] Ошибка обработки срока ({kind}).")
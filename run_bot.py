@@ -31,7 +31,8 @@ def main():
     db_handler.initialize_and_update_db()
 
     try:
-        shared.funpay_account = Account(golden_key=config.GOLDEN_KEY, user_agent=config.USER_AGENT)
+        shared.funpay_account = Account(golden_key=config.GOLDEN_KEY, user_agent=config.USER_AGENT,
+                                          chats_cache_size=config.CHATS_CACHE_SIZE, base_url=config.FUNPAY_BASE_URL)
         shared.funpay_account.get()
         logging.info(f"Авторизация на FunPay как '{shared.funpay_account.username}' (ID: {shared.funpay_account.id}).")
     except Exception as e:
@@ -135,9 +135,8 @@ def rentals_command(update: Update, context: CallbackContext):
         message = "📋 <b>Список активных аренд:</b>\n\n"
         # ---> ИСПРАВЛЕНИЕ: Используем единый часовой пояс <---
         now_aware = datetime.now(MOSCOW_TZ)
-        for client, game, end_time_iso, login in rentals:
-            # Превращаем время из базы в "осведомленное"
-            end_time_aware = datetime.fromisoformat(end_time_iso)
+        for client, game, end_time_ts, login in rentals:
+            end_time_aware = db_handler.from_timestamp(end_time_ts)
             remaining = end_time_aware - now_aware
             message += f"👤 <i>{client}</i> ({game})\n   Аккаунт: <code>{login}</code>\n   Осталось: <b>{format_timedelta(remaining)}</b>\n\n"
 